@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the compiled scoring on tensorflow: scoring throughput of the eager
+scoring, of the model forward and in-backend post-processing traced as a single
+`tf.function`, and of the same graph compiled with XLA.
+"""
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+
+INPUT_DIM = 64
+FEATURE_DIM = 256
+N_CLASSES = 10
+N_FIT = 2000
+N_QUERIES = 2048
+MODES = {"eager": None, "compiled": False, "xla": True}
+
+
+def make_model():
+    tf.random.set_seed(0)
+    return tf.keras.Sequential(
+        [
+            tf.keras.layers.Input(shape=(INPUT_DIM,)),
+            tf.keras.layers.Dense(FEATURE_DIM, activation="relu"),
+            tf.keras.layers.Dense(FEATURE_DIM, activation="relu"),
+            tf.keras.layers.Dense(N_CLASSES),
+        ]
+    )
+
+
+def benchmark(method, kwargs, batch_size, model, fit_data, queries):
+    results = {}
+    for mode, jit_compile in MODES.items():
+        oodmodel = method(**kwargs)
+        oodmodel.fit(model, fit_data if oodmodel.requires_to_fit_dataset else None)
+        if jit_compile is not None:
+            oodmodel.set_compiled_scoring(jit_compile=jit_compile)
+        batches = [
+            tf.constant(queries[i : i + batch_size])
+            for i in range(0, len(queries), batch_size)
+        ]
+        # warm-up, including the tracing of the graph
+        oodmodel.score(batches[0])
+        start = time.perf_counter()
+        scores = np.concatenate([oodmodel.score(batch) for batch in batches])
+        results[mode] = (len(queries) / (time.perf_counter() - start), scores)
+    return results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = make_model()
+    fit_data = (
+        rng.standard_normal((N_FIT, INPUT_DIM)).astype(np.float32),
+        rng.integers(0, N_CLASSES, N_FIT),
+    )
+    queries = rng.standard_normal((N_QUERIES, INPUT_DIM)).astype(np.float32)
+    methods = [
+        (MLS, dict()),
+        (Energy, dict()),
+        (ODIN, dict()),
+        (VIM, dict(princ_dims=32)),
+        (Mahalanobis, dict(eps=0.0)),
+        (Mahalanobis, dict(eps=0.002)),
+        (DKNN, dict(nearest=10)),
+    ]
+    print(
+        f"{'method':>12} {'batch':>6} {'eager samples/s':>16} "
+        f"{'compiled samples/s':>19} {'xla samples/s':>14} {'max abs. dev.':>14}"
+    )
+    for method, kwargs in methods:
+        for batch_size in [8, 128]:
+            results = benchmark(method, kwargs, batch_size, model, fit_data, queries)
+            deviation = max(
+                np.max(np.abs(results[mode][1] - results["eager"][1]))
+                for mode in ["compiled", "xla"]
+            )
+            print(
+                f"{method.__name__:>12} {batch_size:>6} "
+                f"{results['eager'][0]:>16.0f} {results['compiled'][0]:>19.0f} "
+                f"{results['xla'][0]:>14.0f} {deviation:>14.2e}"
+            )
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the per-class and consolidated DKNN indexes for growing label spaces:
+time to build the indexes from a set of references, and time to search the nearest
+neighbors of a batch of queries among the references of their class.
+"""
+import time
+
+import numpy as np
+
+from oodeel.methods import DKNN
+
+DIM = 128
+REFERENCES_PER_CLASS = 20
+N_QUERIES = 1024
+NEAREST = 5
+
+
+def _normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def benchmark(n_classes, consolidated, rng):
+    references = {
+        class_label: _normalize(
+            rng.standard_normal((REFERENCES_PER_CLASS, DIM)).astype(np.float32)
+        )
+        for class_label in range(n_classes)
+    }
+    queries = _normalize(rng.standard_normal((N_QUERIES, DIM)).astype(np.float32))
+    labels = rng.integers(0, n_classes, N_QUERIES)
+
+    dknn = DKNN(nearest=NEAREST, consolidated=consolidated)
+    start = time.perf_counter()
+    dknn.set_references(references)
+    dknn._search(queries[:1], labels[:1], NEAREST)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    distances = dknn._search(queries, labels, NEAREST)
+    search_time = time.perf_counter() - start
+    return build_time, search_time, distances
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'classes':>8} {'mode':>13} {'build (s)':>10} {'search (ms)':>12}")
+    for n_classes in [100, 1000, 20000]:
+        results = {}
+        for consolidated in [False, True]:
+            build_time, search_time, results[consolidated] = benchmark(
+                n_classes, consolidated, np.random.default_rng(n_classes)
+            )
+            mode = "consolidated" if consolidated else "per-class"
+            print(
+                f"{n_classes:>8} {mode:>13} {build_time:>10.3f} "
+                f"{1000 * search_time:>12.1f}"
+            )
+        assert np.allclose(results[False], results[True], atol=1e-5)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the score dtype of Mahalanobis on torch: throughput of the scoring
+(with and without input perturbation) and deviation of the scores from the
+float64 ones.
+"""
+import time
+
+import numpy as np
+import torch
+
+from oodeel.methods import Mahalanobis
+
+INPUT_DIM = 256
+N_CLASSES = 100
+SAMPLES_PER_CLASS = 40
+N_QUERIES = 4096
+BATCH_SIZE = 512
+
+
+def make_dataset(n_samples, rng):
+    labels = rng.integers(0, N_CLASSES, n_samples)
+    inputs = rng.standard_normal((n_samples, INPUT_DIM)).astype(np.float32)
+    return [
+        (
+            torch.tensor(inputs[i : i + BATCH_SIZE]),
+            torch.tensor(labels[i : i + BATCH_SIZE]),
+        )
+        for i in range(0, n_samples, BATCH_SIZE)
+    ]
+
+
+def benchmark(dim, eps, score_dtypes, rng):
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Linear(INPUT_DIM, dim),
+        torch.nn.ReLU(),
+        torch.nn.Linear(dim, N_CLASSES),
+    )
+    fit_dataset = make_dataset(N_CLASSES * SAMPLES_PER_CLASS, rng)
+    queries = make_dataset(N_QUERIES, rng)
+
+    results = {}
+    for score_dtype in score_dtypes:
+        mahalanobis = Mahalanobis(eps=eps).set_dtype_policy(score=score_dtype)
+        mahalanobis.fit(model, fit_dataset)
+        mahalanobis.score(queries[0])
+        start = time.perf_counter()
+        scores = mahalanobis.score(queries)
+        results[score_dtype] = (N_QUERIES / (time.perf_counter() - start), scores)
+    return results
+
+
+if __name__ == "__main__":
+    score_dtypes = ["float64", "float32", "float16", "bfloat16"]
+    print(
+        f"{'dim':>6} {'eps':>6} {'dtype':>9} {'samples/s':>10} "
+        f"{'max rel. dev.':>14} {'median rel. dev.':>17}"
+    )
+    for dim in [512, 2048]:
+        for eps in [0, 0.002]:
+            results = benchmark(dim, eps, score_dtypes, np.random.default_rng(dim))
+            reference = results["float64"][1]
+            for score_dtype, (throughput, scores) in results.items():
+                deviation = np.abs(scores - reference) / np.abs(reference)
+                print(
+                    f"{dim:>6} {eps:>6} {score_dtype:>9} {throughput:>10.0f} "
+                    f"{np.max(deviation):>14.2e} {np.median(deviation):>17.2e}"
+                )
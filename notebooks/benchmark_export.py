@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the exported detectors on torch: scoring throughput of
+`OODModel.score` and of the exported TorchScript module and ONNX graph (run with
+onnxruntime), which compute the logits and the OOD scores in a single graph call.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import onnxruntime
+import torch
+
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import VIM
+
+INPUT_DIM = 64
+FEATURE_DIM = 256
+N_CLASSES = 10
+N_FIT = 2000
+N_QUERIES = 8192
+
+
+def make_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Linear(INPUT_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, N_CLASSES),
+    )
+
+
+def throughput(score_fn, batches):
+    score_fn(batches[0])
+    start = time.perf_counter()
+    scores = np.concatenate([score_fn(batch) for batch in batches])
+    return len(scores) / (time.perf_counter() - start), scores
+
+
+def benchmark(method, kwargs, batch_size, model, fit_data, queries, tmpdirname):
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, fit_data if oodmodel.requires_to_fit_dataset else None)
+    batches = torch.split(queries, batch_size)
+
+    ts_path = os.path.join(tmpdirname, "exported.pt")
+    oodmodel.export(ts_path, example_inputs=batches[0])
+    exported = torch.jit.load(ts_path)
+    onnx_path = os.path.join(tmpdirname, "exported.onnx")
+    oodmodel.export(onnx_path, example_inputs=batches[0], export_format="onnx")
+    session = onnxruntime.InferenceSession(onnx_path)
+
+    def score_torchscript(batch):
+        with torch.inference_mode():
+            return exported(batch)[1].numpy()
+
+    def score_onnx(batch):
+        return session.run(["ood_score"], {"inputs": batch.numpy()})[0]
+
+    return {
+        "score": throughput(oodmodel.score, batches),
+        "torchscript": throughput(score_torchscript, batches),
+        "onnx": throughput(score_onnx, batches),
+    }
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = make_model()
+    fit_data = (
+        torch.Tensor(rng.standard_normal((N_FIT, INPUT_DIM))),
+        torch.Tensor(rng.integers(0, N_CLASSES, N_FIT)),
+    )
+    queries = torch.Tensor(rng.standard_normal((N_QUERIES, INPUT_DIM)))
+    methods = [
+        (MLS, dict()),
+        (Energy, dict()),
+        (VIM, dict(princ_dims=32)),
+        (Mahalanobis, dict(eps=0.0, output_layers_id=[-2])),
+    ]
+    print(
+        f"{'method':>12} {'batch':>6} {'score samples/s':>16} "
+        f"{'torchscript samples/s':>22} {'onnx samples/s':>15} {'max abs. dev.':>14}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        for method, kwargs in methods:
+            for batch_size in [8, 128]:
+                results = benchmark(
+                    method, kwargs, batch_size, model, fit_data, queries, tmpdirname
+                )
+                deviation = max(
+                    np.max(np.abs(results[mode][1] - results["score"][1]))
+                    for mode in ["torchscript", "onnx"]
+                )
+                print(
+                    f"{method.__name__:>12} {batch_size:>6} "
+                    f"{results['score'][0]:>16.0f} "
+                    f"{results['torchscript'][0]:>22.0f} "
+                    f"{results['onnx'][0]:>15.0f} {deviation:>14.2e}"
+                )
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the faiss and NumPy kNN backends of DKNN for growing reference sets:
+time to search the nearest neighbors of a batch of queries among the references.
+"""
+import time
+
+import numpy as np
+
+from oodeel.utils.knn import FaissBackend
+from oodeel.utils.knn import NumpyBackend
+
+DIM = 256
+N_QUERIES = 1024
+NEAREST = 5
+N_REPEATS = 3
+
+
+def _normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def benchmark(backend, queries, references):
+    backend.knn(queries[:1], references, NEAREST)
+    times = []
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        distances, _ = backend.knn(queries, references, NEAREST)
+        times.append(time.perf_counter() - start)
+    return min(times), distances
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    queries = _normalize(rng.standard_normal((N_QUERIES, DIM)).astype(np.float32))
+    backends = {
+        "faiss": FaissBackend(),
+        "numpy": NumpyBackend(),
+        "numpy (1 thread)": NumpyBackend(n_threads=1),
+    }
+    print(f"{'references':>10} {'backend':>16} {'search (ms)':>12}")
+    for n_references in [10000, 100000, 1000000]:
+        references = _normalize(
+            rng.standard_normal((n_references, DIM)).astype(np.float32)
+        )
+        results = {}
+        for name, backend in backends.items():
+            search_time, results[name] = benchmark(backend, queries, references)
+            print(f"{n_references:>10} {name:>16} {1000 * search_time:>12.1f}")
+        assert np.allclose(results["faiss"], results["numpy"], atol=1e-4)
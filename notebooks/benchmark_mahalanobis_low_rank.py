@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the full and low-rank plus diagonal covariance models of Mahalanobis on
+synthetic high dimensional features: memory of the precision, scoring latency per
+sample, and agreement with the full model (AUROC and rank correlation of the scores).
+
+The ID features are drawn from class-conditional gaussians sharing a covariance with
+a power-law spectrum, and two OOD sets from the same classes with an additional
+variance, either in the 64 highest variance directions ("head", +56%), which the
+low-rank model keeps, or in the lowest variance half of the directions ("tail",
++10%), which it merges into its residual.
+"""
+import time
+
+import numpy as np
+import torch
+from scipy import stats
+
+from oodeel.eval.metrics import bench_metrics
+from oodeel.methods import Mahalanobis
+
+N_CLASSES = 10
+N_FIT = 20000
+N_TEST = 2000
+BATCH_SIZE = 256
+
+
+def _sample(rng, dim, means, basis, scales, n):
+    labels = rng.integers(0, N_CLASSES, n)
+    features = means[labels] + (rng.standard_normal((n, dim)) * scales) @ basis.T
+    return torch.tensor(features, dtype=torch.float64), torch.tensor(labels)
+
+
+def _precision_bytes(mahalanobis):
+    return sum(p.numel() * p.element_size() for p in mahalanobis._get_precision())
+
+
+def benchmark(dim, configs, rng):
+    basis, _ = np.linalg.qr(rng.standard_normal((dim, dim)))
+    scales = np.arange(1, dim + 1) ** -0.5
+    means = rng.standard_normal((N_CLASSES, dim)) * 0.1
+    fit_x, fit_y = _sample(rng, dim, means, basis, scales, N_FIT)
+    id_x, _ = _sample(rng, dim, means, basis, scales, N_TEST)
+    ood_scales = {
+        "head": scales * (1 + 0.25 * (np.arange(dim) < 64)),
+        "tail": scales * (1 + 0.05 * (np.arange(dim) >= dim // 2)),
+    }
+    ood_x = {
+        name: _sample(rng, dim, means, basis, ood_scales[name], N_TEST)[0]
+        for name in ["head", "tail"]
+    }
+
+    # the penultimate layer of this model outputs the (flattened) inputs
+    model = torch.nn.Sequential(
+        torch.nn.Flatten(), torch.nn.Linear(dim, N_CLASSES)
+    ).double()
+    fit_dataset = [
+        (fit_x[i : i + BATCH_SIZE], fit_y[i : i + BATCH_SIZE])
+        for i in range(0, N_FIT, BATCH_SIZE)
+    ]
+
+    results, reference_scores = [], None
+    for rank, residual in configs:
+        mahalanobis = Mahalanobis(eps=0, rank=rank, residual=residual)
+        start = time.perf_counter()
+        mahalanobis.fit(model, fit_dataset)
+        memory = _precision_bytes(mahalanobis)
+        fit_time = time.perf_counter() - start
+
+        mahalanobis.score(id_x[:BATCH_SIZE])
+        start = time.perf_counter()
+        scores_id = np.concatenate(
+            [
+                mahalanobis.score(id_x[i : i + BATCH_SIZE])
+                for i in range(0, N_TEST, BATCH_SIZE)
+            ]
+        )
+        latency = (time.perf_counter() - start) / N_TEST
+        scores_ood = {name: mahalanobis.score(x) for name, x in ood_x.items()}
+        scores = np.concatenate([scores_id, *scores_ood.values()])
+        if reference_scores is None:
+            reference_scores = scores
+        aurocs = [
+            bench_metrics((scores_id, scores_ood[name]), metrics=["auroc"])["auroc"]
+            for name in ["head", "tail"]
+        ]
+        correlation = stats.spearmanr(scores, reference_scores)[0]
+        results.append(
+            (rank, residual, fit_time, memory, latency, *aurocs, correlation)
+        )
+    return results
+
+
+if __name__ == "__main__":
+    configs = [
+        (None, "isotropic"),
+        (64, "isotropic"),
+        (64, "diagonal"),
+        (256, "isotropic"),
+        (256, "diagonal"),
+    ]
+    print(
+        f"{'dim':>5} {'rank':>5} {'residual':>10} {'fit (s)':>8} {'memory (MB)':>12} "
+        f"{'latency (us)':>13} {'auroc head':>11} {'auroc tail':>11} {'spearman':>9}"
+    )
+    for dim in [2048, 4096]:
+        rng = np.random.default_rng(dim)
+        for result in benchmark(dim, configs, rng):
+            rank, residual, fit_time, memory, latency, *aurocs, correlation = result
+            rank = "full" if rank is None else rank
+            residual = "-" if rank == "full" else residual
+            print(
+                f"{dim:>5} {rank:>5} {residual:>10} {fit_time:>8.2f} "
+                f"{memory / 2**20:>12.2f} {1e6 * latency:>13.1f} "
+                f"{aurocs[0]:>11.3f} {aurocs[1]:>11.3f} {correlation:>9.3f}"
+            )
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the per-class and nearest center scoring of Mahalanobis for growing
+label spaces: time to score a batch of queries once fitted.
+"""
+import time
+
+import numpy as np
+import torch
+
+from oodeel.methods import Mahalanobis
+
+DIM = 256
+SAMPLES_PER_CLASS = 4
+N_QUERIES = 256
+BATCH_SIZE = 1024
+
+
+def benchmark(n_classes, modes, rng):
+    means = rng.standard_normal((n_classes, DIM))
+    labels = np.repeat(np.arange(n_classes), SAMPLES_PER_CLASS)
+    features = means[labels] + rng.standard_normal((len(labels), DIM))
+    fit_dataset = [
+        (
+            torch.tensor(features[i : i + BATCH_SIZE]),
+            torch.tensor(labels[i : i + BATCH_SIZE]),
+        )
+        for i in range(0, len(labels), BATCH_SIZE)
+    ]
+    queries = torch.tensor(rng.standard_normal((N_QUERIES, DIM)))
+
+    # the penultimate layer of this model outputs the (flattened) inputs
+    model = torch.nn.Sequential(
+        torch.nn.Flatten(), torch.nn.Linear(DIM, n_classes)
+    ).double()
+
+    results = {}
+    for name, kwargs in modes.items():
+        mahalanobis = Mahalanobis(eps=0, **kwargs)
+        mahalanobis.fit(model, fit_dataset)
+        mahalanobis.score(queries[:1])
+        start = time.perf_counter()
+        scores = mahalanobis.score(queries)
+        results[name] = (time.perf_counter() - start, scores)
+    return results
+
+
+if __name__ == "__main__":
+    modes = {
+        "per-class": {},
+        "nearest center (faiss)": {"nearest_center": True, "knn_backend": "faiss"},
+        "nearest center (numpy)": {"nearest_center": True, "knn_backend": "numpy"},
+    }
+    print(f"{'classes':>8} {'mode':>23} {'score (ms)':>11}")
+    for n_classes in [100, 1000, 10000, 30000]:
+        # the per-class scoring is too slow to be measured beyond 1000 classes
+        _modes = {
+            name: kwargs
+            for name, kwargs in modes.items()
+            if n_classes <= 1000 or name != "per-class"
+        }
+        results = benchmark(n_classes, _modes, np.random.default_rng(n_classes))
+        for name, (score_time, _) in results.items():
+            print(f"{n_classes:>8} {name:>23} {1000 * score_time:>11.1f}")
+        reference = results[list(results.keys())[0]][1]
+        for _, scores in results.values():
+            assert np.allclose(scores, reference, rtol=1e-3)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the post-processing backend on tensorflow: scoring throughput of small
+batches with the post-processing run by the tensorflow operator (eager) or by the
+NumPy operator, the features being extracted by the same keras model.
+"""
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import VIM
+
+INPUT_DIM = 64
+FEATURE_DIM = 256
+N_CLASSES = 10
+N_FIT = 2000
+N_QUERIES = 2048
+
+
+def make_model():
+    tf.random.set_seed(0)
+    return tf.keras.Sequential(
+        [
+            tf.keras.layers.Input(shape=(INPUT_DIM,)),
+            tf.keras.layers.Dense(FEATURE_DIM, activation="relu"),
+            tf.keras.layers.Dense(N_CLASSES),
+        ]
+    )
+
+
+def benchmark(method, kwargs, batch_size, model, fit_data, queries):
+    results = {}
+    for backend in [None, "numpy"]:
+        oodmodel = method(**kwargs).set_postprocessing_backend(backend)
+        oodmodel.fit(model, fit_data if oodmodel.requires_to_fit_dataset else None)
+        batches = [
+            queries[i : i + batch_size] for i in range(0, len(queries), batch_size)
+        ]
+        oodmodel.score(batches[0])
+        start = time.perf_counter()
+        scores = np.concatenate([oodmodel.score(batch) for batch in batches])
+        results[backend] = (len(queries) / (time.perf_counter() - start), scores)
+    return results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = make_model()
+    fit_data = (
+        rng.standard_normal((N_FIT, INPUT_DIM)).astype(np.float32),
+        rng.integers(0, N_CLASSES, N_FIT),
+    )
+    queries = rng.standard_normal((N_QUERIES, INPUT_DIM)).astype(np.float32)
+    methods = [
+        (Energy, dict()),
+        (VIM, dict(princ_dims=32)),
+        (Mahalanobis, dict(eps=0.0)),
+        (DKNN, dict(nearest=10)),
+    ]
+    print(
+        f"{'method':>12} {'batch':>6} {'tf samples/s':>13} {'numpy samples/s':>16} "
+        f"{'speedup':>8} {'max abs. dev.':>14}"
+    )
+    for method, kwargs in methods:
+        for batch_size in [8, 32, 128]:
+            results = benchmark(method, kwargs, batch_size, model, fit_data, queries)
+            (tf_throughput, tf_scores), (np_throughput, np_scores) = (
+                results[None],
+                results["numpy"],
+            )
+            print(
+                f"{method.__name__:>12} {batch_size:>6} {tf_throughput:>13.0f} "
+                f"{np_throughput:>16.0f} {np_throughput / tf_throughput:>8.2f} "
+                f"{np.max(np.abs(np_scores - tf_scores)):>14.2e}"
+            )
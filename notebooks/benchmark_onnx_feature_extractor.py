@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the ONNX Runtime feature extractor: scoring throughput of the
+non-gradient detectors fitted on a torch model and on its ONNX export, the
+latter being run with onnxruntime and post-processed with NumPy.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import VIM
+from oodeel.models.onnx_feature_extractor import OnnxModel
+
+INPUT_DIM = 64
+FEATURE_DIM = 256
+N_CLASSES = 10
+N_FIT = 2000
+N_QUERIES = 8192
+
+
+def make_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Linear(INPUT_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, N_CLASSES),
+    ).eval()
+
+
+def export_model(model, path):
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (torch.rand(4, INPUT_DIM),),
+            path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        )
+    return path
+
+
+def throughput(oodmodel, batches):
+    oodmodel.score(batches[0])
+    start = time.perf_counter()
+    scores = np.concatenate([oodmodel.score(batch) for batch in batches])
+    return len(scores) / (time.perf_counter() - start), scores
+
+
+def benchmark(method, kwargs, batch_size, models, fit_data, queries):
+    results = {}
+    for name, (model, layers_id) in models.items():
+        if layers_id is not None:
+            kwargs = dict(kwargs, output_layers_id=layers_id)
+        oodmodel = method(**kwargs)
+        oodmodel.fit(model, fit_data if oodmodel.requires_to_fit_dataset else None)
+        results[name] = throughput(oodmodel, torch.split(queries, batch_size))
+    return results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = make_model()
+    fit_data = (
+        torch.Tensor(rng.standard_normal((N_FIT, INPUT_DIM))),
+        torch.Tensor(rng.integers(0, N_CLASSES, N_FIT)),
+    )
+    queries = torch.Tensor(rng.standard_normal((N_QUERIES, INPUT_DIM)))
+    methods = [
+        (MLS, dict(), None),
+        (Energy, dict(), None),
+        (VIM, dict(princ_dims=32), [-2, -1]),
+        (DKNN, dict(nearest=10), [-2]),
+        (Mahalanobis, dict(eps=0.0), [-2]),
+    ]
+    print(
+        f"{'method':>12} {'batch':>6} {'torch samples/s':>16} "
+        f"{'onnx samples/s':>15} {'max abs. dev.':>14}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = export_model(model, os.path.join(tmpdirname, "model.onnx"))
+        onnx_model = OnnxModel(path, intra_op_num_threads=torch.get_num_threads())
+        # the penultimate features (second ReLU) are identified by layer name
+        relu_names = [
+            n.name for n in onnx_model.proto.graph.node if n.op_type == "Relu"
+        ]
+        for method, kwargs, layers_id in methods:
+            torch_ids, onnx_ids = layers_id, layers_id
+            if layers_id is not None:
+                torch_ids = ["3" if i == -2 else i for i in layers_id]
+                onnx_ids = [relu_names[1] if i == -2 else i for i in layers_id]
+            models = {"torch": (model, torch_ids), "onnx": (onnx_model, onnx_ids)}
+            for batch_size in [8, 128]:
+                results = benchmark(
+                    method, kwargs, batch_size, models, fit_data, queries
+                )
+                deviation = np.max(np.abs(results["onnx"][1] - results["torch"][1]))
+                print(
+                    f"{method.__name__:>12} {batch_size:>6} "
+                    f"{results['torch'][0]:>16.0f} {results['onnx'][0]:>15.0f} "
+                    f"{deviation:>14.2e}"
+                )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Benchmark of the compiled scoring on torch: scoring throughput of the eager
+scoring, of the model forward and in-backend post-processing traced with
+`torch.jit.trace`, and of the same function compiled with `torch.compile`, both
+run under `torch.inference_mode()`.
+"""
+import time
+
+import numpy as np
+import torch
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import VIM
+
+INPUT_DIM = 64
+FEATURE_DIM = 256
+N_CLASSES = 10
+N_FIT = 2000
+N_QUERIES = 8192
+MODES = {"eager": None, "trace": False, "compile": True}
+
+
+def make_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        torch.nn.Linear(INPUT_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, FEATURE_DIM),
+        torch.nn.ReLU(),
+        torch.nn.Linear(FEATURE_DIM, N_CLASSES),
+    )
+
+
+def benchmark(method, kwargs, batch_size, model, fit_data, queries):
+    results = {}
+    for mode, jit_compile in MODES.items():
+        oodmodel = method(**kwargs)
+        oodmodel.fit(model, fit_data if oodmodel.requires_to_fit_dataset else None)
+        if jit_compile is not None:
+            # the compiled functions of all the oodmodels share the same code, whose
+            # number of recompilations is limited
+            torch.compiler.reset()
+            oodmodel.set_compiled_scoring(jit_compile=jit_compile)
+        batches = torch.split(queries, batch_size)
+        # warm-up, including the compilation
+        oodmodel.score(batches[0])
+        start = time.perf_counter()
+        scores = np.concatenate([oodmodel.score(batch) for batch in batches])
+        results[mode] = (len(queries) / (time.perf_counter() - start), scores)
+    return results
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    model = make_model()
+    fit_data = (
+        torch.Tensor(rng.standard_normal((N_FIT, INPUT_DIM))),
+        torch.Tensor(rng.integers(0, N_CLASSES, N_FIT)),
+    )
+    queries = torch.Tensor(rng.standard_normal((N_QUERIES, INPUT_DIM)))
+    methods = [
+        (MLS, dict()),
+        (Energy, dict()),
+        (VIM, dict(princ_dims=32)),
+        (Mahalanobis, dict(eps=0.0, output_layers_id=[-2])),
+        (DKNN, dict(nearest=10)),
+    ]
+    print(
+        f"{'method':>12} {'batch':>6} {'eager samples/s':>16} "
+        f"{'trace samples/s':>16} {'compile samples/s':>18} {'max abs. dev.':>14}"
+    )
+    for method, kwargs in methods:
+        for batch_size in [8, 128]:
+            results = benchmark(method, kwargs, batch_size, model, fit_data, queries)
+            deviation = max(
+                np.max(np.abs(results[mode][1] - results["eager"][1]))
+                for mode in ["trace", "compile"]
+            )
+            print(
+                f"{method.__name__:>12} {batch_size:>6} "
+                f"{results['eager'][0]:>16.0f} {results['trace'][0]:>16.0f} "
+                f"{results['compile'][0]:>18.0f} {deviation:>14.2e}"
+            )
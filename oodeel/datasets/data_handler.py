@@ -223,3 +223,57 @@ class DataHandler(ABC):
             int: Dataset length
         """
         raise NotImplementedError()
+
+    @staticmethod
+    @abstractmethod
+    def get_batched_dataset_length(dataset: Any) -> int:
+        """Number of samples in a batched dataset (e.g. a tf.data.Dataset after
+        .batch() or a torch DataLoader)
+
+        Args:
+            dataset (Any): Batched dataset
+
+        Returns:
+            int: Number of samples
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    @abstractmethod
+    def slice_batched_dataset(dataset: Any, start: int, stop: int) -> Any:
+        """Batched dataset restricted to the samples of index in [start, stop), with
+        the same batch size
+
+        Args:
+            dataset (Any): Batched dataset
+            start (int): index of the first sample
+            stop (int): index after the last sample
+
+        Returns:
+            Any: Batched dataset slice
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def get_input_from_dataset_item(elem: Any, with_labels: bool = False) -> Any:
+        """Get the tensor that is to be feed as input to a model from a dataset element
+        (the first element of a tuple or of a dict), and its label if with_labels.
+
+        Args:
+            elem (Any): dataset element to extract input from
+            with_labels (bool): if True, also return the label. Defaults to False.
+
+        Returns:
+            Any: Input tensor, or input tensor and label
+        """
+        if isinstance(elem, (tuple, list)) and with_labels:
+            tensor = (elem[0], elem[1])
+        elif isinstance(elem, dict) and with_labels:
+            tensor = (elem[list(elem.keys())[0]], elem["label"])
+        elif isinstance(elem, (tuple, list)):
+            tensor = elem[0]
+        elif isinstance(elem, dict):
+            tensor = elem[list(elem.keys())[0]]
+        else:
+            tensor = elem
+        return tensor
@@ -605,6 +605,37 @@ class TFDataHandler(DataHandler):
         """
         return tuple(dataset.element_spec[feature_key].shape)
 
+    @staticmethod
+    def get_batched_dataset_length(dataset: tf.data.Dataset) -> int:
+        """Number of samples in a batched dataset
+
+        Args:
+            dataset (tf.data.Dataset): Batched dataset
+
+        Returns:
+            int: Number of samples
+        """
+        return TFDataHandler.get_dataset_length(dataset.unbatch())
+
+    @staticmethod
+    def slice_batched_dataset(
+        dataset: tf.data.Dataset, start: int, stop: int
+    ) -> tf.data.Dataset:
+        """Batched dataset restricted to the samples of index in [start, stop), with
+        the batch size of the first batch of the original dataset
+
+        Args:
+            dataset (tf.data.Dataset): Batched dataset
+            start (int): index of the first sample
+            stop (int): index after the last sample
+
+        Returns:
+            tf.data.Dataset: Batched dataset slice
+        """
+        first_batch = TFDataHandler.get_input_from_dataset_item(next(iter(dataset)))
+        batch_size = int(first_batch.shape[0])
+        return dataset.unbatch().skip(start).take(stop - start).batch(batch_size)
+
     @staticmethod
     def get_input_from_dataset_item(
         elem: Union[tf.Tensor, tuple, dict], with_labels=False
@@ -695,6 +695,38 @@ class TorchDataHandler(DataHandler):
         """
         return tuple(dataset[0][feature_key].shape)
 
+    @staticmethod
+    def get_batched_dataset_length(dataset: DataLoader) -> int:
+        """Number of samples in a DataLoader
+
+        Args:
+            dataset (DataLoader): DataLoader
+
+        Returns:
+            int: Number of samples
+        """
+        return len(dataset.dataset)
+
+    @staticmethod
+    def slice_batched_dataset(dataset: DataLoader, start: int, stop: int) -> DataLoader:
+        """DataLoader on the samples of index in [start, stop) of the underlying
+        dataset, with the same batch size and collate function. The sampler of the
+        original DataLoader is not used.
+
+        Args:
+            dataset (DataLoader): DataLoader
+            start (int): index of the first sample
+            stop (int): index after the last sample
+
+        Returns:
+            DataLoader: DataLoader slice
+        """
+        return DataLoader(
+            Subset(dataset.dataset, range(start, stop)),
+            batch_size=dataset.batch_size,
+            collate_fn=dataset.collate_fn,
+        )
+
     @staticmethod
     def get_input_from_dataset_item(
         elem: Union[torch.Tensor, tuple, dict], with_labels=False
@@ -28,6 +28,9 @@ from ..types import Optional
 from ..types import Tuple
 from ..types import Union
 
+# np.trapz was renamed np.trapezoid in numpy 2.0
+_trapezoid = getattr(np, "trapezoid", None) or getattr(np, "trapz")
+
 
 def bench_metrics(
     scores: Union[np.ndarray, Tuple[np.ndarray, np.ndarray]],
@@ -80,7 +83,7 @@ def bench_metrics(
 
     for metric in metrics:
         if metric == "auroc":
-            auroc = -np.trapz(1.0 - fpr, tpr)
+            auroc = -_trapezoid(1.0 - fpr, tpr)
             metrics_dict["auroc"] = auroc
 
         elif metric == "fpr95tpr":
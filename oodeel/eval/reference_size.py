@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from typing import get_args
+
+import numpy as np
+
+from ..methods import DKNN
+from ..methods.reference_reduction import REDUCTION_STRATEGIES
+from ..methods.reference_reduction import reduce_references
+from ..types import Callable
+from ..types import DatasetType
+from ..types import List
+from ..types import Optional
+from ..types import TensorType
+from ..types import Union
+from .metrics import bench_metrics
+
+
+def reference_size_report(
+    model: Callable,
+    fit_dataset: Union[TensorType, DatasetType],
+    id_dataset: Union[TensorType, DatasetType],
+    ood_dataset: Union[TensorType, DatasetType],
+    strategies: List[str] = REDUCTION_STRATEGIES,
+    sizes: List[Union[int, float]] = [0.1, 0.05, 0.02],
+    nearest: int = 1,
+    output_layers_id: List[int] = [-2],
+    seed: Optional[int] = None,
+) -> List[dict]:
+    """Reports the AUROC of DKNN versus the size of its reference set, for several
+    reference reduction strategies (see `reference_reduction.reduce_references`).
+    The features of the held-out ID and OOD data are only computed once, each
+    reduced reference set then only costs a nearest neighbor search.
+
+    Args:
+        model (Callable): model to extract the features from
+        fit_dataset (Union[TensorType, DatasetType]): ID data to build the full
+            reference set with
+        id_dataset (Union[TensorType, DatasetType]): held-out ID data
+        ood_dataset (Union[TensorType, DatasetType]): OOD data
+        strategies (List[str]): reduction strategies to evaluate. Defaults to all
+            strategies.
+        sizes (List[Union[int, float]]): number (if an int) or fraction (if a float)
+            of the vectors of each class kept by the reduction. Ignored for "dedup".
+            Defaults to [0.1, 0.05, 0.02].
+        nearest (int): number of nearest neighbors to consider. Defaults to 1.
+        output_layers_id (List[int]): feature space on which to compute nearest
+            neighbors. Defaults to [-2].
+        seed (Optional[int]): random seed of the reductions. Defaults to None.
+
+    Returns:
+        List[dict]: one row per reference set (the first one being the full set),
+            with the strategy, size, number of references, compression factor,
+            auroc and auroc drop with respect to the full reference set.
+    """
+    dknn = DKNN(nearest=nearest, output_layers_id=output_layers_id)
+    dknn.fit(model, fit_dataset)
+    full_references = dknn.get_references()
+    n_full = sum(len(vectors) for vectors in full_references.values())
+
+    # compute the features of the held-out data once
+    forwards = []
+    for dataset in [id_dataset, ood_dataset]:
+        if isinstance(dataset, get_args(DatasetType)):
+            items = dataset
+        else:
+            items = [dataset]
+        forwards.append(
+            [
+                dknn._forward(dknn.data_handler.get_input_from_dataset_item(item))
+                for item in items
+            ]
+        )
+
+    def _auroc() -> float:
+        scores = tuple(
+            np.concatenate([dknn._score_features(features) for features in forward])
+            for forward in forwards
+        )
+        return bench_metrics(scores, metrics=["auroc"])["auroc"]
+
+    auroc_full = _auroc()
+    report = [
+        {
+            "strategy": None,
+            "size": 1.0,
+            "n_references": n_full,
+            "compression": 1.0,
+            "auroc": auroc_full,
+            "auroc_drop": 0.0,
+        }
+    ]
+    for strategy in strategies:
+        for size in [None] if strategy == "dedup" else sizes:
+            dknn.set_references(
+                {
+                    class_label: reduce_references(vectors, strategy, size, seed)
+                    for class_label, vectors in full_references.items()
+                }
+            )
+            n_references = dknn.n_references
+            auroc = _auroc()
+            report.append(
+                {
+                    "strategy": strategy,
+                    "size": size,
+                    "n_references": n_references,
+                    "compression": n_full / n_references,
+                    "auroc": auroc,
+                    "auroc_drop": auroc_full - auroc,
+                }
+            )
+    return report
@@ -20,6 +20,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from .cascade import Cascade
 from .dknn import DKNN
 from .energy import Energy
 from .mahalanobis import Mahalanobis
@@ -27,4 +28,4 @@ from .mls import MLS
 from .odin import ODIN
 from .vim import VIM
 
-__all__ = ["MLS", "DKNN", "ODIN", "Energy", "VIM", "Mahalanobis"]
+__all__ = ["MLS", "DKNN", "ODIN", "Energy", "VIM", "Mahalanobis", "Cascade"]
@@ -20,19 +20,43 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import asyncio
+import inspect
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import traceback
 from abc import ABC
-from abc import abstractmethod
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import AsyncIterator
+from typing import Iterator
 from typing import get_args
 
 import numpy as np
 
+from .. import __version__
+from ..types import Any
 from ..types import Callable
 from ..types import DatasetType
 from ..types import List
 from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
+from ..utils import get_dtype_policy
+from ..utils import get_model_fingerprint
 from ..utils import is_from
+from ..utils.dtype_policy import _check_dtype
+from ..utils.dtype_policy import FIT_DTYPES
+from ..utils.dtype_policy import SCORE_DTYPES
+
+_SAVE_FORMAT_VERSION = 1
 
 
 class OODModel(ABC):
@@ -56,23 +80,293 @@ class OODModel(ABC):
         self.feature_extractor = None
         self.output_layers_id = output_layers_id
         self.input_layers_id = input_layers_id
+        self._executor = None
+        # dtypes overriding the global dtype policy
+        self._dtype_policy = {"fit": None, "score": None}
+        # fitted arrays converted to backend tensors, see _get_param
+        self._params = {}
+        # backend of the post-processing, if not the one of the model
+        self._postprocessing_backend = None
+        # options of the compiled scoring, see set_compiled_scoring
+        self._compile_options = None
+        self._compiled_forward = None
 
-    @abstractmethod
     def _score_tensor(self, inputs: TensorType) -> np.ndarray:
         """Computes an OOD score for input samples "inputs".
-        Method to override with child classes.
+        Defaults to the in-backend part of the scoring (`_forward_device`) followed
+        by its host part (`_score_features_host`). Method to override with child
+        classes that do not split their scoring.
 
         Args:
             inputs: tensor to score
 
+        Returns:
+            scores
+        """
+        return self._score_features_host(self._forward_device(inputs))
+
+    def _forward(self, inputs: TensorType) -> Any:
+        """Model forward part of `_score_tensor`: computes the features needed to
+        score "inputs" (including input perturbation for gradient based methods).
+        Defaults to the projection of "inputs" by the feature extractor.
+
+        Args:
+            inputs: tensor to score
+
+        Returns:
+            features to be scored by `_score_features`
+        """
+        return self.feature_extractor(inputs)
+
+    def _score_features(self, features: Any) -> np.ndarray:
+        """Post-processing part of `_score_tensor`: computes OOD scores from the
+        output of `_forward`, with its in-backend part (`_score_features_device`)
+        then its host part (`_score_features_host`). Methods that split their
+        scoring this way can be scored with `score(..., pipelined=True)`.
+
+        Args:
+            features: output of `_forward`
+
+        Returns:
+            scores
+        """
+        self._prepare_scoring()
+        return self._score_features_host(self._score_features_device(features))
+
+    def _score_features_device(self, features: Any) -> Any:
+        """In-backend part of `_score_features`, that can be traced with the model
+        forward (see `set_compiled_scoring`). Method to override with child classes
+        that split their scoring.
+
+        Args:
+            features: output of `_forward`
+
         Raises:
-            NotImplementedError: _description_
+            NotImplementedError: if the method does not split its scoring
         """
         raise NotImplementedError()
 
+    def _score_features_host(self, outputs: Any) -> np.ndarray:
+        """Host part of `_score_features`, e.g. a kNN search. Defaults to the
+        conversion of the scores computed by `_score_features_device` to NumPy.
+
+        Args:
+            outputs: output of `_score_features_device`
+
+        Returns:
+            scores
+        """
+        return self.op.convert_to_numpy(outputs)
+
+    def _prepare_scoring(self) -> None:
+        """Updates the lazily computed fitted state and converts it to device
+        tensors (see `_get_param`) before `_forward_device`, so that this is
+        neither traced nor done while computing input perturbation gradients. To
+        be overridden in child classes with such a state."""
+        pass
+
+    def _forward_device(self, inputs: TensorType) -> Any:
+        """
+        Model forward and in-backend part of the post-processing, traced as a
+        single graph if `set_compiled_scoring` was called.
+
+        Args:
+            inputs: tensor to score
+
+        Returns:
+            output of `_score_features_device`
+        """
+        self._prepare_scoring()
+        if self._compile_options is None:
+            return self._score_features_device(self._forward(inputs))
+        if self._compiled_forward is None:
+            self._compiled_forward = self._compile_forward_device()
+        return self._compiled_forward(inputs)
+
+    def set_compiled_scoring(
+        self, enabled: bool = True, jit_compile: bool = False
+    ) -> "OODModel":
+        """
+        Traces the model forward and the in-backend part of the post-processing
+        (`_forward_device`) into a single graph (a `tf.function` for keras
+        models, a `torch.jit.trace` of a module wrapping the model for torch
+        models, run under `torch.inference_mode()`), removing the per-batch Python
+        overhead and letting the backend fuse the post-processing operations.
+        Only the host part of the scoring (e.g. the kNN search of DKNN) and the
+        conversion of the scores to NumPy remain eager. The graph is traced again
+        when the fitted state changes. On torch, the scoring falls back to eager
+        mode with a warning if the compilation fails, e.g. for the methods
+        computing input perturbation gradients (ODIN, Mahalanobis with eps > 0).
+
+        Args:
+            enabled (bool): whether to compile the scoring. Defaults to True.
+            jit_compile (bool): if True, the graph is compiled with XLA for keras
+                models, or with `torch.compile` for torch models. Defaults to
+                False.
+
+        Returns:
+            OODModel: self
+        """
+        if enabled and not self._has_feature_scoring:
+            raise NotImplementedError(
+                f"{type(self).__name__} does not split its scoring, it cannot be"
+                " compiled"
+            )
+        self._compile_options = {"jit_compile": jit_compile} if enabled else None
+        self._compiled_forward = None
+        return self
+
+    def _compile_forward_device(self) -> Callable:
+        """
+        Compiles `_forward_device` with the operator of the model backend (see
+        `Operator.compile`).
+
+        Returns:
+            Callable: compiled function from the inputs to the output of
+                `_score_features_device`
+        """
+        if self._postprocessing_backend is not None:
+            raise NotImplementedError(
+                "Compiled scoring requires the post-processing in the model backend"
+            )
+
+        def forward_device(inputs):
+            return self._score_features_device(self._forward(inputs))
+
+        return self.op.compile(
+            forward_device,
+            model=self.feature_extractor.model,
+            jit_compile=self._compile_options["jit_compile"],
+        )
+
+    def score_features(self, features: Any) -> np.ndarray:
+        """
+        Computes OOD scores from features already extracted, e.g. by a model-free
+        oodmodel (fitted with `model=None`) or when the features are cached. The
+        features are those returned by `_forward`: a single tensor or array, or a
+        list / tuple of them for methods using several outputs (e.g. the features
+        and the logits for VIM and DKNN). Input perturbation is not applied.
+
+        Args:
+            features (Any): features of the samples to score
+
+        Returns:
+            np.ndarray: scores
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .score()"
+        if not self._has_feature_scoring:
+            raise NotImplementedError(
+                f"{type(self).__name__} does not support feature-level scoring"
+            )
+        return self._score_features(self._features_to_op(features))
+
+    def _features_to_op(self, features: Any) -> Any:
+        """
+        Converts features (NumPy arrays or backend tensors, possibly in a list or a
+        tuple) to tensors of the operator, in the score dtype.
+
+        Args:
+            features (Any): features
+
+        Returns:
+            Any: converted features
+        """
+        if isinstance(features, (list, tuple)):
+            return type(features)(self._features_to_op(f) for f in features)
+        if isinstance(features, np.ndarray):
+            return self.op.from_numpy(features)
+        return self.op.cast(features)
+
+    @property
+    def _has_feature_scoring(self) -> bool:
+        """Whether `_score_tensor` is split into `_forward` and `_score_features`"""
+        return type(self)._score_features_device is not OODModel._score_features_device
+
+    @property
+    def _has_device_scores(self) -> bool:
+        """Whether `_score_features_device` computes the scores themselves, the host
+        part of the scoring only converting them to NumPy"""
+        return (
+            self._has_feature_scoring
+            and type(self)._score_features_host is OODModel._score_features_host
+        )
+
+    @property
+    def _has_input_perturbation(self) -> bool:
+        """Whether `_forward` computes input perturbation gradients"""
+        return False
+
+    def export(
+        self,
+        path: str,
+        example_inputs: Optional[TensorType] = None,
+        export_format: Optional[str] = None,
+    ) -> None:
+        """
+        Exports the model and the fitted oodmodel as a single inference graph
+        computing `(logits, ood_score)` from a batch of input samples, the fitted
+        parameters being embedded as constants. The oodmodel can then be served
+        without oodeel (nor faiss, scikit-learn or scipy), with one graph call per
+        batch. Torch models are exported with TorchScript ("torchscript", the
+        default, loaded with `torch.jit.load`) or ONNX ("onnx"), keras models as a
+        SavedModel ("saved_model", loaded with `tf.saved_model.load`, whose
+        "serving_default" signature returns a dictionary).
+
+        Only the oodmodels computing their scores in the model backend without
+        input perturbation can be exported, e.g. MLS, Energy, VIM and Mahalanobis
+        (with `eps=0`, a single output layer and without `nearest_center`).
+
+        Args:
+            path (str): path of the exported graph
+            example_inputs (Optional[TensorType]): batch of input samples, to trace
+                torch models and to set the input signature of keras models (else
+                the input shape of the model). Defaults to None.
+            export_format (Optional[str]): format of the exported graph. Defaults
+                to None, for the default format of the model backend.
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .export()"
+        if (
+            not self._has_device_scores
+            or self._has_input_perturbation
+            or self._postprocessing_backend is not None
+        ):
+            raise NotImplementedError(
+                f"This {type(self).__name__} oodmodel cannot be exported: its scores"
+                " are not computed in the model backend"
+            )
+        self._prepare_scoring()
+
+        def export_forward(inputs):
+            features = self._forward(inputs)
+            logits = self._export_logits(inputs, features)
+            return logits, self._score_features_device(features)
+
+        self.feature_extractor.export(
+            export_forward,
+            path,
+            example_inputs=example_inputs,
+            output_names=["logits", "ood_score"],
+            export_format=export_format,
+        )
+
+    def _export_logits(self, inputs: TensorType, features: Any) -> TensorType:
+        """
+        Logits output by the exported graph (see `export`). Defaults to a forward
+        of the model, to be overridden in child classes whose features contain the
+        logits.
+
+        Args:
+            inputs (TensorType): input samples
+            features (Any): output of `_forward`
+
+        Returns:
+            TensorType: logits
+        """
+        return self.feature_extractor.model(inputs)
+
     def fit(
         self,
-        model: Callable,
+        model: Optional[Callable],
         fit_dataset: Optional[Union[TensorType, DatasetType]] = None,
     ) -> None:
         """Prepare oodmodel for scoring:
@@ -81,17 +375,110 @@ class OODModel(ABC):
             using self._fit_to_dataset
 
         Args:
-            model: model to extract the features from
+            model: model to extract the features from. If None, the oodmodel is
+                model-free: "fit_dataset" and the data to score are features (see
+                `NumpyFeatureExtractor`), processed with the NumPy operator.
             fit_dataset: dataset to fit the oodmodel on
         """
         self.feature_extractor = self._load_feature_extractor(model)
+        self._invalidate_params()
 
         if fit_dataset is not None:
             self._fit_to_dataset(fit_dataset)
 
+    def set_dtype_policy(
+        self, fit: Optional[str] = None, score: Optional[str] = None
+    ) -> "OODModel":
+        """
+        Overrides the global numeric precision policy (see
+        `utils.set_dtype_policy`) for this oodmodel. To be called before `fit` or
+        `load`.
+
+        Args:
+            fit (Optional[str]): dtype of the statistics fitted on ID data, either
+                "float64" or "float32". If None, the global one. Defaults to None.
+            score (Optional[str]): dtype of the features and fitted statistics at
+                scoring time, either "float64", "float32", "float16" or "bfloat16".
+                If None, the global one. Defaults to None.
+
+        Returns:
+            OODModel: self
+        """
+        _check_dtype(fit, FIT_DTYPES, "fit")
+        _check_dtype(score, SCORE_DTYPES, "score")
+        assert (
+            self.feature_extractor is None
+        ), "The dtype policy must be set before .fit() or .load()"
+        self._dtype_policy = {"fit": fit, "score": score}
+        return self
+
+    def set_postprocessing_backend(
+        self, backend: Optional[str] = "numpy"
+    ) -> "OODModel":
+        """
+        Runs the post-processing of the features (fitting and scoring computations
+        after feature extraction) with the operator of "backend" instead of the one
+        of the model backend. With "numpy", the features are converted to NumPy
+        arrays as soon as they are extracted, which avoids the dispatch overhead of
+        torch or tensorflow on small batches. Gradient based computations (input
+        perturbation) are not available with "numpy". To be called before `fit` or
+        `load`.
+
+        Args:
+            backend (Optional[str]): "numpy", or None for the model backend.
+                Defaults to "numpy".
+
+        Returns:
+            OODModel: self
+        """
+        if backend not in [None, "numpy"]:
+            raise NotImplementedError(
+                f'Post-processing backend "{backend}" not available, only "numpy"'
+            )
+        assert (
+            self.feature_extractor is None
+        ), "The post-processing backend must be set before .fit() or .load()"
+        self._postprocessing_backend = backend
+        return self
+
+    @property
+    def fit_dtype(self) -> str:
+        """dtype of the statistics fitted on ID data"""
+        return self._dtype_policy["fit"] or get_dtype_policy()["fit"]
+
+    @property
+    def score_dtype(self) -> str:
+        """dtype of the features and fitted statistics at scoring time"""
+        return self._dtype_policy["score"] or get_dtype_policy()["score"]
+
+    def _get_param(self, name: str, array: Callable[[], np.ndarray]) -> TensorType:
+        """
+        Fitted array "name" as a backend tensor of the score dtype, on the device of
+        the model. The array is converted once, then read from the parameter store
+        until `_invalidate_params` is called, so that scoring does not copy the
+        fitted state to the device at every batch.
+
+        Args:
+            name (str): name of the parameter
+            array (Callable[[], np.ndarray]): returns the fitted array, only called
+                if the parameter is not in the store
+
+        Returns:
+            TensorType: parameter
+        """
+        if name not in self._params:
+            self._params[name] = self.op.from_numpy(array())
+        return self._params[name]
+
+    def _invalidate_params(self) -> None:
+        """Empties the parameter store, to be called when the fitted state changes.
+        The compiled scoring, which captures the parameters, is traced again."""
+        self._params = {}
+        self._compiled_forward = None
+
     def _load_feature_extractor(
         self,
-        model: Callable,
+        model: Optional[Callable],
     ) -> Callable:
         """
         Loads feature extractor
@@ -99,14 +486,42 @@ class OODModel(ABC):
         Args:
             model : tf.keras model (for now)
                 keras models saved as pb files e.g. with model.save()
+                If None, model-free feature extractor
+                ONNX models (path of an ONNX file, `onnx.ModelProto`,
+                `onnxruntime.InferenceSession` or `OnnxModel`) are run with ONNX
+                Runtime and post-processed with NumPy
         """
-        if is_from(model, "keras"):
+        from ..models.numpy_feature_extractor import NumpyFeatureExtractor
+        from ..utils import NumpyOperator
+
+        if model is None:
+            from ..datasets.data_handler import DataHandler
+
+            # only used to get the inputs of the dataset items
+            self.data_handler = DataHandler
+            self.op = NumpyOperator(dtype=self.score_dtype)
+            self.backend = "numpy"
+            return NumpyFeatureExtractor(dtype=self.score_dtype)
+
+        if isinstance(model, (str, bytes, os.PathLike)) or any(
+            is_from(model, framework)
+            for framework in ["onnx", "onnxruntime", "OnnxModel"]
+        ):
+            from ..models.onnx_feature_extractor import OnnxFeatureExtractor
+            from ..datasets.data_handler import DataHandler
+
+            self.data_handler = DataHandler
+            self.op = NumpyOperator(dtype=self.score_dtype)
+            self.backend = "onnx"
+            FeatureExtractor = OnnxFeatureExtractor
+
+        elif is_from(model, "keras"):
             from ..models.keras_feature_extractor import KerasFeatureExtractor
             from ..datasets.tf_data_handler import TFDataHandler
             from ..utils import TFOperator
 
             self.data_handler = TFDataHandler()
-            self.op = TFOperator()
+            self.op = TFOperator(dtype=self.score_dtype)
             self.backend = "tensorflow"
             FeatureExtractor = KerasFeatureExtractor
 
@@ -116,7 +531,7 @@ class OODModel(ABC):
             from ..utils import TorchOperator
 
             self.data_handler = TorchDataHandler()
-            self.op = TorchOperator(model)
+            self.op = TorchOperator(model, dtype=self.score_dtype)
             self.backend = "torch"
             FeatureExtractor = TorchFeatureExtractor
 
@@ -127,7 +542,13 @@ class OODModel(ABC):
             model,
             input_layer_id=self.input_layers_id,
             output_layers_id=self.output_layers_id,
+            dtype=self.score_dtype,
         )
+        if self._postprocessing_backend == "numpy" and self.backend != "onnx":
+            self.op = NumpyOperator(dtype=self.score_dtype)
+            feature_extractor = NumpyFeatureExtractor(
+                feature_extractor, dtype=self.score_dtype
+            )
         return feature_extractor
 
     def _fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
@@ -140,6 +561,175 @@ class OODModel(ABC):
         """
         raise NotImplementedError()
 
+    def partial_fit(
+        self,
+        fit_dataset: Union[TensorType, DatasetType],
+        model: Optional[Callable] = None,
+    ) -> None:
+        """Updates the oodmodel with additional ID data "fit_dataset", at a cost
+        proportional to the size of the new data. On a oodmodel that has not been
+        fitted yet, the feature extractor is first constructed based on "model".
+
+        Args:
+            fit_dataset: additional ID data, either a batch (inputs, labels) or a
+                dataset of such batches
+            model: model to extract the features from. Only needed if the oodmodel
+                has not been fitted yet. Defaults to None.
+        """
+        if self.feature_extractor is None:
+            assert model is not None, "A model is required for the first partial_fit"
+            self.feature_extractor = self._load_feature_extractor(model)
+        self._invalidate_params()
+        self._partial_fit_to_dataset(fit_dataset)
+
+    def _partial_fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Updates the fitted state of the oodmodel with fit_dataset.
+        To be overrided in child classes (if supported)
+
+        Args:
+            fit_dataset: additional ID data
+        """
+        raise NotImplementedError()
+
+    def _iterate_labeled_batches(
+        self, fit_dataset: Union[TensorType, DatasetType]
+    ) -> Iterator[Tuple[TensorType, np.ndarray]]:
+        """
+        Iterates over the batches of a labeled dataset (or over a single labeled
+        batch), yielding the inputs and the labels as a 1D NumPy array (one hot
+        encoded labels are converted to class indices).
+
+        Args:
+            fit_dataset: labeled dataset or batch
+
+        Yields:
+            Tuple[TensorType, np.ndarray]: inputs and labels of each batch
+        """
+        if isinstance(fit_dataset, get_args(DatasetType)):
+            items = fit_dataset
+        else:
+            items = [fit_dataset]
+        for item in items:
+            inputs, labels = self.data_handler.get_input_from_dataset_item(
+                item, with_labels=True
+            )
+            if not isinstance(labels, np.ndarray):
+                labels = self.op.convert_to_numpy(labels)
+            # if one hot encoded labels, take the argmax
+            if len(labels.shape) > 1 and labels.shape[1] > 1:
+                labels = np.argmax(labels.reshape(labels.shape[0], -1), axis=1)
+            yield inputs, labels.reshape(-1)
+
+    @property
+    def requires_to_fit_dataset(self) -> bool:
+        """
+        Whether the oodmodel needs a `fit_dataset` to be fitted, i.e. whether it
+        overrides `_fit_to_dataset`.
+
+        Returns:
+            bool: True if `fit_dataset` is required else False.
+        """
+        return type(self)._fit_to_dataset is not OODModel._fit_to_dataset
+
+    def _get_fitted_state(self) -> dict:
+        """
+        Fitted state of the oodmodel, to be saved by `save`. To be overrided in child
+        classes that are fitted on a dataset.
+
+        Returns:
+            dict: mapping from names to NumPy arrays (stored as .npy files) or to
+                JSON serializable values (stored in the manifest).
+        """
+        return {}
+
+    def _set_fitted_state(self, state: dict) -> None:
+        """
+        Restores the fitted state returned by `_get_fitted_state`. To be overrided in
+        child classes that are fitted on a dataset.
+
+        Args:
+            state (dict): mapping from names to NumPy arrays (possibly memory-mapped)
+                or JSON values.
+        """
+        pass
+
+    def save(self, path: str) -> None:
+        """
+        Saves the fitted state of the oodmodel in directory "path": each array is
+        stored as a raw (64 bytes aligned) .npy file that can be memory-mapped, next
+        to a `manifest.json` file holding the other values and a fingerprint of the
+        model weights.
+
+        Args:
+            path (str): directory to save the oodmodel to
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .save()"
+        os.makedirs(path, exist_ok=True)
+        manifest = {
+            "format_version": _SAVE_FORMAT_VERSION,
+            "oodeel_version": __version__,
+            "class": type(self).__name__,
+            "backend": self.backend,
+            "model_fingerprint": get_model_fingerprint(self.feature_extractor.model),
+            "arrays": [],
+            "attributes": {},
+        }
+        for name, value in self._get_fitted_state().items():
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(value))
+                manifest["arrays"].append(name)
+            else:
+                manifest["attributes"][name] = value
+        with open(os.path.join(path, "manifest.json"), "w") as file:
+            json.dump(manifest, file, indent=2)
+
+    def load(
+        self, path: str, model: Optional[Callable], mmap: bool = True
+    ) -> "OODModel":
+        """
+        Prepares the oodmodel for scoring from a state saved with `save` instead of
+        fitting it: constructs the feature extractor based on the model and restores
+        the fitted state.
+
+        Args:
+            path (str): directory the oodmodel was saved to
+            model (Optional[Callable]): model the oodmodel was fitted on, None if it
+                is model-free
+            mmap (bool): if True, arrays are memory-mapped read-only instead of read
+                in memory. Defaults to True.
+
+        Raises:
+            ValueError: if the saved state does not match this oodmodel class or the
+                weights of the model.
+
+        Returns:
+            OODModel: the loaded oodmodel (self)
+        """
+        with open(os.path.join(path, "manifest.json"), "r") as file:
+            manifest = json.load(file)
+        if manifest["class"] != type(self).__name__:
+            raise ValueError(
+                f"Cannot load a saved {manifest['class']} into a {type(self).__name__}"
+            )
+
+        self.feature_extractor = self._load_feature_extractor(model)
+        if get_model_fingerprint(self.feature_extractor.model) != (
+            manifest["model_fingerprint"]
+        ):
+            raise ValueError(
+                "The model weights differ from those the oodmodel was fitted with"
+            )
+
+        state = dict(manifest["attributes"])
+        for name in manifest["arrays"]:
+            state[name] = np.load(
+                os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None
+            )
+        self._invalidate_params()
+        self._set_fitted_state(state)
+        return self
+
     def calibrate_threshold(
         self,
         fit_dataset: Union[TensorType, DatasetType],
@@ -158,12 +748,22 @@ class OODModel(ABC):
     def score(
         self,
         dataset: Union[TensorType, DatasetType],
+        pipelined: bool = False,
+        prefetch_size: int = 2,
+        n_workers: int = 4,
     ) -> np.ndarray:
         """
         Computes an OOD score for input samples "inputs"
 
         Args:
             dataset (Union[TensorType, DatasetType]): dataset or tensors to score
+            pipelined (bool): if True and dataset is a tf.data.Dataset or a
+                torch.DataLoader, data loading, model forward and post-processing
+                run in parallel (see `_score_dataset_pipelined`). Defaults to False.
+            prefetch_size (int): number of batches loaded in advance in pipelined
+                mode. Defaults to 2.
+            n_workers (int): number of post-processing threads in pipelined mode.
+                Defaults to 4.
 
         Returns:
             scores or list of scores (depending on the input)
@@ -175,6 +775,8 @@ class OODModel(ABC):
             tensor = self.data_handler.get_input_from_dataset_item(dataset)
             scores = self._score_tensor(tensor)
         # Case 2: dataset is a tf.data.Dataset or a torch.DataLoader
+        elif isinstance(dataset, get_args(DatasetType)) and pipelined:
+            scores = self._score_dataset_pipelined(dataset, prefetch_size, n_workers)
         elif isinstance(dataset, get_args(DatasetType)):
             scores = np.array([])
             for tensor in dataset:
@@ -187,6 +789,267 @@ class OODModel(ABC):
             )
         return scores
 
+    def _score_dataset_pipelined(
+        self, dataset: DatasetType, prefetch_size: int = 2, n_workers: int = 4
+    ) -> np.ndarray:
+        """
+        Scores a dataset with three overlapping stages:
+        * a loading thread fills a bounded queue of `prefetch_size` batches,
+        * the calling thread runs the model forward and the in-backend part of the
+            post-processing (`_forward_device`) on each batch,
+        * a pool of `n_workers` threads runs the host part of the post-processing
+            (`_score_features_host`), e.g. NumPy or faiss computations.
+
+        Scores are reassembled in the dataset order. At most `2 * n_workers` batches
+        wait for post-processing, so that the memory footprint stays bounded.
+        Methods that do not split their scoring run `_score_tensor` entirely in the
+        forward stage.
+
+        Args:
+            dataset (DatasetType): dataset to score
+            prefetch_size (int): number of batches loaded in advance.
+                Defaults to 2.
+            n_workers (int): number of post-processing threads. Defaults to 4.
+
+        Returns:
+            np.ndarray: scores
+        """
+        assert prefetch_size >= 1, "prefetch_size must be at least 1"
+        end = object()
+        loaded = queue.Queue(maxsize=prefetch_size)
+        stop_loading = threading.Event()
+
+        def _put(item) -> bool:
+            # gives up as soon as the forward stage stops consuming
+            while not stop_loading.is_set():
+                try:
+                    loaded.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _load():
+            try:
+                for elem in dataset:
+                    if not _put(elem):
+                        return
+            except Exception as err:  # propagated to the forward stage
+                _put(err)
+                return
+            _put(end)
+
+        loader = threading.Thread(
+            target=_load, name="oodeel-pipelined-loader", daemon=True
+        )
+        loader.start()
+
+        scores = []
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=n_workers) as post_processing:
+                while True:
+                    elem = loaded.get()
+                    if elem is end:
+                        break
+                    if isinstance(elem, Exception):
+                        raise elem
+                    tensor = self.data_handler.get_input_from_dataset_item(elem)
+                    if self._has_feature_scoring:
+                        outputs = self._forward_device(tensor)
+                        pending.append(
+                            post_processing.submit(self._score_features_host, outputs)
+                        )
+                    else:
+                        scores.append(self._score_tensor(tensor))
+                        continue
+                    while len(pending) > 2 * n_workers:
+                        scores.append(pending.popleft().result())
+                while pending:
+                    scores.append(pending.popleft().result())
+        finally:
+            stop_loading.set()
+
+        return np.concatenate([np.array([])] + [np.reshape(s, (-1,)) for s in scores])
+
+    def score_sharded(
+        self,
+        dataset: DatasetType,
+        n_workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+    ) -> np.ndarray:
+        """
+        Scores a large dataset with several worker processes. The dataset is split
+        into `n_workers` contiguous index ranges (see
+        `data_handler.slice_batched_dataset`), each scored by a worker, and the
+        scores are reassembled in the dataset order.
+
+        For torch (and model-free) oodmodels, the workers are forked from the
+        current process, hence they share the fitted state of the oodmodel (faiss
+        indexes, precision matrices, residual bases...) read-only and
+        copy-on-write, without serialization, and write their scores in place in
+        an output array in shared memory. Forking requires a POSIX system, and is
+        refused for ONNX models and for torch models once CUDA is initialized,
+        whose runtimes are not fork-safe: use `score(..., pipelined=True)` instead.
+
+        The tensorflow runtime is not fork-safe either once initialized, which the
+        fit does: the workers are then spawned, and rebuild the oodmodel from its
+        saved state (see `save`), memory-mapped read-only with `load(..., mmap=True)`
+        so that the fitted arrays are still shared through the page cache. The
+        keras model (with `model.save`) and the dataset (with
+        `tf.data.Dataset.save`) are written to a temporary directory beforehand,
+        which costs a pass over the dataset in the current process.
+
+        The oodmodel must output one score per sample.
+
+        Args:
+            dataset (DatasetType): tf.data.Dataset or torch.DataLoader to score
+            n_workers (Optional[int]): number of worker processes. Defaults to the
+                number of CPUs.
+            threads_per_worker (int): number of intra-op threads of each worker.
+                Defaults to 1.
+
+        Raises:
+            RuntimeError: if forking is not safe for the backend, or if a worker
+                failed.
+
+        Returns:
+            np.ndarray: scores
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .score()"
+        assert isinstance(
+            dataset, get_args(DatasetType)
+        ), "score_sharded() expects a tf.data.Dataset or a torch.DataLoader"
+        n_workers = n_workers or os.cpu_count()
+        n_samples = self.data_handler.get_batched_dataset_length(dataset)
+        bounds = np.linspace(0, n_samples, n_workers + 1).astype(int)
+        bounds = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        bounds = [(start, stop) for start, stop in bounds if stop > start]
+        if self.backend == "tensorflow":
+            return self._score_sharded_spawned(dataset, bounds, threads_per_worker)
+        self._check_fork_safety()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(n_samples, 1) * 8)
+        shared_scores = np.ndarray((n_samples,), dtype=np.float64, buffer=shm.buf)
+        try:
+            context = multiprocessing.get_context("fork")
+            _run_workers(
+                context,
+                self._score_shard,
+                [
+                    (dataset, start, stop, shm, n_samples, threads_per_worker)
+                    for start, stop in bounds
+                ],
+            )
+            scores = np.array(shared_scores)
+        finally:
+            del shared_scores
+            shm.close()
+            shm.unlink()
+        return scores
+
+    def _score_sharded_spawned(
+        self,
+        dataset: DatasetType,
+        bounds: List[Tuple[int, int]],
+        threads_per_worker: int,
+    ) -> np.ndarray:
+        """
+        Spawned workers of `score_sharded` for tensorflow models: the oodmodel, the
+        model and the dataset are saved to a temporary directory, from which each
+        worker rebuilds them and scores its index range.
+
+        Args:
+            dataset (DatasetType): tf.data.Dataset to score
+            bounds (List[Tuple[int, int]]): index range of each worker
+            threads_per_worker (int): number of intra-op threads of each worker
+
+        Returns:
+            np.ndarray: scores
+        """
+        with tempfile.TemporaryDirectory() as path:
+            self.save(os.path.join(path, "oodmodel"))
+            self.feature_extractor.model.save(os.path.join(path, "model.keras"))
+            dataset.save(os.path.join(path, "dataset"))
+            blueprint = _OODModelBlueprint(self)
+            _run_workers(
+                multiprocessing.get_context("spawn"),
+                _score_shard_spawned,
+                [
+                    (blueprint, path, start, stop, threads_per_worker)
+                    for start, stop in bounds
+                ],
+            )
+            return np.concatenate(
+                [np.array([])]
+                + [
+                    np.load(os.path.join(path, f"scores_{start}.npy"))
+                    for start, _ in bounds
+                ]
+            )
+
+    def _get_config(self) -> dict:
+        """
+        Arguments of the constructor of the oodmodel, read from the attributes of
+        the same name. To be overridden in child classes storing them otherwise.
+
+        Returns:
+            dict: constructor arguments
+        """
+        names = list(inspect.signature(type(self).__init__).parameters)[1:]
+        return {name: getattr(self, name) for name in names}
+
+    def _check_fork_safety(self) -> None:
+        """
+        Refuses to fork the scoring workers of `score_sharded` when the runtime of
+        the backend has started thread pools or a device context that the workers
+        would inherit in an inconsistent state.
+
+        Raises:
+            RuntimeError: if forking is not safe for the backend
+        """
+        unsafe = None
+        if self.backend == "onnx":
+            unsafe = "onnxruntime sessions are not fork-safe"
+        elif self.backend == "torch":
+            import torch
+
+            if torch.cuda.is_initialized():
+                unsafe = "CUDA is initialized"
+        if unsafe is not None:
+            raise RuntimeError(
+                f"score_sharded() forks the current process, which is unsafe since "
+                f"{unsafe}. Use score(..., pipelined=True) instead."
+            )
+
+    def _score_shard(
+        self,
+        dataset: DatasetType,
+        start: int,
+        stop: int,
+        shm: shared_memory.SharedMemory,
+        n_samples: int,
+        threads_per_worker: int,
+    ) -> None:
+        """
+        Forked worker of `score_sharded`: scores the samples of index in
+        [start, stop) of the dataset and writes them in the shared output array,
+        whose memory mapping is inherited from the parent process.
+        """
+        try:
+            if self.backend == "torch":
+                import torch
+
+                torch.set_num_threads(threads_per_worker)
+            shard = self.data_handler.slice_batched_dataset(dataset, start, stop)
+            shard_scores = _check_shard_scores(self.score(shard), start, stop)
+            scores = np.ndarray((n_samples,), dtype=np.float64, buffer=shm.buf)
+            scores[start:stop] = shard_scores
+        except Exception:
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+
     def isood(
         self, dataset: Union[TensorType, DatasetType], threshold: float
     ) -> np.ndarray:
@@ -220,6 +1083,122 @@ class OODModel(ABC):
         oodness = scores < threshold
         return np.array(oodness, dtype=np.bool)
 
+    def _get_executor(self) -> Executor:
+        """
+        Default executor for asynchronous scoring: a single worker thread per
+        oodmodel, since feature extractors are not safe to call concurrently.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    async def ascore_iter(
+        self,
+        dataset: Union[TensorType, DatasetType],
+        executor: Optional[Executor] = None,
+        max_pending: int = 2,
+    ) -> AsyncIterator[np.ndarray]:
+        """
+        Asynchronously computes OOD scores batch by batch, without blocking the event
+        loop. The next batch is loaded in a background thread while the current one
+        is scored in `executor`. At most `max_pending` batches are submitted to the
+        executor at a time: when this bound is reached, a single batch is loaded
+        ahead, and no more until the oldest one is scored (backpressure).
+
+        Args:
+            dataset (Union[TensorType, DatasetType]): dataset or tensors to score
+            executor (Optional[Executor]): executor in which `_score_tensor` is run.
+                Defaults to a single worker thread dedicated to the oodmodel.
+            max_pending (int): maximum number of batches submitted to the executor
+                and not yet yielded. Defaults to 2.
+
+        Yields:
+            np.ndarray: scores of each batch, in order
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .ascore()"
+        assert max_pending >= 1, "max_pending must be at least 1"
+        loop = asyncio.get_running_loop()
+        executor = executor or self._get_executor()
+
+        if isinstance(dataset, get_args(TensorType)):
+            dataset = [dataset]
+        elif not isinstance(dataset, get_args(DatasetType)):
+            raise NotImplementedError(
+                f"OODModel.ascore() not implemented for {type(dataset)}"
+            )
+
+        end = object()
+        iterator = iter(dataset)
+        loader = ThreadPoolExecutor(max_workers=1)
+        pending = deque()
+        try:
+            next_elem = loop.run_in_executor(loader, next, iterator, end)
+            while True:
+                elem = await next_elem
+                if elem is end:
+                    break
+                tensor = self.data_handler.get_input_from_dataset_item(elem)
+                pending.append(
+                    loop.run_in_executor(executor, self._score_tensor, tensor)
+                )
+                # load the next batch while the pending ones are scored
+                next_elem = loop.run_in_executor(loader, next, iterator, end)
+                if len(pending) >= max_pending:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            loader.shutdown(wait=False)
+
+    async def ascore(
+        self,
+        dataset: Union[TensorType, DatasetType],
+        executor: Optional[Executor] = None,
+        max_pending: int = 2,
+    ) -> np.ndarray:
+        """
+        Asynchronous version of `score`, see `ascore_iter`.
+
+        Args:
+            dataset (Union[TensorType, DatasetType]): dataset or tensors to score
+            executor (Optional[Executor]): executor in which `_score_tensor` is run.
+                Defaults to a single worker thread dedicated to the oodmodel.
+            max_pending (int): maximum number of batches submitted to the executor
+                and not yet gathered. Defaults to 2.
+
+        Returns:
+            np.ndarray: scores
+        """
+        scores = np.array([])
+        async for score_batch in self.ascore_iter(dataset, executor, max_pending):
+            scores = np.append(scores, score_batch)
+        return scores
+
+    async def aisood(
+        self,
+        dataset: Union[TensorType, DatasetType],
+        threshold: float,
+        executor: Optional[Executor] = None,
+        max_pending: int = 2,
+    ) -> np.ndarray:
+        """
+        Asynchronous version of `isood`, see `ascore_iter`.
+
+        Args:
+            dataset (Union[TensorType, DatasetType]): dataset or tensors to score
+            threshold (float): threshold to use for distinguishing between OOD and ID
+            executor (Optional[Executor]): executor in which `_score_tensor` is run.
+                Defaults to a single worker thread dedicated to the oodmodel.
+            max_pending (int): maximum number of batches submitted to the executor
+                and not yet gathered. Defaults to 2.
+
+        Returns:
+            np.ndarray: array of 0 for ID samples and 1 for OOD samples
+        """
+        scores = await self.ascore(dataset, executor, max_pending)
+        oodness = scores < threshold
+        return np.array(oodness, dtype=bool)
+
     def __call__(
         self, inputs: Union[TensorType, DatasetType], threshold: float
     ) -> np.ndarray:
@@ -227,3 +1206,119 @@ class OODModel(ABC):
         Convenience wrapper for isood
         """
         return self.isood(inputs, threshold)
+
+
+class _OODModelBlueprint:
+    """
+    Picklable recipe of an (unfitted) oodmodel: its class, constructor arguments
+    (oodmodels among them, e.g. the stages of a cascade, being blueprints too) and
+    dtype, post-processing and compilation settings. Used to rebuild the oodmodel
+    in spawned processes before loading its fitted state.
+
+    Args:
+        oodmodel (OODModel): oodmodel to rebuild
+    """
+
+    def __init__(self, oodmodel: OODModel):
+        self.cls = type(oodmodel)
+        self.config = {
+            name: _OODModelBlueprint(value) if isinstance(value, OODModel) else value
+            for name, value in oodmodel._get_config().items()
+        }
+        self.settings = {
+            "_dtype_policy": dict(oodmodel._dtype_policy),
+            "_postprocessing_backend": oodmodel._postprocessing_backend,
+            "_compile_options": oodmodel._compile_options,
+        }
+
+    def build(self) -> OODModel:
+        """Builds an unfitted oodmodel following the blueprint
+
+        Returns:
+            OODModel: oodmodel
+        """
+        oodmodel = self.cls(
+            **{
+                name: value.build() if isinstance(value, _OODModelBlueprint) else value
+                for name, value in self.config.items()
+            }
+        )
+        for name, value in self.settings.items():
+            setattr(oodmodel, name, value)
+        return oodmodel
+
+
+def _run_workers(context: Any, target: Callable, args_list: List[tuple]) -> None:
+    """
+    Runs one worker process per arguments tuple and waits for all of them.
+
+    Args:
+        context (Any): multiprocessing context
+        target (Callable): worker function
+        args_list (List[tuple]): arguments of each worker
+
+    Raises:
+        RuntimeError: if a worker failed
+    """
+    workers = [context.Process(target=target, args=args) for args in args_list]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    failed = [w.exitcode for w in workers if w.exitcode != 0]
+    if len(failed) > 0:
+        raise RuntimeError(
+            f"{len(failed)} scoring worker(s) failed (exit codes {failed})"
+        )
+
+
+def _check_shard_scores(scores: Any, start: int, stop: int) -> np.ndarray:
+    """
+    Checks that the scores of the samples of index in [start, stop) are one per
+    sample.
+
+    Args:
+        scores (Any): scores of the shard
+        start (int): index of the first sample
+        stop (int): index after the last sample
+
+    Returns:
+        np.ndarray: scores
+    """
+    scores = np.asarray(scores)
+    if scores.shape != (stop - start,):
+        raise ValueError(
+            f"Expected one score per sample, of shape ({stop - start},), got "
+            f"scores of shape {scores.shape}"
+        )
+    return scores
+
+
+def _score_shard_spawned(
+    blueprint: _OODModelBlueprint,
+    path: str,
+    start: int,
+    stop: int,
+    threads_per_worker: int,
+) -> None:
+    """
+    Spawned worker of `score_sharded` for tensorflow models: rebuilds the oodmodel
+    saved in "path" with its memory-mapped fitted state, scores the samples of index
+    in [start, stop) of the saved dataset and saves the scores in "path".
+
+    Args:
+        blueprint (_OODModelBlueprint): blueprint of the oodmodel
+        path (str): directory the oodmodel, model and dataset were saved to
+        start (int): index of the first sample
+        stop (int): index after the last sample
+        threads_per_worker (int): number of intra-op threads
+    """
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    model = tf.keras.models.load_model(os.path.join(path, "model.keras"))
+    oodmodel = blueprint.build().load(os.path.join(path, "oodmodel"), model)
+    dataset = tf.data.Dataset.load(os.path.join(path, "dataset"))
+    shard = oodmodel.data_handler.slice_batched_dataset(dataset, start, stop)
+    scores = _check_shard_scores(oodmodel.score(shard), start, stop)
+    np.save(os.path.join(path, f"scores_{start}.npy"), scores)
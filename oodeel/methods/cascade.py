@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import time
+from typing import get_args
+
+import numpy as np
+
+from ..types import Callable
+from ..types import DatasetType
+from ..types import Optional
+from ..types import TensorType
+from ..types import Tuple
+from ..types import Union
+from .base import OODModel
+
+
+class Cascade(OODModel):
+    """
+    Two-stage cascade of OOD detectors. A cheap first stage (e.g. MLS or Energy)
+    scores every sample, and only the samples whose first stage score falls in the
+    uncertainty band `[band[0], band[1]]` are escalated to a more expensive second
+    stage (e.g. ODIN or Mahalanobis with input perturbation). The second stage
+    scores then replace the first stage ones, in the original sample order.
+
+    Since the two stages do not output scores on the same scale, both are
+    standardized by default using the mean and standard deviation of their scores
+    on the fit dataset, so that the merged scores form a single ranking. The band
+    is always expressed in raw first stage score units.
+
+    Args:
+        first_stage (OODModel): cheap detector applied to every sample.
+        second_stage (OODModel): expensive detector applied to uncertain samples.
+        band (Tuple[float, float]): lower and upper bounds of the first stage scores
+            for which the samples are escalated to the second stage.
+        standardize (bool): if True, both stages scores are standardized with the
+            statistics of their scores on the fit dataset, which is then required.
+            Only disable it if both stages already output scores on the same
+            scale. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        first_stage: OODModel,
+        second_stage: OODModel,
+        band: Tuple[float, float],
+        standardize: bool = True,
+    ):
+        super().__init__(output_layers_id=first_stage.output_layers_id)
+        assert band[0] <= band[1], "band must be given as (lower, upper) bounds"
+        self.first_stage = first_stage
+        self.second_stage = second_stage
+        self.band = band
+        self.standardize = standardize
+        self._first_stage_stats = (0.0, 1.0)
+        self._second_stage_stats = (0.0, 1.0)
+        self.reset_stats()
+
+    def fit(
+        self,
+        model: Callable,
+        fit_dataset: Optional[Union[TensorType, DatasetType]] = None,
+    ) -> None:
+        """Fits both stages on the same model, and shares the feature extractor of
+        the first stage with the cascade.
+
+        Args:
+            model: model to extract the features from
+            fit_dataset: dataset to fit the stages on. Only forwarded to the stages
+                that require it. Mandatory if `standardize` is True.
+        """
+        assert fit_dataset is not None or not self.standardize, (
+            "A fit_dataset is required to standardize the stages scores, pass "
+            "standardize=False if both stages output scores on the same scale"
+        )
+        for stage in [self.first_stage, self.second_stage]:
+            stage.fit(model, fit_dataset if stage.requires_to_fit_dataset else None)
+
+        self._share_first_stage()
+
+        if self.standardize:
+            self._fit_to_dataset(fit_dataset)
+
+    def _fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Computes the mean and standard deviation of the scores of each stage on ID
+        data "fit_dataset".
+
+        Args:
+            fit_dataset: input dataset (ID)
+        """
+        if isinstance(fit_dataset, get_args(DatasetType)):
+            items = fit_dataset
+        else:
+            items = [fit_dataset]
+
+        first_scores, second_scores = [], []
+        for item in items:
+            tensor = self.data_handler.get_input_from_dataset_item(item)
+            first_scores.append(self.first_stage._score_tensor(tensor))
+            second_scores.append(self.second_stage._score_tensor(tensor))
+        first_scores = np.concatenate(first_scores)
+        second_scores = np.concatenate(second_scores)
+
+        self._first_stage_stats = (
+            np.mean(first_scores),
+            np.std(first_scores) + 1e-10,
+        )
+        self._second_stage_stats = (
+            np.mean(second_scores),
+            np.std(second_scores) + 1e-10,
+        )
+
+    def _get_fitted_state(self) -> dict:
+        """
+        Fitted state: classes and scores statistics of both stages, the stages
+        being saved in subdirectories by `save`.
+
+        Returns:
+            dict: fitted state
+        """
+        return {
+            "first_stage_class": type(self.first_stage).__name__,
+            "second_stage_class": type(self.second_stage).__name__,
+            "first_stage_stats": [float(v) for v in self._first_stage_stats],
+            "second_stage_stats": [float(v) for v in self._second_stage_stats],
+        }
+
+    def _set_fitted_state(self, state: dict) -> None:
+        """
+        Restores the fitted state returned by `_get_fitted_state`.
+
+        Args:
+            state (dict): fitted state
+        """
+        self._first_stage_stats = tuple(state["first_stage_stats"])
+        self._second_stage_stats = tuple(state["second_stage_stats"])
+
+    def save(self, path: str) -> None:
+        """
+        Saves the cascade and both of its stages in directory "path".
+
+        Args:
+            path (str): directory to save the oodmodel to
+        """
+        super().save(path)
+        self.first_stage.save(os.path.join(path, "first_stage"))
+        self.second_stage.save(os.path.join(path, "second_stage"))
+
+    def load(self, path: str, model: Callable, mmap: bool = True) -> "Cascade":
+        """
+        Loads the cascade and both of its stages from directory "path".
+
+        Args:
+            path (str): directory the oodmodel was saved to
+            model (Callable): model the oodmodel was fitted on
+            mmap (bool): if True, arrays are memory-mapped. Defaults to True.
+
+        Raises:
+            ValueError: if the saved state does not match this oodmodel class, the
+                classes of its stages or the weights of the model.
+
+        Returns:
+            Cascade: the loaded oodmodel (self)
+        """
+        with open(os.path.join(path, "manifest.json"), "r") as file:
+            manifest = json.load(file)
+        if manifest["class"] != type(self).__name__:
+            raise ValueError(
+                f"Cannot load a saved {manifest['class']} into a {type(self).__name__}"
+            )
+        for key, stage in [
+            ("first_stage_class", self.first_stage),
+            ("second_stage_class", self.second_stage),
+        ]:
+            if manifest["attributes"][key] != type(stage).__name__:
+                raise ValueError(
+                    f"Cannot load a saved {manifest['attributes'][key]} stage into "
+                    f"a {type(stage).__name__}"
+                )
+
+        self.first_stage.load(os.path.join(path, "first_stage"), model, mmap)
+        self.second_stage.load(os.path.join(path, "second_stage"), model, mmap)
+        self._share_first_stage()
+        self._set_fitted_state(manifest["attributes"])
+        return self
+
+    def _share_first_stage(self) -> None:
+        """Shares the feature extractor and backend of the first stage"""
+        self.feature_extractor = self.first_stage.feature_extractor
+        self.data_handler = self.first_stage.data_handler
+        self.op = self.first_stage.op
+        self.backend = self.first_stage.backend
+
+    @property
+    def requires_to_fit_dataset(self) -> bool:
+        return (
+            self.standardize
+            or self.first_stage.requires_to_fit_dataset
+            or self.second_stage.requires_to_fit_dataset
+        )
+
+    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+        """
+        Computes the first stage scores for every sample of "inputs", and replaces
+        the scores of the samples falling in the uncertainty band by the second
+        stage scores.
+
+        Args:
+            inputs: input samples to score
+
+        Returns:
+            scores
+        """
+        start = time.perf_counter()
+        first_scores = np.asarray(self.first_stage._score_tensor(inputs))
+
+        escalated = np.where(
+            (first_scores >= self.band[0]) & (first_scores <= self.band[1])
+        )[0]
+
+        mean, std = self._first_stage_stats
+        scores = (first_scores - mean) / std
+        if len(escalated) > 0:
+            second_scores = self.second_stage._score_tensor(
+                self.op.gather(inputs, escalated)
+            )
+            mean, std = self._second_stage_stats
+            scores[escalated] = (np.asarray(second_scores) - mean) / std
+
+        self._n_samples += len(first_scores)
+        self._n_escalated += len(escalated)
+        self._elapsed_time += time.perf_counter() - start
+        return scores
+
+    @property
+    def stats(self) -> dict:
+        """
+        Statistics of the cascade since the last call to `reset_stats`.
+
+        Returns:
+            dict: number of scored samples, number and fraction of samples escalated
+                to the second stage, time spent scoring (s) and end-to-end
+                throughput (samples/s).
+        """
+        return {
+            "n_samples": self._n_samples,
+            "n_escalated": self._n_escalated,
+            "escalation_rate": self._n_escalated / max(self._n_samples, 1),
+            "elapsed_time": self._elapsed_time,
+            "throughput": self._n_samples / max(self._elapsed_time, 1e-10),
+        }
+
+    def reset_stats(self) -> None:
+        """Resets the escalation and throughput statistics."""
+        self._n_samples = 0
+        self._n_escalated = 0
+        self._elapsed_time = 0.0
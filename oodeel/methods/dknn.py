@@ -20,14 +20,31 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import faiss
+import os
+import uuid
+from typing import get_args
+
 import numpy as np
 
+from ..types import Any
+from ..types import Callable
 from ..types import DatasetType
+from ..types import Dict
 from ..types import List
+from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
+from ..utils.knn import _has_faiss
+from ..utils.knn import get_knn_backend
+from ..utils.knn import KNNBackend
 from .base import OODModel
+from .reference_reduction import reduce_references
+
+if _has_faiss:
+    import faiss
+
+    from ..utils.knn import _FAISS_MMAP_FLAG
 
 
 class DKNN(OODModel):
@@ -35,77 +52,809 @@ class DKNN(OODModel):
     "Out-of-Distribution Detection with Deep Nearest Neighbors"
     https://arxiv.org/abs/2204.06507
 
+    The reference set can be bounded to keep memory and search latency constant
+    when it is continuously updated with `partial_fit` (e.g. with recent ID
+    traffic): each class then keeps at most `max_references // n_classes` vectors,
+    the other ones being evicted from the (ID-mapped) indexes. The number of
+    classes cannot exceed `max_references`.
+
     Args:
         nearest: number of nearest neighbors to consider.
             Defaults to 1.
         output_layers_id: feature space on which to compute nearest neighbors.
             Defaults to [-2].
+        max_references: hard cap on the total number of reference vectors. If None,
+            the reference set is not bounded. Defaults to None.
+        eviction: eviction policy of each class when the cap is reached, either
+            "fifo" (the oldest vectors are evicted, for a rolling window of the
+            most recent data) or "reservoir" (the kept vectors are a uniform sample
+            of all the data seen for the class). Defaults to "fifo".
+        reduction: strategy used to reduce the reference set of each class at fit
+            time, among "random", "kmeans", "kcenter" and "dedup" (see
+            `reference_reduction.reduce_references`). If None, every fit sample is
+            indexed. The reduction needs the reference set in memory, and is not
+            available with `index_dir`. Defaults to None.
+        reduction_size: number (if an int) or fraction (if a float) of the fit
+            samples of each class kept by the reduction. Defaults to 0.1.
+        projection: projection of the features fitted at fit time and applied
+            on-device before indexing and searching, among "pca" (PCA with
+            whitening), "random" (Gaussian random projection), "sparse_random"
+            (sparse random projection) and "gap" (global average pooling of 4D
+            feature maps). If None, the flattened features are used.
+            Defaults to None.
+        projection_dim: output dimension of the "pca", "random" and
+            "sparse_random" projections. The "pca" projection is fitted on a
+            uniform sample of `10 * projection_dim` fit samples. Defaults to 128.
+        index_dir: directory where the indexes are stored. If not None, the
+            vectors of each class are written to disk as memory-mapped faiss shards
+            of `shard_size` vectors as soon as they are indexed, so that reference
+            sets larger than RAM can be built and searched. Defaults to None.
+        shard_size: number of vectors of each on-disk shard. Defaults to 100000.
+        consolidated: if True, the references of all classes are stored in a
+            single matrix, each class occupying a contiguous range of rows, and the
+            searches of the queries of each class are restricted to its range with
+            the kNN backend. This avoids the per-index overhead of very large label
+            spaces, and the matrix is saved as a memory-mappable array. References
+            added after the last scoring are buffered and merged into the matrix
+            before the next one. Defaults to False.
+        knn_backend: exact nearest neighbor search backend, either "faiss", "numpy"
+            (blocked NumPy search, see `utils.knn.NumpyBackend`) or a `KNNBackend`
+            instance. If None, faiss if it is installed, else numpy. On-disk
+            indexes require faiss. Defaults to None.
+        seed: random seed of the reservoir sampling and evictions, of the "random"
+            and "sparse_random" projections and of the reduction. Defaults to None.
     """
 
     def __init__(
         self,
         nearest: int = 1,
         output_layers_id: List[int] = [-2],
+        max_references: Optional[int] = None,
+        eviction: str = "fifo",
+        reduction: Optional[str] = None,
+        reduction_size: Union[int, float] = 0.1,
+        projection: Optional[str] = None,
+        projection_dim: int = 128,
+        index_dir: Optional[str] = None,
+        shard_size: int = 100000,
+        consolidated: bool = False,
+        knn_backend: Union[str, KNNBackend, None] = None,
+        seed: Optional[int] = None,
     ):
         super().__init__(
             output_layers_id=output_layers_id,
         )
+        if projection not in [None, "pca", "random", "sparse_random", "gap"]:
+            raise NotImplementedError(
+                'only "pca", "random", "sparse_random" and "gap" are available for '
+                'argument "projection"'
+            )
+        assert (
+            max_references is None or index_dir is None
+        ), "A bounded reference set cannot be stored on disk"
+        assert (
+            reduction is None or index_dir is None
+        ), "A reference set stored on disk cannot be reduced"
+        assert not consolidated or (
+            max_references is None and index_dir is None
+        ), "A consolidated index can neither be bounded nor stored on disk"
+        if eviction not in ["fifo", "reservoir"]:
+            raise NotImplementedError(
+                'only "fifo" and "reservoir" are available for argument "eviction"'
+            )
+
+        self.knn_backend = get_knn_backend(knn_backend)
+        assert (
+            index_dir is None or self.knn_backend.name == "faiss"
+        ), "On-disk indexes require the faiss kNN backend"
 
         self.index = {}
         self.nearest = nearest
+        self.max_references = max_references
+        self.eviction = eviction
+        self.reduction = reduction
+        self.reduction_size = reduction_size
+        self.projection = projection
+        self.projection_dim = projection_dim
+        self._projection_mean = None
+        self._projection_matrix = None
+        self.index_dir = index_dir
+        self.shard_size = shard_size
+        self.consolidated = consolidated
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._shard_files = []
+        if index_dir is not None:
+            os.makedirs(index_dir, exist_ok=True)
+        self._reset_references()
 
     def _fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
         """
         Constructs the index from ID data "fit_dataset", which will be used for
-        nearest neighbor search.
+        nearest neighbor search, in a single streaming pass over the dataset (two
+        for the "pca" projection, which is fitted beforehand).
 
         Args:
             fit_dataset: input dataset (ID) to construct the index with.
         """
-        labels = fit_dataset.map(lambda x, y: y)
-        labels = list(labels.as_numpy_iterator())
-        labels_full = np.array([])
-        for lab in labels:
-            labels_full = np.append(labels_full, lab)
-        labels = np.array(labels_full)
-        fit_projected = self.feature_extractor.predict(fit_dataset)
-        fit_projected = self.op.convert_to_numpy(fit_projected)
-        fit_projected = fit_projected.reshape(fit_projected.shape[0], -1)
+        self._reset_references()
+        self._rng = np.random.default_rng(self.seed)
+        self._partial_fit_to_dataset(fit_dataset)
+        if self.reduction is not None:
+            self.set_references(
+                {
+                    class_label: reduce_references(
+                        vectors, self.reduction, self.reduction_size, self.seed
+                    )
+                    for class_label, vectors in self.get_references().items()
+                }
+            )
+
+    def _partial_fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Routes the L2 normalized features of each batch of ID data "fit_dataset" to
+        the index of their class, creating the indexes of new classes. When a "pca"
+        projection has to be fitted, it is fitted beforehand on a uniform sample of
+        the features of the whole dataset (see `_fit_pca_projection`), at the cost
+        of an extra pass over the dataset. Indexes loaded with `mmap=True` are
+        read-only and must be loaded with `mmap=False` to be updated, except for
+        on-disk indexes (see `index_dir`).
+
+        Args:
+            fit_dataset: additional ID data to add to the index.
+        """
+        if self._projection_matrix is None and self.projection == "pca":
+            self._fit_pca_projection(fit_dataset)
+        for images, labels in self._iterate_labeled_batches(fit_dataset):
+            features = self.feature_extractor.predict(images)
+            if self._projection_matrix is None:
+                self._fit_projection(features)
+            self._index_features(features, labels)
+
+    def _fit_pca_projection(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Fits the "pca" projection on a reservoir sample of `10 * projection_dim`
+        features, drawn uniformly from the whole dataset so that the projection
+        does not only see the first classes of a class-sorted dataset.
+
+        Args:
+            fit_dataset: ID data to fit the projection on.
+        """
+        size = 10 * self.projection_dim
+        # seeded, for the projection to only depend on the dataset
+        rng = np.random.default_rng(0)
+        reservoir, n_seen = None, 0
+        for images, _ in self._iterate_labeled_batches(fit_dataset):
+            features = self.op.convert_to_numpy(self.feature_extractor.predict(images))
+            features = features.reshape(features.shape[0], -1)
+            if reservoir is None:
+                reservoir = np.zeros((size, features.shape[1]), features.dtype)
+            n_fill = min(max(size - n_seen, 0), len(features))
+            reservoir[n_seen : n_seen + n_fill] = features[:n_fill]
+            # algorithm R: the t-th sample replaces a random one with probability
+            # size / (t + 1), later samples overwriting earlier ones
+            ranks = n_seen + np.arange(n_fill, len(features))
+            slots = rng.integers(0, ranks + 1)
+            replaced = slots < size
+            reservoir[slots[replaced]] = features[n_fill:][replaced]
+            n_seen += len(features)
+        if reservoir is not None:
+            self._fit_projection(reservoir[: min(size, n_seen)])
+
+    def _index_features(self, features: TensorType, labels: np.ndarray) -> None:
+        """
+        Projects, normalizes and adds features to the index of their class.
+
+        Args:
+            features: features of a batch of ID data
+            labels: labels of the batch
+        """
+        norm_fit_projected = self.op.l2_normalize(self._project(features))
+        norm_fit_projected = self.op.convert_to_numpy(norm_fit_projected)
+        for class_label in np.unique(labels):
+            self._add_references(class_label, norm_fit_projected[labels == class_label])
+
+    def get_references(self) -> Dict[Any, np.ndarray]:
+        """
+        Returns the reference vectors of each class.
+
+        Returns:
+            Dict[Any, np.ndarray]: normalized reference vectors, by class label
+        """
+        if self.consolidated:
+            self._consolidate()
+            return {
+                class_label: np.array(self._consolidated_references[start:stop])
+                for class_label, (start, stop) in self._class_ranges.items()
+            }
+        references = {}
+        for class_label, index in self.index.items():
+            shards = self._shards.get(class_label, [index])
+            references[class_label] = np.concatenate(
+                [self.knn_backend.get_vectors(shard) for shard in shards]
+            )
+        return references
+
+    def set_references(self, references: Dict[Any, np.ndarray]) -> None:
+        """
+        Replaces the reference set, e.g. by a reduced version of the one returned by
+        `get_references`.
+
+        Args:
+            references (Dict[Any, np.ndarray]): normalized reference vectors, by
+                class label
+        """
+        self._reset_references()
+        for class_label, vectors in references.items():
+            self._add_references(class_label, vectors)
+
+    def _reset_references(self) -> None:
+        """Empties the reference set"""
+        self.index = {}
+        # sub-indexes of the on-disk indexes, the last one being in memory
+        self._shards = {}
+        for path in self._shard_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self._shard_files = []
+        # unique to the reference set, so that detectors sharing index_dir do not
+        # overwrite each other's shards
+        self._shard_prefix = uuid.uuid4().hex
+        # ids of the reference vectors of each class, in insertion order
+        self._reference_ids = {}
+        # number of vectors seen for each class, for reservoir sampling
+        self._n_seen = {}
+        self._next_id = 0
+        # consolidated references, row range of each class and references to merge
+        self._consolidated_references = None
+        self._class_ranges = {}
+        self._pending_references = {}
+
+    @property
+    def n_references(self) -> int:
+        """Total number of reference vectors"""
+        if self.consolidated:
+            return sum(
+                stop - start for start, stop in self._class_ranges.values()
+            ) + sum(
+                len(vectors)
+                for pending in self._pending_references.values()
+                for vectors in pending
+            )
+        return sum(index.ntotal for index in self.index.values())
+
+    def _add_references(self, class_label: Any, vectors: np.ndarray) -> None:
+        """
+        Adds reference vectors to the index of class "class_label", creating it if
+        needed. If the reference set is bounded, vectors are evicted following the
+        eviction policy so that each class keeps at most its quota of vectors.
+
+        Args:
+            class_label: class of the vectors
+            vectors: normalized reference vectors
+        """
+        vectors = np.ascontiguousarray(vectors, np.float32)
+        if self.consolidated:
+            self._pending_references.setdefault(class_label, []).append(vectors)
+            return
+        new_class = class_label not in self.index.keys()
+        if new_class:
+            if self.max_references is not None and (
+                len(self.index) >= self.max_references
+            ):
+                raise ValueError(
+                    f"Cannot index more classes than max_references "
+                    f"(={self.max_references}), each class keeping at least one "
+                    "reference vector"
+                )
+            index = self.knn_backend.create_index(
+                vectors.shape[1], with_ids=self.max_references is not None
+            )
+            if self.max_references is None and self.index_dir is not None:
+                self._shards[class_label] = [index]
+                index = faiss.IndexShards(vectors.shape[1], False, True)
+                index.add_shard(self._shards[class_label][0])
+            self.index[class_label] = index
+            self._reference_ids[class_label] = np.array([], dtype=np.int64)
+            self._n_seen[class_label] = 0
+
+        if self.max_references is None:
+            if class_label in self._shards.keys():
+                self._add_to_shards(class_label, vectors)
+            else:
+                self.index[class_label].add(vectors)
+            return
+
+        quota = max(self.max_references // len(self.index), 1)
+        if new_class:
+            # make room for the new class in the other ones
+            for other_label in self.index.keys():
+                self._evict_references(other_label, quota)
+
+        n_seen = self._n_seen[class_label]
+        self._n_seen[class_label] += len(vectors)
+        if self.eviction == "fifo":
+            vectors = vectors[-quota:]
+            ids = self._new_ids(len(vectors))
+            self.index[class_label].add_with_ids(vectors, ids)
+            self._reference_ids[class_label] = np.concatenate(
+                [self._reference_ids[class_label], ids]
+            )
+            self._evict_references(class_label, quota)
+            return
+
+        # reservoir sampling: the i-th vector seen replaces a random slot with
+        # probability quota / (i + 1) once the reservoir is full
+        reservoir = self._reference_ids[class_label]
+        n_free = max(quota - len(reservoir), 0)
+        slots = np.concatenate(
+            [
+                len(reservoir) + np.arange(min(n_free, len(vectors))),
+                self._rng.integers(0, n_seen + np.arange(n_free, len(vectors)) + 1),
+            ]
+        )
+        # when a slot is drawn several times, only the last vector is kept
+        _, last = np.unique(slots[::-1], return_index=True)
+        kept = np.sort(len(slots) - 1 - last)
+        kept = kept[slots[kept] < quota]
+        replaced = slots[kept][slots[kept] < len(reservoir)]
+        self.index[class_label].remove_ids(reservoir[replaced])
+        ids = self._new_ids(len(kept))
+        self.index[class_label].add_with_ids(vectors[kept], ids)
+        reservoir = np.concatenate(
+            [reservoir, np.zeros(len(kept) - len(replaced), dtype=np.int64)]
+        )
+        reservoir[slots[kept]] = ids
+        self._reference_ids[class_label] = reservoir
+
+    def _add_to_shards(self, class_label: Any, vectors: np.ndarray) -> None:
+        """
+        Adds reference vectors to the in-memory shard of an on-disk index. When it
+        reaches `shard_size` vectors, the shard is written to `index_dir` and
+        replaced by its memory-mapped version and a new in-memory shard.
+
+        Args:
+            class_label: class of the vectors
+            vectors: normalized reference vectors
+        """
+        index, shards = self.index[class_label], self._shards[class_label]
+        shards[-1].add(vectors)
+        if self.index_dir is not None and shards[-1].ntotal >= self.shard_size:
+            class_number = list(self.index.keys()).index(class_label)
+            path = os.path.join(
+                self.index_dir,
+                f"{self._shard_prefix}_class_{class_number}_shard_{len(shards) - 1}"
+                ".faiss",
+            )
+            faiss.write_index(shards[-1], path)
+            self._shard_files.append(path)
+            index.remove_shard(shards[-1])
+            shards[-1] = faiss.read_index(path, _FAISS_MMAP_FLAG)
+            shards.append(faiss.IndexFlatL2(index.d))
+            index.add_shard(shards[-2])
+            index.add_shard(shards[-1])
+        index.syncWithSubIndexes()
+
+    def _consolidate(self) -> None:
+        """
+        Merges the buffered references into the consolidated references, which are
+        rebuilt with the references of each class in a contiguous range of rows.
+        """
+        if len(self._pending_references) == 0:
+            return
+        class_labels = list(self._class_ranges.keys())
+        class_labels += [
+            class_label
+            for class_label in self._pending_references.keys()
+            if class_label not in self._class_ranges.keys()
+        ]
+        references, class_ranges, offset = [], {}, 0
+        for class_label in class_labels:
+            vectors = self._pending_references.get(class_label, [])
+            if class_label in self._class_ranges.keys():
+                start, stop = self._class_ranges[class_label]
+                vectors = [self._consolidated_references[start:stop]] + vectors
+            vectors = np.concatenate(vectors)
+            class_ranges[class_label] = (offset, offset + len(vectors))
+            offset += len(vectors)
+            references.append(vectors)
+        self._consolidated_references = np.concatenate(references)
+        self._class_ranges = class_ranges
+        self._pending_references = {}
+
+    def _evict_references(self, class_label: Any, quota: int) -> None:
+        """
+        Evicts reference vectors of class "class_label" until it holds at most
+        "quota" vectors: the oldest ones for the FIFO policy, random ones for the
+        reservoir policy.
+
+        Args:
+            class_label: class of the vectors
+            quota: maximum number of vectors of the class
+        """
+        ids = self._reference_ids[class_label]
+        n_evicted = len(ids) - quota
+        if n_evicted <= 0:
+            return
+        if self.eviction == "fifo":
+            evicted = np.arange(n_evicted)
+        else:
+            evicted = self._rng.choice(len(ids), n_evicted, replace=False)
+        self.index[class_label].remove_ids(ids[evicted])
+        self._reference_ids[class_label] = np.delete(ids, evicted)
+
+    def _new_ids(self, n: int) -> np.ndarray:
+        """
+        Returns n new unique ids for reference vectors.
+
+        Args:
+            n: number of ids
+
+        Returns:
+            np.ndarray: ids
+        """
+        ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._next_id += n
+        return ids
+
+    def _get_fitted_state(self) -> dict:
+        """
+        Fitted state: the class labels, the id ranges of the classes in the
+        consolidated references or the bookkeeping of the per-class indexes, and the
+        projection, the per-class indexes themselves being saved as faiss index
+        files by `save`.
+
+        Returns:
+            dict: fitted state
+        """
+        if self.consolidated:
+            self._consolidate()
+            labels = list(self._class_ranges.keys())
+            state = {
+                "labels": np.array(labels),
+                "class_ranges": np.array(
+                    [self._class_ranges[label] for label in labels], dtype=np.int64
+                ),
+                "references": self._consolidated_references,
+            }
+        else:
+            state = self._get_references_state()
+        if self._projection_matrix is not None:
+            state["projection_mean"] = self._projection_mean
+            state["projection_matrix"] = self._projection_matrix
+        return state
+
+    def _get_references_state(self) -> dict:
+        """
+        Fitted state of the per-class indexes: the class labels of the indexes and
+        the bookkeeping of the bounded reference set and of the on-disk shards.
+
+        Returns:
+            dict: fitted state
+        """
+        labels = list(self.index.keys())
+        return {
+            "knn_backend": self.knn_backend.name,
+            "labels": np.array(labels),
+            "n_references": np.array(
+                [len(self._reference_ids[label]) for label in labels], dtype=np.int64
+            ),
+            "reference_ids": np.concatenate(
+                [self._reference_ids[label] for label in labels]
+            ),
+            "n_seen": np.array([self._n_seen[label] for label in labels]),
+            "next_id": int(self._next_id),
+            "n_shards": np.array(
+                [len(self._shards.get(label, [])) for label in labels], dtype=np.int64
+            ),
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Saves the fitted state of the oodmodel in directory "path", including one
+        index file per class (or per shard), in the format of the kNN backend.
 
-        classes = np.unique(labels)
-        for class_label in classes:
-            loc_class = np.where(labels == class_label)
-            fit_projected_label = fit_projected[loc_class]
-            norm_fit_projected = self._l2_normalization(fit_projected_label)
-            self.index[class_label] = faiss.IndexFlatL2(norm_fit_projected.shape[1])
-            self.index[class_label].add(norm_fit_projected)
+        Args:
+            path (str): directory to save the oodmodel to
+        """
+        super().save(path)
+        for i, class_label in enumerate(self.index.keys()):
+            if class_label in self._shards.keys():
+                for j, shard in enumerate(self._shards[class_label]):
+                    faiss.write_index(shard, os.path.join(path, f"index_{i}_{j}.faiss"))
+                continue
+            self.knn_backend.write_index(
+                self.index[class_label], os.path.join(path, f"index_{i}")
+            )
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+    def load(self, path: str, model: Callable, mmap: bool = True) -> "DKNN":
         """
-        Computes an OOD score for input samples "inputs" based on
-        the distance to nearest neighbors in the feature space of self.model
+        Prepares the oodmodel for scoring from a state saved with `save`. When mmap
+        is True, the indexes are memory-mapped instead of read in memory.
+
+        Args:
+            path (str): directory the oodmodel was saved to
+            model (Callable): model the oodmodel was fitted on
+            mmap (bool): if True, the indexes are memory-mapped. Defaults to True.
+
+        Returns:
+            DKNN: the loaded oodmodel (self)
+        """
+        super().load(path, model, mmap)
+        for i, class_label in enumerate(self.index.keys()):
+            if class_label not in self._shards.keys():
+                self.index[class_label] = self.knn_backend.read_index(
+                    os.path.join(path, f"index_{i}"), mmap
+                )
+                continue
+            # read the shards and add a new in-memory one for updates
+            io_flags = _FAISS_MMAP_FLAG if mmap else 0
+            shards = [
+                faiss.read_index(os.path.join(path, f"index_{i}_{j}.faiss"), io_flags)
+                for j in range(len(self._shards[class_label]))
+            ]
+            shards.append(faiss.IndexFlatL2(shards[0].d))
+            self._shards[class_label] = shards
+            self.index[class_label] = faiss.IndexShards(shards[0].d, False, True)
+            for shard in shards:
+                self.index[class_label].add_shard(shard)
+        return self
+
+    def _set_fitted_state(self, state: dict) -> None:
+        """
+        Restores the state returned by `_get_fitted_state`, the indexes themselves
+        being read by `load`.
+
+        Args:
+            state (dict): fitted state
+        """
+        labels = list(state["labels"])
+        self.consolidated = "class_ranges" in state.keys()
+        if self.consolidated:
+            self._class_ranges = {
+                class_label: tuple(int(i) for i in class_range)
+                for class_label, class_range in zip(labels, state["class_ranges"])
+            }
+            self._consolidated_references = state["references"]
+            self._pending_references = {}
+        else:
+            # indexes are written in the format of the backend they were built with
+            knn_backend = state.get("knn_backend", "faiss")
+            if knn_backend != self.knn_backend.name:
+                self.knn_backend = get_knn_backend(knn_backend)
+            self.index = {class_label: None for class_label in labels}
+            splits = np.cumsum(state["n_references"])[:-1]
+            self._reference_ids = dict(
+                zip(labels, np.split(np.array(state["reference_ids"]), splits))
+            )
+            self._n_seen = dict(zip(labels, np.array(state["n_seen"])))
+            self._next_id = state["next_id"]
+            self._shards = {
+                class_label: [None] * n_shards
+                for class_label, n_shards in zip(labels, state["n_shards"])
+                if n_shards > 0
+            }
+        self._set_projection_state(state)
+
+    def _set_projection_state(self, state: dict) -> None:
+        """
+        Restores the fitted projection, if any.
+
+        Args:
+            state (dict): fitted state
+        """
+        if "projection_matrix" in state.keys():
+            self._projection_mean = np.array(state["projection_mean"])
+            self._projection_matrix = np.array(state["projection_matrix"])
+            self._invalidate_params()
+
+    def _forward(self, inputs: TensorType) -> Tuple[TensorType, TensorType]:
+        """
+        Computes the features and the logits of input samples "inputs"
 
         Args:
             inputs: input samples to score
 
+        Raises:
+            NotImplementedError: if the oodmodel is model-free, the logits of the
+                samples being then unavailable
+
         Returns:
-            scores
+            features and logits
         """
+        if self.feature_extractor.model is None:
+            raise NotImplementedError(
+                "A model-free DKNN cannot compute the logits of the samples: use "
+                "score_features((features, logits)) instead of score()"
+            )
         input_projected = self.feature_extractor(inputs)
-        input_projected = self.op.convert_to_numpy(input_projected)
-        labels = self.feature_extractor.model(inputs)
-        labels = self.op.softmax(labels)
-        labels = self.op.argmax(labels, dim=1)
-        labels = self.op.convert_to_numpy(labels)
-        input_projected = input_projected.reshape(input_projected.shape[0], -1)
+        logits = self.op.cast(self.feature_extractor.model(inputs))
+        return input_projected, logits
+
+    def _prepare_scoring(self) -> None:
+        """Merges the buffered references into the consolidated references, so that
+        the searches only read the reference set, and loads the fitted projection on
+        the device of the features."""
+        if self.consolidated:
+            self._consolidate()
+        if self._projection_matrix is not None:
+            self._get_param("projection_mean", lambda: self._projection_mean)
+            self._get_param("projection_matrix", lambda: self._projection_matrix)
+
+    def _score_features_device(
+        self, features: Tuple[TensorType, TensorType]
+    ) -> Tuple[TensorType, TensorType]:
+        """
+        Projects and normalizes the features, and computes the predicted classes.
+
+        Args:
+            features: features and logits of the input samples
+
+        Returns:
+            normalized projected features and predicted classes
+        """
+        input_projected, logits = features
+        norm_input_projected = self.op.l2_normalize(self._project(input_projected))
+        return norm_input_projected, self.op.argmax(logits, dim=1)
+
+    def _score_features_host(
+        self, outputs: Tuple[TensorType, TensorType]
+    ) -> np.ndarray:
+        """
+        Computes the distance of the features to their nearest neighbors among the
+        ID features of the predicted class.
+
+        Args:
+            outputs: output of `_score_features_device`
+
+        Returns:
+            scores
+        """
+        return self._search_outputs(outputs, self.nearest)[:, -1]
+
+    def score_k(
+        self,
+        dataset: Union[TensorType, DatasetType],
+        k_list: List[int],
+        reduction: str = "kth",
+    ) -> np.ndarray:
+        """
+        Computes the DKNN scores of input samples for several numbers of nearest
+        neighbors with a single search of the `max(k_list)` nearest neighbors, e.g.
+        to tune `nearest` without scoring once per candidate.
+
+        Args:
+            dataset (Union[TensorType, DatasetType]): dataset or tensors to score
+            k_list (List[int]): numbers of nearest neighbors
+            reduction (str): score computed from the distances to the k nearest
+                neighbors, either "kth" (distance to the k-th nearest neighbor, the
+                DKNN score) or "mean" (mean distance to the k nearest neighbors).
+                Defaults to "kth".
+
+        Returns:
+            np.ndarray: scores, of shape (n_samples, len(k_list))
+        """
+        assert self.feature_extractor is not None, "Call .fit() before .score_k()"
+        if reduction not in ["kth", "mean"]:
+            raise NotImplementedError(
+                'only "kth" and "mean" are available for argument "reduction"'
+            )
+        if isinstance(dataset, get_args(DatasetType)):
+            items = dataset
+        else:
+            items = [dataset]
+
+        k_max = max(k_list)
         scores = []
-        norm_input_projected = self._l2_normalization(input_projected)
-        for inp, class_label in zip(norm_input_projected, labels):
-            scores_inp, _ = self.index[class_label].search(
-                np.reshape(inp, (1, len(inp))), self.nearest
+        for item in items:
+            tensor = self.data_handler.get_input_from_dataset_item(item)
+            distances = self._search_outputs(self._forward_device(tensor), k_max)
+            if reduction == "mean":
+                distances = np.cumsum(distances, axis=1) / np.arange(1, k_max + 1)
+            scores.append(distances[:, np.array(k_list) - 1])
+        return np.concatenate(scores)
+
+    def _search_outputs(
+        self, outputs: Tuple[TensorType, TensorType], k: int
+    ) -> np.ndarray:
+        """
+        Searches the k nearest neighbors of the features among the ID features of
+        the predicted class.
+
+        Args:
+            outputs: output of `_score_features_device`
+            k: number of nearest neighbors
+
+        Returns:
+            np.ndarray: squared L2 distances to the k nearest neighbors
+        """
+        queries, labels = outputs
+        queries = self.op.convert_to_numpy(queries)
+        labels = self.op.convert_to_numpy(labels)
+        return self._search(queries, labels, k)
+
+    def _search(self, queries: np.ndarray, labels: np.ndarray, k: int) -> np.ndarray:
+        """
+        Searches the k nearest neighbors of each query among the references of its
+        (predicted) class, with one search per class.
+
+        Args:
+            queries: normalized query vectors
+            labels: class of each query
+            k: number of nearest neighbors
+
+        Returns:
+            np.ndarray: squared L2 distances to the k nearest neighbors, sorted in
+                increasing order
+        """
+        queries = np.ascontiguousarray(queries, np.float32)
+        distances = np.zeros((len(queries), k), dtype=np.float32)
+        for class_label in np.unique(labels):
+            rows = np.where(labels == class_label)[0]
+            if self.consolidated:
+                start, stop = self._class_ranges[class_label]
+                distances[rows], _ = self.knn_backend.knn(
+                    queries[rows], self._consolidated_references[start:stop], k
+                )
+            else:
+                distances[rows], _ = self.index[class_label].search(queries[rows], k)
+        return distances
+
+    def _fit_projection(self, features: TensorType) -> None:
+        """
+        Fits the projection of the features, as an affine map
+        x -> (x - mean) @ matrix (mean being zero for random projections).
+
+        Args:
+            features: features of ID data, as a tensor or a NumPy array
+        """
+        if self.projection in [None, "gap"]:
+            return
+
+        if not isinstance(features, np.ndarray):
+            features = self.op.convert_to_numpy(features)
+        features = features.reshape(features.shape[0], -1).astype(self.fit_dtype)
+        n_samples, dim = features.shape
+        if self.projection == "pca":
+            self._projection_mean = np.mean(features, axis=0)
+            # economy SVD, cheaper than the covariance for high dimensional features
+            _, singular_values, components = np.linalg.svd(
+                features - self._projection_mean, full_matrices=False
             )
-            scores.append(scores_inp[0, -1])
-        return np.array(scores)
+            k = min(self.projection_dim, len(singular_values))
+            stds = singular_values[:k] / np.sqrt(n_samples)
+            self._projection_matrix = components[:k].T / (stds + 1e-10)
+        else:
+            rng = self._rng
+            k = self.projection_dim
+            self._projection_mean = np.zeros(dim)
+            if self.projection == "random":
+                self._projection_matrix = rng.normal(0, 1 / np.sqrt(k), (dim, k))
+            else:
+                # Achlioptas sparse random projection
+                self._projection_matrix = np.sqrt(3 / k) * rng.choice(
+                    [-1.0, 0.0, 1.0], size=(dim, k), p=[1 / 6, 2 / 3, 1 / 6]
+                )
+        self._invalidate_params()
+
+    def _project(self, features: TensorType) -> TensorType:
+        """
+        Applies the fitted projection to the features, on the device of the
+        features, and flattens them.
+
+        Args:
+            features: features to project
 
-    def _l2_normalization(self, feat: np.ndarray) -> np.ndarray:
-        return feat / (np.linalg.norm(feat, ord=2, axis=-1, keepdims=True) + 1e-10)
+        Returns:
+            TensorType: projected features, of shape (n, d)
+        """
+        if self.projection == "gap" and len(features.shape) == 4:
+            # channels first for torch models and ONNX graphs
+            spatial_dims = [2, 3] if self.backend in ["torch", "onnx"] else [1, 2]
+            features = self.op.mean(features, dim=spatial_dims)
+        features = self.op.flatten(features)
+        if self._projection_matrix is None:
+            return features
+        mean = self._get_param("projection_mean", lambda: self._projection_mean)
+        matrix = self._get_param("projection_matrix", lambda: self._projection_matrix)
+        return self.op.matmul(features - mean, matrix)
@@ -20,9 +20,6 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import numpy as np
-from scipy.special import logsumexp
-
 from ..types import TensorType
 from .base import OODModel
 
@@ -56,21 +53,29 @@ class Energy(OODModel):
     def __init__(self):
         super().__init__(output_layers_id=[-1])
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+    def _score_features_device(self, logits: TensorType) -> TensorType:
         """
-        Computes an OOD score for input samples "inputs" based on
-        energy, namey $-logsumexp(logits(inputs))$.
+        Computes the energy scores from the logits, namely
+        $-logsumexp(logits(inputs))$ (softmax(logits,axis=1) being the actual
+        softmax output minimized using binary cross entropy).
 
         Args:
-            inputs: input samples to score
+            logits: logits of the input samples
 
         Returns:
             scores
         """
+        return -self.op.logsumexp(logits, dim=1)
+
+    def _export_logits(self, inputs: TensorType, features: TensorType) -> TensorType:
+        """
+        Logits output by the exported graph: the features of the oodmodel.
 
-        # compute logits (softmax(logits,axis=1) is the actual softmax
-        # output minimized using binary cross entropy)
-        logits = self.feature_extractor(inputs)
-        logits = self.op.convert_to_numpy(logits)
-        scores = -logsumexp(logits, axis=1)
-        return scores
+        Args:
+            inputs (TensorType): input samples
+            features (TensorType): logits of the input samples
+
+        Returns:
+            TensorType: logits
+        """
+        return features
@@ -20,14 +20,22 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from typing import get_args
+
 import numpy as np
-from sklearn import covariance
-from sklearn import preprocessing
+from scipy import linalg
+from sklearn.linear_model import LogisticRegression
 
+from ..types import Any
 from ..types import DatasetType
 from ..types import List
+from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
+from ..utils.dtype_policy import HALF_DTYPES
+from ..utils.knn import get_knn_backend
+from ..utils.knn import KNNBackend
 from oodeel.methods.base import OODModel
 
 
@@ -37,100 +45,591 @@ class Mahalanobis(OODModel):
     Adversarial Attacks"
     https://arxiv.org/abs/1807.03888
 
+    For high dimensional features, the covariance matrix can be modeled as its top
+    `rank` eigenvectors plus an isotropic (probabilistic PCA) or diagonal residual.
+    The D x D precision matrix is then never formed: it is applied with the
+    Woodbury identity in O(D * rank) per sample, and the eigenvectors are estimated
+    with a single-pass randomized (Nystrom) sketch of the scatter matrix, so that
+    fitting also only stores O(D * rank) values.
+
+    For large label spaces, the per-class scores can be replaced by a nearest
+    center search (`nearest_center=True`): the precision is factorized as
+    `F @ F.T`, the class centers are whitened once (`mu @ F`) and the score of a
+    sample is half the squared L2 distance between its whitened features and the
+    nearest whitened center, searched with a kNN backend instead of one quadratic
+    form per class.
+
+    Several layers can be combined as in the original paper: the features of all
+    the layers are extracted with a single forward (and a single backward for the
+    input perturbation), 4D feature maps are global average pooled on-device, the
+    statistics of every layer are fitted in the same streaming pass, and the score
+    is a weighted sum of the scores of the layers. The weights are either given, or
+    learned with `fit_layer_weights` on ID and OOD validation data.
+
     Args:
         eps (float): magnitude for gradient based input perturbation.
             Defaults to 0.02.
         output_layers_id (List[int]): feature space on which to compute mahalanobis
             distance. Defaults to [-2].
+        rank (Optional[int]): number of eigenvectors of the low-rank plus diagonal
+            covariance model. If None, the full covariance matrix is used.
+            Defaults to None.
+        residual (str): residual of the low-rank covariance model, either
+            "isotropic" (mean of the discarded eigenvalues) or "diagonal"
+            (diagonal of the covariance not explained by the eigenvectors).
+            Defaults to "isotropic".
+        nearest_center (bool): if True, scores are computed with a nearest center
+            search in the whitened feature space. Defaults to False.
+        knn_backend (Union[str, KNNBackend, None]): backend of the nearest center
+            search, either "faiss", "numpy" or a `KNNBackend` instance (see
+            `utils.knn.get_knn_backend`). Defaults to None.
+        pooling (Optional[str]): reduction of the features to vectors, either
+            "flatten" or "gap" (global average pooling of 4D feature maps). If
+            None, "gap" when several output layers are used, else "flatten".
+            Defaults to None.
+        layer_weights (Optional[List[float]]): weights of the scores of the output
+            layers. If None, the score of each layer is divided by its feature
+            dimension (the expected squared mahalanobis distance of ID data).
+            Defaults to None.
     """
 
     def __init__(
         self,
         eps: float = 0.02,
         output_layers_id: List[int] = [-2],
+        rank: Optional[int] = None,
+        residual: str = "isotropic",
+        nearest_center: bool = False,
+        knn_backend: Union[str, KNNBackend, None] = None,
+        pooling: Optional[str] = None,
+        layer_weights: Optional[List[float]] = None,
     ):
         super(Mahalanobis, self).__init__(output_layers_id=output_layers_id)
+        if residual not in ["isotropic", "diagonal"]:
+            raise NotImplementedError(
+                'only "isotropic" and "diagonal" are available for argument '
+                '"residual"'
+            )
+        if pooling not in [None, "flatten", "gap"]:
+            raise NotImplementedError(
+                'only "flatten" and "gap" are available for argument "pooling"'
+            )
+        assert layer_weights is None or len(layer_weights) == len(
+            output_layers_id
+        ), "layer_weights must have one weight per output layer"
         self.eps = eps
+        self.rank = rank
+        self.residual = residual
+        self.nearest_center = nearest_center
+        self.knn_backend = get_knn_backend(knn_backend) if nearest_center else None
+        self.pooling = pooling or ("gap" if len(output_layers_id) > 1 else "flatten")
+        self.layer_weights = layer_weights
+        # statistics of each output layer, when there are several ones
+        self._layer_models = None
+        self._labels_indexes = list()
+        self._mus = dict()
+        self._counts = dict()
+        self._reset_scatter()
 
     def _fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
         """
-        Constructs the mean covariance matrix from ID data "fit_dataset", whose
-        pseudo-inverse will be used for mahalanobis distance computation.
+        Constructs the class centers and the pooled within-class covariance matrix
+        from ID data "fit_dataset", whose pseudo-inverse will be used for mahalanobis
+        distance computation.
 
         Args:
             fit_dataset (Union[TensorType, DatasetType]): input dataset (ID)
         """
-        # Store feature sets by label
-        features_by_label = dict()
-        for batch in fit_dataset:
-            images, labels = batch
-            # if one hot encoded labels, take the argmax
-            if len(labels.shape) > 1 and labels.shape[1] > 1:
-                labels = self.op.argmax(labels.reshape(labels.shape[0], -1), 1)
-            labels = self.op.convert_to_numpy(labels)
+        self._labels_indexes = list()
+        self._mus = dict()
+        self._counts = dict()
+        self._reset_scatter()
+        self._layer_models = None
+        self._partial_fit_to_dataset(fit_dataset)
+
+    def _reset_scatter(self) -> None:
+        """Empties the pooled scatter statistics"""
+        # full scatter matrix, or sketch S @ omega of the scatter matrix S with a
+        # gaussian test matrix omega and diagonal of S for the low-rank model
+        self._scatter = None
+        self._sketch = None
+        self._test_matrix = None
+        self._scatter_diag = None
+        self._precision_arrays = None
+        self._whitening = None
+        self._invalidate_params()
+
+    def _partial_fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Updates the per-class counts and centers and the pooled within-class scatter
+        matrix (or its sketch) with ID data "fit_dataset", using Chan et al.
+        pairwise merges. The precision is lazily recomputed at the next scoring.
+        With several output layers, the statistics of every layer are updated from
+        the same forward.
 
-            # extract features
+        Args:
+            fit_dataset (Union[TensorType, DatasetType]): additional ID data
+        """
+        if len(self.output_layers_id) > 1 and self._layer_models is None:
+            self._layer_models = [
+                self._new_layer_model(layer_id) for layer_id in self.output_layers_id
+            ]
+        for images, labels in self._iterate_labeled_batches(fit_dataset):
             features = self.feature_extractor.predict(images)
+            if self._layer_models is None:
+                self._update_statistics(features, labels)
+                continue
+            for layer_model, layer_features in zip(self._layer_models, features):
+                layer_model._update_statistics(layer_features, labels)
+
+    def _new_layer_model(self, layer_id: Union[int, str]) -> "Mahalanobis":
+        """
+        Creates the single layer Mahalanobis holding the statistics of an output
+        layer, sharing the operator of self.
+
+        Args:
+            layer_id (Union[int, str]): output layer
+
+        Returns:
+            Mahalanobis: single layer Mahalanobis
+        """
+        layer_model = Mahalanobis(
+            eps=self.eps,
+            output_layers_id=[layer_id],
+            rank=self.rank,
+            residual=self.residual,
+            nearest_center=self.nearest_center,
+            knn_backend=self.knn_backend,
+            pooling=self.pooling,
+        )
+        layer_model.op = self.op
+        layer_model.backend = self.backend
+        layer_model._dtype_policy = self._dtype_policy
+        return layer_model
+
+    def _update_statistics(self, features: TensorType, labels: np.ndarray) -> None:
+        """
+        Merges the features of a batch of ID data into the per-class counts and
+        centers and the pooled scatter statistics.
+
+        Args:
+            features (TensorType): features of the batch
+            labels (np.ndarray): labels of the batch
+        """
+        features = self.op.convert_to_numpy(self._pool(features))
+        features = features.astype(self.fit_dtype)
+
+        # merge the statistics of the batch into the per class statistics
+        for lbl in np.unique(labels):
+            _feat = features[labels == lbl]
+            n_b = _feat.shape[0]
+            mu_b = np.mean(_feat, axis=0)
+            self._add_to_scatter(_feat - mu_b)
+            if lbl not in self._counts.keys():
+                self._labels_indexes.append(lbl)
+                self._counts[lbl] = n_b
+                self._mus[lbl] = mu_b
+                continue
+            n_a = self._counts[lbl]
+            delta = mu_b - self._mus[lbl]
+            self._add_to_scatter(delta[None], n_a * n_b / (n_a + n_b))
+            self._mus[lbl] = self._mus[lbl] + delta * n_b / (n_a + n_b)
+            self._counts[lbl] = n_a + n_b
+
+        # invalidate the precision
+        self._precision_arrays = None
+        self._whitening = None
+        self._invalidate_params()
+
+    def _pool(self, features: TensorType) -> TensorType:
+        """
+        Reduces the features to vectors on-device, with a global average pooling of
+        4D feature maps if `pooling` is "gap".
+
+        Args:
+            features (TensorType): features
+
+        Returns:
+            TensorType: features, of shape (n, D)
+        """
+        if self.pooling == "gap" and len(features.shape) == 4:
+            # channels first for torch models and ONNX graphs
+            spatial_dims = [2, 3] if self.backend in ["torch", "onnx"] else [1, 2]
+            features = self.op.mean(features, dim=spatial_dims)
+        return self.op.flatten(features)
+
+    def _add_to_scatter(self, vectors: np.ndarray, weight: float = 1.0) -> None:
+        """
+        Adds `weight * vectors.T @ vectors` to the pooled scatter matrix, or to its
+        sketch and diagonal for the low-rank covariance model.
+
+        Args:
+            vectors (np.ndarray): centered vectors, of shape (n, D)
+            weight (float): weight of the vectors. Defaults to 1.
+        """
+        dim = vectors.shape[1]
+        if self.rank is None:
+            if self._scatter is None:
+                self._scatter = np.zeros((dim, dim), dtype=self.fit_dtype)
+            self._scatter += weight * np.matmul(vectors.T, vectors)
+            return
+        if self._sketch is None:
+            sketch_size = min(2 * self.rank + 10, dim)
+            self._test_matrix = np.random.default_rng().standard_normal(
+                (dim, sketch_size), dtype=self.fit_dtype
+            )
+            self._sketch = np.zeros((dim, sketch_size), dtype=self.fit_dtype)
+            self._scatter_diag = np.zeros(dim, dtype=self.fit_dtype)
+        self._sketch += weight * np.matmul(
+            vectors.T, np.matmul(vectors, self._test_matrix)
+        )
+        self._scatter_diag += weight * np.sum(vectors**2, axis=0)
+
+    def _get_precision_arrays(self) -> List[np.ndarray]:
+        """
+        Precision of the pooled within-class covariance model in the fit dtype,
+        recomputed only if the statistics were updated since the last call: the
+        pseudo-inverse of the covariance matrix for the full model, or the factors
+        (inv_diag, woodbury) such that the precision is
+        `diag(inv_diag) - woodbury @ woodbury.T` for the low-rank model.
+
+        Returns:
+            List[np.ndarray]: precision matrix, or factors of the precision
+        """
+        if self._precision_arrays is None:
+            n_samples = sum(self._counts.values())
+            if self.rank is None:
+                self._precision_arrays = [
+                    linalg.pinvh(self._scatter / n_samples, check_finite=False)
+                ]
+            else:
+                self._precision_arrays = self._low_rank_precision(n_samples)
+        return self._precision_arrays
+
+    def _get_precision(self) -> Tuple[TensorType, ...]:
+        """
+        Precision (or factors of the precision) on the device, in the score dtype.
+
+        Returns:
+            Tuple[TensorType, ...]: precision matrix, or factors of the precision
+        """
+        return tuple(
+            self._get_param(
+                f"precision_{i}", lambda i=i: self._get_precision_arrays()[i]
+            )
+            for i in range(1 if self.rank is None else 2)
+        )
+
+    def _get_mus(self) -> TensorType:
+        """
+        Class centers on the device, in the order of the class labels.
+
+        Returns:
+            TensorType: class centers, of shape (n_classes, D)
+        """
+        return self._get_param(
+            "mus", lambda: np.stack([self._mus[lbl] for lbl in self._labels_indexes])
+        )
+
+    def _get_whitened_mus(self) -> TensorType:
+        """
+        Whitened class centers on the device, in the order of the class labels.
+
+        Returns:
+            TensorType: whitened class centers, of shape (n_classes, D')
+        """
+        return self._get_param("whitened_mus", lambda: self._get_whitening()[1])
+
+    def _load_params(self) -> None:
+        """Converts the fitted state to device tensors ahead of the scoring, so that
+        it is not done while computing the input perturbation gradients."""
+        self._get_precision()
+        self._get_mus()
+        if self.nearest_center or self._scores_whitened:
+            self._get_whitening()
+            self._get_whitened_mus()
+
+    def _get_whitening(self) -> Tuple[Tuple[TensorType, ...], np.ndarray]:
+        """
+        Factorization `F @ F.T` of the precision and whitened class centers
+        `(mu - c) @ F`, recomputed only if the statistics were updated since the
+        last call. The features are centered on the mean c of the class centers,
+        which leaves the distances unchanged but limits the cancellations of their
+        float32 computation. For the full model, F is the square root of the
+        precision restricted to its range (from its eigendecomposition, rather than
+        a Cholesky factor, the precision being only positive semi-definite). For
+        the low-rank model,
+        `F = diag(s) @ (I - B @ B.T)` with `s = sqrt(1 / d)` and B of shape
+        (D, rank), so that whitening also costs O(D * rank) per sample.
+
+        Returns:
+            Tuple[Tuple[TensorType, ...], np.ndarray]: whitening factors (c first),
+                and whitened class centers in the order of the class labels
+        """
+        if self._whitening is None:
+            precision = self._get_precision_arrays()
+            if self.rank is None:
+                eigvals, eigvecs = linalg.eigh(precision[0], check_finite=False)
+                kept = eigvals > eigvals[-1] * len(eigvals) * np.finfo(np.float32).eps
+                factors = [eigvecs[:, kept] * np.sqrt(eigvals[kept])]
+            else:
+                # diag(1 / d) - W @ W.T = S @ (I - H @ H.T) @ S, H = inv(S) @ W,
+                # whose square root is I - Q @ E @ diag(1 - sqrt(1 - m)) @ E.T @ Q.T
+                # with H = Q @ R and R @ R.T = E @ diag(m) @ E.T
+                inv_diag, woodbury = precision
+                scale = np.sqrt(inv_diag)
+                q, r = linalg.qr(woodbury / scale[:, None], mode="economic")
+                m, e = linalg.eigh(np.matmul(r, r.T))
+                m = np.clip(m, 0, 1)
+                factors = [scale, np.matmul(q, e) * np.sqrt(1 - np.sqrt(1 - m))]
+            mus = np.stack([self._mus[lbl] for lbl in self._labels_indexes])
+            factors = [np.mean(mus, axis=0)] + factors
+            # the centers are whitened in the fit dtype
+            whitened_mus = self._whiten(
+                self.op.from_numpy(mus, self.fit_dtype),
+                tuple(self.op.from_numpy(f, self.fit_dtype) for f in factors),
+            )
+            whitened_mus = self.op.convert_to_numpy(whitened_mus)
+            self._whitening = (factors, whitened_mus)
+        factors, whitened_mus = self._whitening
+        factors = tuple(
+            self._get_param(f"whitening_{i}", lambda f=f: f)
+            for i, f in enumerate(factors)
+        )
+        return factors, whitened_mus
+
+    def _whiten(
+        self, features: TensorType, factors: Tuple[TensorType, ...]
+    ) -> TensorType:
+        """
+        Whitens the features with the factorization of the precision.
+
+        Args:
+            features (TensorType): flattened features
+            factors (Tuple[TensorType, ...]): whitening factors
+
+        Returns:
+            TensorType: whitened features
+        """
+        features = features - factors[0]
+        if self.rank is None:
+            return self.op.matmul(features, factors[1])
+        _, scale, basis = factors
+        features = features * scale
+        return features - self.op.matmul(
+            self.op.matmul(features, basis), self.op.transpose(basis)
+        )
+
+    def _low_rank_precision(self, n_samples: int) -> List[np.ndarray]:
+        """
+        Estimates the top eigenpairs of the covariance matrix from its sketch
+        (single-pass Nystrom approximation, Tropp et al. 2017), models the
+        covariance as `V @ diag(a) @ V.T + diag(d)` and factorizes its inverse with
+        the Woodbury identity:
+        `inv(C) = diag(1 / d) - W @ W.T`, `W = diag(1 / d) @ V @ diag(sqrt(a)) @
+        inv(L.T)` with `L @ L.T = I + diag(sqrt(a)) @ V.T @ diag(1 / d) @ V @
+        diag(sqrt(a))`.
+
+        Args:
+            n_samples (int): number of fit samples
 
-            # store features by label
-            for lbl in labels:
-                if lbl not in features_by_label.keys():
-                    features_by_label[lbl] = list()
-                _feat_np = self.op.convert_to_numpy(features[labels == lbl])
-                _feat_np = _feat_np.reshape(_feat_np.shape[0], -1)
-                features_by_label[lbl].append(_feat_np)
-        for lbl in features_by_label.keys():
-            features_by_label[lbl] = np.vstack(features_by_label[lbl])
-
-        # store labels indexes
-        self._labels_indexes = list(features_by_label.keys())
-
-        # compute centered covariances cond. to each class distribution
-        mus = dict()
-        covs = dict()
-        for lbl in self._labels_indexes:
-            ss = preprocessing.StandardScaler(with_mean=True, with_std=False)
-            ss.fit(features_by_label[lbl])
-
-            ec = covariance.EmpiricalCovariance(assume_centered=True)
-            ec.fit(ss.transform(features_by_label[lbl]))
-
-            mus[lbl] = ss.mean_
-            covs[lbl] = ec.covariance_
-
-        # Take the mean of the per class covariances
-        mean_covariance = covariance.EmpiricalCovariance(assume_centered=True)
-        mean_covariance._set_covariance(
-            np.mean(np.stack(list(covs.values()), axis=0), axis=0)
+        Returns:
+            List[np.ndarray]: inverse residual diagonal 1 / d and woodbury factor W
+        """
+        sketch = self._sketch / n_samples
+        diag = self._scatter_diag / n_samples
+        dim = len(diag)
+
+        # stabilized Nystrom approximation of the covariance matrix
+        shift = np.finfo(sketch.dtype).eps * dim * np.linalg.norm(sketch, 2)
+        sketch_shifted = sketch + shift * self._test_matrix
+        core = np.matmul(self._test_matrix.T, sketch_shifted)
+        chol = linalg.cholesky((core + core.T) / 2, lower=True)
+        factor = linalg.solve_triangular(chol, sketch_shifted.T, lower=True).T
+        eigvecs, singular_values, _ = linalg.svd(factor, full_matrices=False)
+        rank = min(self.rank, len(singular_values), dim - 1)
+        eigvals = np.maximum(singular_values[:rank] ** 2 - shift, 0)
+        eigvecs = eigvecs[:, :rank]
+
+        floor = 1e-6 * np.mean(diag)
+        if self.residual == "isotropic":
+            # probabilistic PCA: mean of the discarded eigenvalues
+            sigma2 = max((np.sum(diag) - np.sum(eigvals)) / (dim - rank), floor)
+            residual_diag = np.full(dim, sigma2)
+            eigvals = np.maximum(eigvals - sigma2, 0)
+        else:
+            residual_diag = np.maximum(diag - np.sum(eigvecs**2 * eigvals, 1), floor)
+
+        inv_diag = 1 / residual_diag
+        scaled = eigvecs * np.sqrt(eigvals)
+        chol = linalg.cholesky(
+            np.eye(rank) + np.matmul(scaled.T * inv_diag, scaled), lower=True
         )
+        woodbury = linalg.solve_triangular(
+            chol, (scaled * inv_diag[:, None]).T, lower=True
+        ).T
+        return [inv_diag, woodbury]
 
-        # store centers and pseudo inverse of mean covariance matrix
-        self._mus = mus
-        self._pinv_cov = self.op.from_numpy(mean_covariance.precision_)
+    def _get_fitted_state(self) -> dict:
+        """
+        Fitted state: class labels, counts and centers, pooled scatter matrix (or
+        its sketch and diagonal) and precision (or its factors), prefixed by
+        `layer_{i}_` for each output layer when there are several ones.
+
+        Returns:
+            dict: fitted state
+        """
+        if self._layer_models is not None:
+            state = {"n_layers": len(self._layer_models)}
+            if self.layer_weights is not None:
+                state["layer_weights"] = [float(w) for w in self.layer_weights]
+            for i, layer_model in enumerate(self._layer_models):
+                for name, value in layer_model._get_fitted_state().items():
+                    state[f"layer_{i}_{name}"] = value
+            return state
+
+        state = {
+            "labels": np.array(self._labels_indexes),
+            "counts": np.array([self._counts[lbl] for lbl in self._labels_indexes]),
+            "mus": np.stack([self._mus[lbl] for lbl in self._labels_indexes]),
+        }
+        precision = self._get_precision_arrays()
+        if self.rank is None:
+            state["scatter"] = self._scatter
+            state["pinv_cov"] = precision[0]
+        else:
+            state["rank"] = int(self.rank)
+            state["residual"] = self.residual
+            state["sketch"] = self._sketch
+            state["test_matrix"] = self._test_matrix
+            state["scatter_diag"] = self._scatter_diag
+            state["inv_diag"], state["woodbury"] = precision
+        return state
+
+    def _set_fitted_state(self, state: dict) -> None:
+        """
+        Restores the fitted state returned by `_get_fitted_state`.
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+        Args:
+            state (dict): fitted state
+        """
+        if "n_layers" in state.keys():
+            self.layer_weights = state.get("layer_weights")
+            self._layer_models = []
+            for i, layer_id in enumerate(self.output_layers_id):
+                layer_model = self._new_layer_model(layer_id)
+                prefix = f"layer_{i}_"
+                layer_model._set_fitted_state(
+                    {
+                        name[len(prefix) :]: value
+                        for name, value in state.items()
+                        if name.startswith(prefix)
+                    }
+                )
+                self._layer_models.append(layer_model)
+            return
+
+        self._labels_indexes = list(state["labels"])
+        self._counts = dict(zip(self._labels_indexes, np.array(state["counts"])))
+        self._mus = dict(zip(self._labels_indexes, np.array(state["mus"])))
+        self._reset_scatter()
+        if "sketch" in state.keys():
+            self.rank = state["rank"]
+            self.residual = state["residual"]
+            self._sketch = np.array(state["sketch"])
+            self._test_matrix = np.array(state["test_matrix"])
+            self._scatter_diag = np.array(state["scatter_diag"])
+            precision = [state["inv_diag"], state["woodbury"]]
+        else:
+            self.rank = None
+            self._scatter = np.array(state["scatter"])
+            precision = [state["pinv_cov"]]
+        self._precision_arrays = [np.array(p) for p in precision]
+
+    @property
+    def _has_device_scores(self) -> bool:
+        return self._layer_models is None and not self.nearest_center
+
+    @property
+    def _has_input_perturbation(self) -> bool:
+        return self.eps > 0
+
+    def _prepare_scoring(self) -> None:
+        """Refreshes the precision of each output layer and loads it on the device,
+        outside of the input perturbation gradient computation."""
+        for layer_model in self._layer_models or [self]:
+            layer_model._load_params()
+
+    def _forward(self, inputs: TensorType) -> TensorType:
         """
-        Computes an OOD score for input samples "inputs" based on the mahalanobis
-        distance with respect to the closest class-conditional Gaussian distribution.
+        Computes the features of the (perturbed) input samples.
 
         Args:
             inputs (TensorType): input samples
 
         Returns:
-            np.ndarray: ood scores
+            TensorType: features of the perturbed inputs
         """
         # input preprocessing (perturbation)
+        inputs_p = inputs
         if self.eps > 0:
             inputs_p = self._input_perturbation(inputs)
 
+        return self.feature_extractor.predict(inputs_p)
+
+    def _score_features_device(self, features_p: TensorType) -> Any:
+        """
+        Computes the mahalanobis score of the features with respect to the closest
+        class-conditional Gaussian distribution, or the whitened features if the
+        closest center is searched on the host (`nearest_center`).
+
+        Args:
+            features_p (TensorType): features of the perturbed inputs
+
+        Returns:
+            Any: scores or whitened features, or a list of them for each output
+                layer
+        """
+        if self._layer_models is not None:
+            return [
+                layer_model._score_features_device(layer_features)
+                for layer_model, layer_features in zip(self._layer_models, features_p)
+            ]
+
         # mahalanobis score on perturbed inputs
-        features_p = self.feature_extractor.predict(inputs_p)
-        features_p = self.op.flatten(features_p)
+        features_p = self._pool(features_p)
+        if self.nearest_center:
+            factors, _ = self._get_whitening()
+            return self._whiten(features_p, factors)
         gaussian_score_p = self._mahalanobis_score(features_p)
 
         # take the highest score for each sample
-        gaussian_score_p = self.op.max(gaussian_score_p, dim=1)
-        return -self.op.convert_to_numpy(gaussian_score_p)
+        return -self.op.max(gaussian_score_p, dim=1)
+
+    def _score_features_host(self, outputs: Any) -> np.ndarray:
+        """
+        Searches the closest whitened class center (`nearest_center`), and weights
+        the scores of the output layers. The kNN backends search in float32, so the
+        distance to the closest center is then computed again in the score dtype.
+
+        Args:
+            outputs (Any): output of `_score_features_device`
+
+        Returns:
+            np.ndarray: ood scores
+        """
+        if self._layer_models is not None:
+            return np.matmul(self._layer_scores(outputs), self._get_layer_weights())
+        if self.nearest_center:
+            _, whitened_mus = self._get_whitening()
+            whitened_features = self.op.convert_to_numpy(outputs)
+            _, nearest = self.knn_backend.knn(whitened_features, whitened_mus, 1)
+            dtype = np.promote_types(whitened_features.dtype, np.float32)
+            residuals = whitened_features.astype(dtype) - whitened_mus[
+                nearest[:, 0]
+            ].astype(dtype)
+            return 0.5 * np.sum(residuals**2, axis=1)
+        return self.op.convert_to_numpy(outputs)
 
     def _input_perturbation(self, inputs: TensorType) -> TensorType:
         """
@@ -158,11 +657,15 @@ class Mahalanobis(OODModel):
             """
             # extract features
             _out_features = self.feature_extractor.predict(inputs, detach=False)
-            _out_features = self.op.flatten(_out_features)
-            # get mahalanobis score for the class maximizing it
-            gaussian_score = self._mahalanobis_score(_out_features)
-            pure_gau = self.op.max(gaussian_score, dim=1)
-            return self.op.mean(-pure_gau)
+            if self._layer_models is None:
+                return self._perturbation_loss(_out_features)
+            # weighted loss of the output layers, for a single backward
+            return sum(
+                float(weight) * layer_model._perturbation_loss(layer_features)
+                for weight, layer_model, layer_features in zip(
+                    self._get_layer_weights(), self._layer_models, _out_features
+                )
+            )
 
         # compute gradient
         gradient = self.op.gradient(__loss_fn, inputs)
@@ -171,6 +674,129 @@ class Mahalanobis(OODModel):
         inputs_p = inputs - self.eps * gradient
         return inputs_p
 
+    def _perturbation_loss(self, out_features: TensorType) -> TensorType:
+        """
+        Loss of the input perturbation: mean mahalanobis score of the features for
+        the class maximizing it.
+
+        Args:
+            out_features (TensorType): features of the input samples
+
+        Returns:
+            TensorType: loss
+        """
+        out_features = self._pool(out_features)
+        if self.nearest_center:
+            gaussian_score = self._whitened_distances(out_features) * -0.5
+        else:
+            gaussian_score = self._mahalanobis_score(out_features)
+        pure_gau = self.op.max(gaussian_score, dim=1)
+        return self.op.mean(-pure_gau)
+
+    def _layer_scores(self, outputs: List[Any]) -> np.ndarray:
+        """
+        Computes the mahalanobis score of each output layer.
+
+        Args:
+            outputs (List[Any]): output of `_score_features_device` for each
+                output layer
+
+        Returns:
+            np.ndarray: scores, of shape (n_samples, n_layers)
+        """
+        return np.stack(
+            [
+                layer_model._score_features_host(layer_outputs)
+                for layer_model, layer_outputs in zip(self._layer_models, outputs)
+            ],
+            axis=1,
+        )
+
+    def _get_layer_weights(self) -> np.ndarray:
+        """
+        Weights of the scores of the output layers: the given (or learned) ones, or
+        the inverse of the feature dimension of each layer.
+
+        Returns:
+            np.ndarray: weights
+        """
+        if self.layer_weights is not None:
+            return np.array(self.layer_weights, dtype=np.float64)
+        return np.array(
+            [
+                1 / len(layer_model._mus[layer_model._labels_indexes[0]])
+                for layer_model in self._layer_models
+            ]
+        )
+
+    def fit_layer_weights(
+        self,
+        id_dataset: Union[TensorType, DatasetType],
+        ood_dataset: Union[TensorType, DatasetType],
+    ) -> np.ndarray:
+        """
+        Learns the weights of the scores of the output layers with a logistic
+        regression discriminating ID from OOD validation data, as in the original
+        paper.
+
+        Args:
+            id_dataset (Union[TensorType, DatasetType]): ID validation data
+            ood_dataset (Union[TensorType, DatasetType]): OOD validation data
+
+        Returns:
+            np.ndarray: learned weights
+        """
+        assert self._layer_models is not None, "Call .fit() with several output layers"
+        layer_scores = []
+        for dataset in [id_dataset, ood_dataset]:
+            items = dataset if isinstance(dataset, get_args(DatasetType)) else [dataset]
+            scores = []
+            for item in items:
+                tensor = self.data_handler.get_input_from_dataset_item(item)
+                scores.append(self._layer_scores(self._forward_device(tensor)))
+            layer_scores.append(np.concatenate(scores))
+        inputs = np.concatenate(layer_scores)
+        targets = np.repeat([0, 1], [len(layer_scores[0]), len(layer_scores[1])])
+
+        # standardize the scores, then express the weights in raw score units
+        std = np.std(inputs, axis=0) + 1e-10
+        regression = LogisticRegression().fit(inputs / std, targets)
+        self.layer_weights = list(regression.coef_[0] / std)
+        # the weights of the perturbation loss are captured by the compiled scoring
+        self._invalidate_params()
+        return np.array(self.layer_weights)
+
+    def _whitened_distances(self, out_features: TensorType) -> TensorType:
+        """
+        Squared L2 distances between the whitened features and every whitened class
+        center, computed on-device with a single matrix product so that they can be
+        differentiated.
+
+        Args:
+            out_features (TensorType): test samples features
+
+        Returns:
+            TensorType: squared distances, of shape (n_samples, n_classes)
+        """
+        factors, _ = self._get_whitening()
+        whitened_features = self._whiten(out_features, factors)
+        whitened_mus = self._get_whitened_mus()
+        return (
+            self.op.sum(whitened_features**2, 1, keepdim=True)
+            - 2 * self.op.matmul(whitened_features, self.op.transpose(whitened_mus))
+            + self.op.reshape(self.op.sum(whitened_mus**2, 1), (1, -1))
+        )
+
+    @property
+    def _scores_whitened(self) -> bool:
+        """
+        Whether the per-class scores are computed from the whitened features (half
+        precision score dtypes): the precision overflows 16 bits formats when the
+        features are small, whereas the whitened features are of the order of the
+        square root of the mahalanobis distance.
+        """
+        return self.score_dtype in HALF_DTYPES
+
     def _mahalanobis_score(self, out_features: TensorType) -> TensorType:
         """
         Mahalanobis distance-based confidence score. For each test sample, it computes
@@ -184,10 +810,20 @@ class Mahalanobis(OODModel):
             TensorType: confidence scores (conditionally to each class)
         """
         gaussian_scores = list()
+        if self._scores_whitened:
+            factors, _ = self._get_whitening()
+            whitened_features = self._whiten(out_features, factors)
+            whitened_mus = self._get_whitened_mus()
+            for i in range(len(self._labels_indexes)):
+                zero_f = whitened_features - whitened_mus[i]
+                term_gau = -0.5 * self.op.sum(zero_f**2, 1)
+                gaussian_scores.append(self.op.reshape(term_gau, (-1, 1)))
+            return self.op.cat(gaussian_scores, 1)
+
         # compute scores conditionally to each class
-        for lbl in self._labels_indexes:
-            mus = self._get_mus_from_labels(lbl)
-            term_gau = self._log_prob_mahalanobis(out_features, mus)
+        mus = self._get_mus()
+        for i in range(len(self._labels_indexes)):
+            term_gau = self._log_prob_mahalanobis(out_features, mus[i])
             gaussian_scores.append(self.op.reshape(term_gau, (-1, 1)))
         # concatenate scores
         gaussian_score = self.op.cat(gaussian_scores, 1)
@@ -209,12 +845,14 @@ class Mahalanobis(OODModel):
             TensorType: log probability tensor
         """
         zero_f = features - mus
-        term_gau = -0.5 * self.op.diag(
-            self.op.matmul(
-                self.op.matmul(zero_f, self._pinv_cov), self.op.transpose(zero_f)
+        precision = self._get_precision()
+        if self.rank is None:
+            mahalanobis = self.op.sum(zero_f * self.op.matmul(zero_f, precision[0]), 1)
+        else:
+            # woodbury identity, in O(D * rank) per sample
+            inv_diag, woodbury = precision
+            mahalanobis = self.op.sum(zero_f * zero_f * inv_diag, 1) - self.op.sum(
+                self.op.matmul(zero_f, woodbury) ** 2, 1
             )
-        )
+        term_gau = -0.5 * mahalanobis
         return term_gau
-
-    def _get_mus_from_labels(self, lbl: int) -> TensorType:
-        return self.op.from_numpy(self._mus[lbl])
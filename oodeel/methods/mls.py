@@ -20,8 +20,6 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import numpy as np
-
 from ..types import TensorType
 from .base import OODModel
 
@@ -52,21 +50,29 @@ class MLS(OODModel):
         super().__init__(output_layers_id=[-1])
         self.output_activation = output_activation
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+    def _score_features_device(self, pred: TensorType) -> TensorType:
         """
-        Computes an OOD score for input samples "inputs" based on
-        the distance to nearest neighbors in the feature space of self.model
+        Computes the MLS (or MSS) scores from the logits "pred".
 
         Args:
-            inputs: input samples to score
+            pred: logits of the input samples
 
         Returns:
             scores
         """
-
-        pred = self.feature_extractor(inputs)
         if self.output_activation == "softmax":
             pred = self.op.softmax(pred)
-        pred = self.op.convert_to_numpy(pred)
-        scores = -np.max(pred, axis=1)
-        return scores
+        return -self.op.max(pred, dim=1)
+
+    def _export_logits(self, inputs: TensorType, features: TensorType) -> TensorType:
+        """
+        Logits output by the exported graph: the features of the oodmodel.
+
+        Args:
+            inputs (TensorType): input samples
+            features (TensorType): logits of the input samples
+
+        Returns:
+            TensorType: logits
+        """
+        return features
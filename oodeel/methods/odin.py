@@ -20,8 +20,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import numpy as np
-
+from ..types import Optional
 from ..types import TensorType
 from .base import OODModel
 
@@ -45,25 +44,55 @@ class ODIN(OODModel):
         super().__init__(output_layers_id=[-1])
         self.noise = noise
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+    def set_postprocessing_backend(self, backend: Optional[str] = "numpy") -> "ODIN":
+        """
+        ODIN perturbs its inputs with gradients computed in the model backend, its
+        post-processing cannot run on another backend.
+
+        Args:
+            backend (Optional[str]): only None (the model backend) is available
+
+        Returns:
+            ODIN: self
+        """
+        if backend is not None:
+            raise NotImplementedError(
+                "ODIN input perturbation requires the operator of the model backend"
+            )
+        return super().set_postprocessing_backend(backend)
+
+    @property
+    def _has_input_perturbation(self) -> bool:
+        return True
+
+    def _forward(self, inputs: TensorType) -> TensorType:
         """
-        Computes an OOD score for input samples "inputs" based on
-        the distance to nearest neighbors in the feature space of self.model
+        Computes the temperature scaled logits of the perturbed inputs.
 
         Args:
             inputs (TensorType): input samples to score
 
         Returns:
-            np.ndarray: scores
+            TensorType: scaled logits
         """
         if self.feature_extractor.backend == "torch":
             inputs = inputs.to(self.feature_extractor._device)
         x = self.input_perturbation(inputs)
         logits = self.feature_extractor.model(x) / self.temperature
+        return logits
+
+    def _score_features_device(self, logits: TensorType) -> TensorType:
+        """
+        Computes the ODIN scores from the scaled logits.
+
+        Args:
+            logits (TensorType): temperature scaled logits of the perturbed inputs
+
+        Returns:
+            TensorType: scores
+        """
         pred = self.op.softmax(logits)
-        pred = self.op.convert_to_numpy(pred)
-        scores = -np.max(pred, axis=1)
-        return scores
+        return -self.op.max(pred, dim=1)
 
     def input_perturbation(self, inputs: TensorType) -> TensorType:
         """Apply a small perturbation over inputs to increase their softmax score.
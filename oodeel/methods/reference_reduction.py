@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+
+from ..types import Optional
+from ..types import Union
+from ..utils.knn import _has_faiss
+
+if _has_faiss:
+    import faiss
+else:
+    from sklearn.cluster import KMeans
+
+REDUCTION_STRATEGIES = ["random", "kmeans", "kcenter", "dedup"]
+
+
+def reduce_references(
+    vectors: np.ndarray,
+    strategy: str,
+    size: Union[int, float] = 0.1,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """Reduces a set of reference vectors (of a single class) to a smaller set
+    covering the same region of the feature space.
+
+    Args:
+        vectors (np.ndarray): reference vectors, of shape (n, d)
+        strategy (str): reduction strategy, among:
+            * "random": uniform random subsampling
+            * "kmeans": k-means centroids (L2 normalized, as the vectors searched by
+              DKNN), computed with faiss if it is installed, else scikit-learn
+            * "kcenter": greedy k-center coreset, iteratively adding the vector the
+              farthest from the already selected ones
+            * "dedup": exact duplicates removal (size is ignored)
+        size (Union[int, float]): number of vectors to keep if an int, fraction of
+            the vectors to keep if a float. Defaults to 0.1.
+        seed (Optional[int]): random seed. Defaults to None.
+
+    Returns:
+        np.ndarray: reduced reference vectors
+    """
+    vectors = np.ascontiguousarray(vectors, np.float32)
+    n = vectors.shape[0]
+    if strategy == "dedup":
+        _, keep = np.unique(vectors, axis=0, return_index=True)
+        return vectors[np.sort(keep)]
+
+    if isinstance(size, float):
+        size = int(np.ceil(size * n))
+    size = max(min(size, n), 1)
+    if size == n:
+        return vectors
+
+    rng = np.random.default_rng(seed)
+    if strategy == "random":
+        return vectors[np.sort(rng.choice(n, size, replace=False))]
+
+    if strategy == "kmeans":
+        seed = int(rng.integers(2**31))
+        if _has_faiss:
+            kmeans = faiss.Kmeans(
+                vectors.shape[1], size, niter=20, seed=seed, min_points_per_centroid=1
+            )
+            kmeans.train(vectors)
+            centroids = kmeans.centroids
+        else:
+            kmeans = KMeans(size, n_init=1, max_iter=20, random_state=seed)
+            centroids = kmeans.fit(vectors).cluster_centers_.astype(np.float32)
+        return centroids / (
+            np.linalg.norm(centroids, ord=2, axis=-1, keepdims=True) + 1e-10
+        )
+
+    if strategy == "kcenter":
+        selected = [int(rng.integers(n))]
+        min_dists = np.sum((vectors - vectors[selected[0]]) ** 2, axis=-1)
+        for _ in range(size - 1):
+            selected.append(int(np.argmax(min_dists)))
+            min_dists = np.minimum(
+                min_dists, np.sum((vectors - vectors[selected[-1]]) ** 2, axis=-1)
+            )
+        return vectors[np.sort(selected)]
+
+    raise NotImplementedError(
+        f"only {REDUCTION_STRATEGIES} are available for argument 'strategy'"
+    )
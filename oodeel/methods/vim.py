@@ -25,12 +25,12 @@ import numpy as np
 from scipy.linalg import eigh
 from scipy.linalg import norm
 from scipy.linalg import pinv
-from scipy.special import logsumexp
 from sklearn.covariance import EmpiricalCovariance
 
 from ..types import DatasetType
 from ..types import List
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
 from .base import OODModel
 
@@ -99,6 +99,19 @@ class VIM(OODModel):
         self._princ_dim = princ_dims
         self.pca_origin = pca_origin
 
+    def _get_config(self) -> dict:
+        """
+        Arguments of the constructor of the oodmodel
+
+        Returns:
+            dict: constructor arguments
+        """
+        return {
+            "princ_dims": self._princ_dim,
+            "pca_origin": self.pca_origin,
+            "output_layers_id": self.output_layers_id,
+        }
+
     def _fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
         """
         Computes principal components of feature representations and store the residual
@@ -179,33 +192,167 @@ class VIM(OODModel):
             self.res_dim = self.feature_dim - self._princ_dim
 
         self.res = np.ascontiguousarray(eigen_vectors[:, : self.res_dim], np.float32)
+        self._basis_outdated = False
 
         # compute residual score on training data
         train_residual_scores = self._compute_residual_score_tensor(features_train)
         # compute MLS on training data
         train_mls_scores = np.max(logits_train, axis=-1)
         # compute scaling factor
-        self.alpha = np.mean(train_mls_scores) / np.mean(train_residual_scores)
+        self.alpha = float(np.mean(train_mls_scores) / np.mean(train_residual_scores))
+
+        # store the streaming statistics used by partial_fit
+        features_train = features_train.astype(self.fit_dtype)
+        self._n_samples = features_train.shape[0]
+        self._mean = np.mean(features_train, axis=0)
+        self._scatter = np.matmul(
+            (features_train - self._mean).T, features_train - self._mean
+        )
+        self._mls_sum = float(np.sum(train_mls_scores))
+        self._res_norm_sum = float(np.sum(train_residual_scores))
+
+    def _partial_fit_to_dataset(self, fit_dataset: Union[TensorType, DatasetType]):
+        """
+        Updates the mean and scatter matrix of the feature representations with ID
+        data "fit_dataset" using Chan et al. pairwise merges, as well as the scaling
+        factor :math:'\alpha'. The residual eigenvectors are lazily recomputed at the
+        next scoring, keeping the number of principal dimensions found by the first
+        fit. The residual norms of the new samples are computed with the residual
+        eigenvectors available at update time, previous samples are not projected
+        again.
+
+        Args:
+            fit_dataset: additional ID data
+        """
+        if not hasattr(self, "_n_samples"):
+            self._fit_to_dataset(fit_dataset)
+            return
+
+        features, logits = self.feature_extractor.predict(fit_dataset)
+        features = self.op.convert_to_numpy(features).astype(self.fit_dtype)
+        logits = self.op.convert_to_numpy(logits)
+
+        # update scaling factor
+        self._mls_sum += float(np.sum(np.max(logits, axis=-1)))
+        self._res_norm_sum += float(
+            np.sum(self._compute_residual_score_tensor(features))
+        )
+
+        # merge mean and scatter matrix
+        n_a, n_b = self._n_samples, features.shape[0]
+        mean_b = np.mean(features, axis=0)
+        delta = mean_b - self._mean
+        self._scatter += np.matmul((features - mean_b).T, features - mean_b)
+        self._scatter += np.outer(delta, delta) * n_a * n_b / (n_a + n_b)
+        self._mean = self._mean + delta * n_b / (n_a + n_b)
+        self._n_samples = n_a + n_b
+
+        self.alpha = float(self._mls_sum / self._res_norm_sum)
+        if self.pca_origin == "center":
+            self.center = self._mean
+        self._basis_outdated = True
+
+    def _update_residual_basis(self) -> None:
+        """
+        Recomputes the residual eigenvectors from the streaming statistics if they
+        were updated by partial_fit since the last computation.
+        """
+        if not self._basis_outdated:
+            return
+        # covariance matrix around the PCA origin
+        delta = self._mean - self.center
+        cov = self._scatter / self._n_samples + np.outer(delta, delta)
+        eig_vals, eigen_vectors = eigh(cov)
+        self.eigenvalues = eig_vals
+        self.res = np.ascontiguousarray(eigen_vectors[:, : self.res_dim], np.float32)
+        self._basis_outdated = False
+        self._invalidate_params()
+
+    def _get_fitted_state(self) -> dict:
+        """
+        Fitted state: PCA origin, residual basis, eigenvalues, scaling factor and
+        streaming statistics.
+
+        Returns:
+            dict: fitted state
+        """
+        self._update_residual_basis()
+        return {
+            "center": np.asarray(self.center),
+            "res": self.res,
+            "eigenvalues": np.asarray(self.eigenvalues),
+            "alpha": float(self.alpha),
+            "feature_dim": int(self.feature_dim),
+            "res_dim": int(self.res_dim),
+            "princ_dim": int(self._princ_dim),
+            "n_samples": int(self._n_samples),
+            "mean": self._mean,
+            "scatter": self._scatter,
+            "mls_sum": self._mls_sum,
+            "res_norm_sum": self._res_norm_sum,
+        }
+
+    def _set_fitted_state(self, state: dict) -> None:
+        """
+        Restores the fitted state returned by `_get_fitted_state`.
+
+        Args:
+            state (dict): fitted state
+        """
+        self.center = state["center"]
+        self.res = state["res"]
+        self.eigenvalues = state["eigenvalues"]
+        self.alpha = float(state["alpha"])
+        self.feature_dim = state["feature_dim"]
+        self.res_dim = state["res_dim"]
+        self._princ_dim = state["princ_dim"]
+        self._n_samples = state["n_samples"]
+        self._mean = np.array(state["mean"])
+        self._scatter = np.array(state["scatter"])
+        self._mls_sum = state["mls_sum"]
+        self._res_norm_sum = state["res_norm_sum"]
+        self._basis_outdated = False
 
     def _compute_residual_score_tensor(self, features: TensorType) -> TensorType:
         """
-        Computes the norm of the residual projection in the feature space.
+        Computes the norm of the residual projection in the feature space, with
+        NumPy, at fit time (see `_residual_norm` for the scoring).
 
         Args:
-            features: input samples to score
+            features: features of the fit samples, as a NumPy array
 
         Returns:
             scores
         """
         res_coordinates = np.matmul(features - self.center, self.res)
-        # res_coordinates = self.op.matmul(features - self.center, self.res)  # TODO
         # taking the norm of the coordinates, which amounts to the norm of
         # the projection since the eigenvectors form an orthornomal basis
         res_norm = norm(res_coordinates, axis=-1)
-        # res_norm = self.op.norm(res_coordinates, dim=-1)  # TODO
 
         return res_norm
 
+    def _prepare_scoring(self) -> None:
+        """Updates the residual basis if needed, and loads the PCA origin and the
+        residual basis on the device of the features."""
+        self._update_residual_basis()
+        self._get_param("center", lambda: np.asarray(self.center))
+        self._get_param("res", lambda: self.res)
+
+    def _residual_norm(self, features: TensorType) -> TensorType:
+        """
+        Computes the norm of the residual projection in the feature space, on the
+        device of the features.
+
+        Args:
+            features: features of the input samples
+
+        Returns:
+            residual norms
+        """
+        center = self._get_param("center", lambda: np.asarray(self.center))
+        res = self._get_param("res", lambda: self.res)
+        return self.op.norm(self.op.matmul(features - center, res), dim=-1)
+
     def _residual_score_tensor(self, inputs: TensorType) -> np.ndarray:
         """
         Computes the residual score for input samples "inputs".
@@ -219,31 +366,44 @@ class VIM(OODModel):
         assert self.feature_extractor is not None, "Call .fit() before .score()"
         # compute predicted features
 
+        self._prepare_scoring()
         features = self.feature_extractor.predict(inputs)[0]
-        res_scores = self._compute_residual_score_tensor(features)
+        res_scores = self._residual_norm(features)
         return self.op.convert_to_numpy(res_scores)
 
-    def _score_tensor(self, inputs: TensorType) -> np.ndarray:
+    def _score_features_device(
+        self, features: Tuple[TensorType, TensorType]
+    ) -> TensorType:
         """
-        Computes the VIM score for input samples "inputs" as the sum of the energy
-        score and a scaled (PCA) residual norm in the feature space.
+        Computes the VIM score from the features and logits of input samples, as
+        the sum of the energy score and a scaled (PCA) residual norm in the feature
+        space.
 
         Args:
-            inputs: input samples to score
+            features: features and logits of the input samples
 
         Returns:
             scores
         """
-        # compute predicted features
+        features, logits = features
+        res_scores = self._residual_norm(features)
+        energy_scores = self.op.logsumexp(logits, dim=-1)
+        return self.alpha * res_scores - energy_scores
 
-        features, logits = self.feature_extractor(inputs)
-        features = self.op.convert_to_numpy(features)
-        logits = self.op.convert_to_numpy(logits)
-        res_scores = self._compute_residual_score_tensor(features)
-        # res_scores = self.op.convert_to_numpy(res_scores)
-        energy_scores = logsumexp(logits, axis=-1)
-        scores = -self.alpha * res_scores + energy_scores
-        return -np.array(scores)
+    def _export_logits(
+        self, inputs: TensorType, features: Tuple[TensorType, TensorType]
+    ) -> TensorType:
+        """
+        Logits output by the exported graph: the logits used by the energy score.
+
+        Args:
+            inputs (TensorType): input samples
+            features: features and logits of the input samples
+
+        Returns:
+            TensorType: logits
+        """
+        return features[1]
 
     def plot_spectrum(self) -> None:
         """
@@ -26,6 +26,7 @@ from abc import abstractmethod
 from ..types import Any
 from ..types import Callable
 from ..types import List
+from ..types import Optional
 from ..types import Union
 
 
@@ -53,6 +54,9 @@ class FeatureExtractor(ABC):
         batch_size: batch_size used to compute the features space
             projection of input data.
             Defaults to 256.
+        dtype: dtype the features are cast to. If None, the features keep the
+            dtype of the model outputs.
+            Defaults to None.
     """
 
     def __init__(
@@ -60,12 +64,14 @@ class FeatureExtractor(ABC):
         model: Callable,
         output_layers_id: List[Union[int, str]] = [-1],
         input_layer_id: Union[int, str] = [0],
+        dtype: Optional[str] = None,
     ):
         if not isinstance(output_layers_id, list):
             output_layers_id = [output_layers_id]
 
         self.output_layers_id = output_layers_id
         self.input_layer_id = input_layer_id
+        self.dtype = dtype
         self.model = model
         self.extractor = self.prepare_extractor()
 
@@ -113,6 +119,31 @@ class FeatureExtractor(ABC):
         """
         raise NotImplementedError()
 
+    def export(
+        self,
+        func: Callable,
+        path: str,
+        example_inputs: Optional[Any] = None,
+        output_names: Optional[List[str]] = None,
+        export_format: Optional[str] = None,
+    ) -> None:
+        """
+        Exports "func", a function of a batch of input samples built on the model,
+        as a standalone inference graph.
+
+        Args:
+            func (Callable): function to export, returning a tuple of tensors
+            path (str): path of the exported graph
+            example_inputs (Optional[Any]): batch of input samples. Defaults to None.
+            output_names (Optional[List[str]]): names of the outputs of "func".
+                Defaults to None.
+            export_format (Optional[str]): format of the exported graph. Defaults to
+                None, for the default format of the backend.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support the export of the model"
+        )
+
     def __call__(self, inputs: Any) -> Any:
         """
         Choose to call predict or predict_tensor depending on the type of inputs
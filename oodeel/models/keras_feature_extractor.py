@@ -26,6 +26,7 @@ import tensorflow as tf
 from ..datasets.tf_data_handler import TFDataHandler
 from ..types import Callable
 from ..types import List
+from ..types import Optional
 from ..types import Tuple
 from ..types import Union
 from ..utils.tf_operator import sanitize_input
@@ -48,6 +49,9 @@ class KerasFeatureExtractor(FeatureExtractor):
             when working on the feature space without finetuning the bottom of the
             model).
             Defaults to None.
+        dtype: dtype the features are cast to. If None, the features keep the
+            dtype of the model outputs.
+            Defaults to None.
     """
 
     def __init__(
@@ -55,6 +59,7 @@ class KerasFeatureExtractor(FeatureExtractor):
         model: Callable,
         output_layers_id: List[Union[int, str]] = [-1],
         input_layer_id: Union[int, str] = None,
+        dtype: Optional[str] = None,
     ):
         if input_layer_id is None:
             input_layer_id = 0
@@ -62,6 +67,7 @@ class KerasFeatureExtractor(FeatureExtractor):
             model=model,
             output_layers_id=output_layers_id,
             input_layer_id=input_layer_id,
+            dtype=dtype,
         )
 
         self.backend = "tensorflow"
@@ -114,6 +120,8 @@ class KerasFeatureExtractor(FeatureExtractor):
             tf.Tensor: features
         """
         features = self.extractor(tensor, training=False)
+        if self.dtype is not None:
+            features = tf.nest.map_structure(lambda f: tf.cast(f, self.dtype), features)
         return features
 
     def predict(self, dataset: tf.data.Dataset, **kwargs) -> List[tf.Tensor]:
@@ -146,6 +154,53 @@ class KerasFeatureExtractor(FeatureExtractor):
             features = features[0]
         return features
 
+    def export(
+        self,
+        func: Callable,
+        path: str,
+        example_inputs: Optional[tf.Tensor] = None,
+        output_names: Optional[List[str]] = None,
+        export_format: Optional[str] = None,
+    ) -> None:
+        """
+        Exports "func", a function of a batch of input samples built on the model,
+        as a SavedModel whose "serving_default" signature takes a batch of any size
+        and returns a dictionary of the named outputs of "func".
+
+        Args:
+            func (Callable): function to export, returning a tuple of tensors
+            path (str): path of the exported graph
+            example_inputs (Optional[tf.Tensor]): batch of input samples, whose
+                shape and dtype set the input signature. Defaults to None, for the
+                input shape of the model.
+            output_names (Optional[List[str]]): names of the outputs of "func".
+                Defaults to None, for "output_0", "output_1", ...
+            export_format (Optional[str]): "saved_model". Defaults to None, for
+                "saved_model".
+        """
+        if (export_format or "saved_model") != "saved_model":
+            raise NotImplementedError(
+                f"Unknown export format {export_format} for keras models, use"
+                ' "saved_model"'
+            )
+        if example_inputs is not None:
+            example_inputs = tf.convert_to_tensor(example_inputs)
+            shape, dtype = example_inputs.shape[1:], example_inputs.dtype
+        else:
+            shape, dtype = self.model.inputs[0].shape[1:], self.model.inputs[0].dtype
+
+        def serve(inputs):
+            outputs = func(inputs)
+            names = output_names or [f"output_{i}" for i in range(len(outputs))]
+            return dict(zip(names, outputs))
+
+        module = tf.Module()
+        module.model = self.model
+        module.serve = tf.function(
+            serve, input_signature=[tf.TensorSpec([None, *shape], dtype, "inputs")]
+        )
+        tf.saved_model.save(module, path, signatures={"serving_default": module.serve})
+
     def get_weights(self, layer_id: Union[int, str]) -> List[tf.Tensor]:
         """Get the weights of a layer
 
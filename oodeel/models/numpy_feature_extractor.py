@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from typing import get_args
+
+import numpy as np
+
+from ..datasets.data_handler import DataHandler
+from ..types import Any
+from ..types import DatasetType
+from ..types import List
+from ..types import Optional
+from ..types import Union
+from ..utils.numpy_operator import NumpyOperator
+from .feature_extractor import FeatureExtractor
+
+
+class NumpyFeatureExtractor(FeatureExtractor):
+    """
+    Feature extractor returning NumPy arrays, so that the features are
+    post-processed with the NumPy operator whatever the model backend. It either
+    wraps the feature extractor of a keras or torch model and converts its
+    features, or, without feature extractor, is model-free: the inputs are then
+    the features themselves (a single array, or a list with one array per output
+    layer, 4D feature maps being channels last).
+
+    Args:
+        feature_extractor (Optional[FeatureExtractor]): feature extractor of the
+            model. If None, the feature extractor is model-free.
+            Defaults to None.
+        dtype: dtype the features are cast to. If None, the features keep their
+            dtype.
+            Defaults to None.
+    """
+
+    def __init__(
+        self,
+        feature_extractor: Optional[FeatureExtractor] = None,
+        dtype: Optional[str] = None,
+    ):
+        self.feature_extractor = feature_extractor
+        if feature_extractor is None:
+            super().__init__(model=None, input_layer_id=None, dtype=dtype)
+            self.backend = "numpy"
+        else:
+            super().__init__(
+                model=feature_extractor.model,
+                output_layers_id=feature_extractor.output_layers_id,
+                input_layer_id=feature_extractor.input_layer_id,
+                dtype=dtype,
+            )
+            self.backend = feature_extractor.backend
+
+    def __getattr__(self, name: str) -> Any:
+        # other attributes (e.g. the device) are those of the wrapped extractor
+        feature_extractor = self.__dict__.get("feature_extractor")
+        if feature_extractor is None:
+            raise AttributeError(name)
+        return getattr(feature_extractor, name)
+
+    def prepare_extractor(self) -> None:
+        """Nothing to prepare: the wrapped feature extractor (if any) already is"""
+        pass
+
+    def get_weights(self, layer_id: Union[str, int]) -> List[np.ndarray]:
+        """Get the weights of a layer of the wrapped model
+
+        Args:
+            layer_id (Union[int, str]): layer identifier
+
+        Returns:
+            List[np.ndarray]: weights and biases matrixes
+        """
+        if self.feature_extractor is None:
+            raise NotImplementedError("A model-free feature extractor has no weights")
+        return self.feature_extractor.get_weights(layer_id)
+
+    def predict_tensor(self, tensor: Any, **kwargs) -> Any:
+        """Get the features of tensor as NumPy arrays
+
+        Args:
+            tensor (Any): input tensor (features if model-free)
+            kwargs: forwarded to the wrapped feature extractor
+
+        Returns:
+            Any: features
+        """
+        if self.feature_extractor is not None:
+            tensor = self.feature_extractor.predict_tensor(tensor, **kwargs)
+        return self._to_numpy(tensor)
+
+    def predict(self, dataset: Any, **kwargs) -> Any:
+        """Get the features of a dataset as NumPy arrays
+
+        Args:
+            dataset (Any): input dataset (of features if model-free)
+            kwargs: forwarded to the wrapped feature extractor
+
+        Returns:
+            Any: features
+        """
+        if self.feature_extractor is not None:
+            return self._to_numpy(self.feature_extractor.predict(dataset, **kwargs))
+        if not isinstance(dataset, get_args(DatasetType)):
+            return self.predict_tensor(DataHandler.get_input_from_dataset_item(dataset))
+
+        batches = [
+            self.predict_tensor(DataHandler.get_input_from_dataset_item(elem))
+            for elem in dataset
+        ]
+        if isinstance(batches[0], list):
+            return [np.concatenate(features) for features in zip(*batches)]
+        return np.concatenate(batches)
+
+    def _to_numpy(self, features: Any) -> Any:
+        """Converts features (or a list of features) to NumPy arrays of self.dtype
+
+        Args:
+            features (Any): features
+
+        Returns:
+            Any: converted features
+        """
+        if isinstance(features, (list, tuple)):
+            return [self._to_numpy(f) for f in features]
+        features = NumpyOperator.convert_to_numpy(features)
+        if self.dtype is not None:
+            features = features.astype(self.dtype, copy=False)
+        return features
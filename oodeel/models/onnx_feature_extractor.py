@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+from typing import get_args
+
+import numpy as np
+
+from ..datasets.data_handler import DataHandler
+from ..types import Any
+from ..types import DatasetType
+from ..types import List
+from ..types import Optional
+from ..types import Union
+from ..utils.numpy_operator import NumpyOperator
+from .feature_extractor import FeatureExtractor
+
+try:
+    import onnx
+    import onnxruntime
+except ImportError:
+    _has_onnxruntime = False
+else:
+    _has_onnxruntime = True
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+ONNX_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(double)": np.float64,
+    "tensor(float16)": np.float16,
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+    "tensor(uint8)": np.uint8,
+}
+
+
+class OnnxModel:
+    """
+    ONNX model run with ONNX Runtime, e.g. for CPU inference. Calling it returns
+    the outputs of the graph as NumPy arrays.
+
+    Args:
+        model (Any): path of an ONNX file, serialized ONNX model, `onnx.ModelProto`
+            or `onnxruntime.InferenceSession`. Intermediate outputs can only be
+            extracted if the ONNX model itself is known, i.e. not for sessions
+            created from serialized models.
+        intra_op_num_threads (Optional[int]): number of threads used to
+            parallelize an operation. Defaults to None, for the ONNX Runtime
+            default.
+        inter_op_num_threads (Optional[int]): number of threads used to run
+            independent operations in parallel. Defaults to None, for the ONNX
+            Runtime default.
+        graph_optimization_level (Optional[str]): "disable", "basic", "extended"
+            or "all". Defaults to None, for the ONNX Runtime default ("all").
+        providers (Optional[List[str]]): execution providers. Defaults to None,
+            for the available ones.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        intra_op_num_threads: Optional[int] = None,
+        inter_op_num_threads: Optional[int] = None,
+        graph_optimization_level: Optional[str] = None,
+        providers: Optional[List[str]] = None,
+    ):
+        if not _has_onnxruntime:
+            raise ModuleNotFoundError(
+                "ONNX models require onnx and onnxruntime. Please run command "
+                "`pip install onnx onnxruntime`"
+            )
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        self.graph_optimization_level = graph_optimization_level
+        self.providers = providers or onnxruntime.get_available_providers()
+
+        if isinstance(model, onnxruntime.InferenceSession):
+            self.session = model
+            model_path = getattr(model, "_model_path", None)
+            self.proto = onnx.load(model_path) if model_path else None
+        else:
+            if isinstance(model, (str, os.PathLike)):
+                model = onnx.load(model)
+            elif isinstance(model, bytes):
+                model = onnx.load_from_string(model)
+            self.proto = model
+            self.session = self.create_session(model)
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_dtype = ONNX_DTYPES.get(self.session.get_inputs()[0].type)
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+    def create_session(self, proto: Any) -> Any:
+        """
+        Creates an inference session with the session options of the model.
+
+        Args:
+            proto (Any): ONNX model
+
+        Returns:
+            onnxruntime.InferenceSession: inference session
+        """
+        options = onnxruntime.SessionOptions()
+        if self.intra_op_num_threads is not None:
+            options.intra_op_num_threads = self.intra_op_num_threads
+        if self.inter_op_num_threads is not None:
+            options.inter_op_num_threads = self.inter_op_num_threads
+        if self.graph_optimization_level is not None:
+            options.graph_optimization_level = getattr(
+                onnxruntime.GraphOptimizationLevel,
+                GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization_level],
+            )
+        return onnxruntime.InferenceSession(
+            proto.SerializeToString(), sess_options=options, providers=self.providers
+        )
+
+    def with_outputs(self, names: List[str]) -> Any:
+        """
+        Inference session computing the tensors "names" in addition to the outputs
+        of the graph.
+
+        Args:
+            names (List[str]): names of the tensors
+
+        Returns:
+            onnxruntime.InferenceSession: inference session
+        """
+        missing = [name for name in names if name not in self.output_names]
+        if len(missing) == 0:
+            return self.session
+        if self.proto is None:
+            raise ValueError(
+                f"Intermediate outputs {missing} require the ONNX model, not only its"
+                " inference session"
+            )
+        proto = onnx.ModelProto()
+        proto.CopyFrom(self.proto)
+        for name in missing:
+            proto.graph.output.append(onnx.helper.make_empty_tensor_value_info(name))
+        return self.create_session(proto)
+
+    def prepare_inputs(self, inputs: Any) -> np.ndarray:
+        """
+        Converts inputs (NumPy arrays, torch or tensorflow tensors) to NumPy arrays
+        of the input dtype of the graph.
+
+        Args:
+            inputs (Any): input samples
+
+        Returns:
+            np.ndarray: converted inputs
+        """
+        inputs = NumpyOperator.convert_to_numpy(inputs)
+        if self.input_dtype is not None:
+            inputs = inputs.astype(self.input_dtype, copy=False)
+        return inputs
+
+    def __call__(self, inputs: Any) -> Union[np.ndarray, List[np.ndarray]]:
+        """
+        Runs the graph on input samples "inputs".
+
+        Args:
+            inputs (Any): input samples
+
+        Returns:
+            Union[np.ndarray, List[np.ndarray]]: output of the graph, or list of
+                outputs for graphs with several outputs
+        """
+        outputs = self.session.run(
+            self.output_names, {self.input_name: self.prepare_inputs(inputs)}
+        )
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    def get_weights(self) -> List[Any]:
+        """
+        Initializers (weights) of the graph.
+
+        Returns:
+            List[Tuple[str, np.ndarray]]: name and value of each initializer
+        """
+        if self.proto is None:
+            raise NotImplementedError(
+                "The weights of an ONNX model are only available with the model, not"
+                " only its inference session"
+            )
+        return [
+            (init.name, onnx.numpy_helper.to_array(init))
+            for init in self.proto.graph.initializer
+        ]
+
+
+class OnnxFeatureExtractor(FeatureExtractor):
+    """
+    Feature extractor based on an ONNX model run with ONNX Runtime, returning NumPy
+    arrays post-processed with the NumPy operator. The features can be the outputs
+    of any node of the graph, which are added to the outputs of the session. As
+    for the graphs exported from torch, 4D feature maps are channels first.
+
+    Args:
+        model: ONNX model (`OnnxModel`, to set the session options), or anything
+            `OnnxModel` accepts: path of an ONNX file, serialized ONNX model,
+            `onnx.ModelProto` or `onnxruntime.InferenceSession`.
+        output_layers_id: list of str or int that identify features to output.
+            If int, the rank of the node in the (topologically sorted) graph.
+            If str, the name of the node or of the tensor. Defaults to [-1].
+        input_layer_id: unused, the graph being run from its input.
+            Defaults to None.
+        dtype: dtype the features are cast to. If None, the features keep the
+            dtype of the graph outputs.
+            Defaults to None.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        output_layers_id: List[Union[int, str]] = [-1],
+        input_layer_id: Union[int, str] = None,
+        dtype: Optional[str] = None,
+    ):
+        if not isinstance(model, OnnxModel):
+            model = OnnxModel(model)
+        super().__init__(
+            model=model,
+            output_layers_id=output_layers_id,
+            input_layer_id=input_layer_id,
+            dtype=dtype,
+        )
+        self.backend = "onnx"
+
+    def find_layer(self, layer_id: Union[str, int]) -> str:
+        """Find the name of the tensor output by a node, given the node rank or
+        name, or of a tensor given its name.
+
+        Args:
+            layer_id (Union[str, int]): node or tensor identifier
+
+        Raises:
+            ValueError: if the node or tensor is not found
+
+        Returns:
+            str: name of the tensor
+        """
+        if isinstance(layer_id, str) and layer_id in self.model.output_names:
+            return layer_id
+        if self.model.proto is None:
+            raise ValueError(
+                f"Could not find the output {layer_id} of the inference session."
+            )
+        nodes = self.model.proto.graph.node
+        if isinstance(layer_id, int):
+            return nodes[layer_id].output[0]
+        for node in nodes:
+            if node.name == layer_id:
+                return node.output[0]
+            if layer_id in node.output:
+                return layer_id
+        raise ValueError(f"Could not find any node or tensor {layer_id}.")
+
+    def prepare_extractor(self) -> Any:
+        """Creates the inference session computing the features
+
+        Returns:
+            onnxruntime.InferenceSession: inference session
+        """
+        self.feature_names = [
+            self.find_layer(layer_id) for layer_id in self.output_layers_id
+        ]
+        return self.model.with_outputs(self.feature_names)
+
+    def predict_tensor(self, tensor: Any, **kwargs) -> Any:
+        """Get the projection of tensor in the feature space of self.model
+
+        Args:
+            tensor (Any): input tensor (or dataset elem)
+            kwargs: additional arguments not considered for prediction
+
+        Returns:
+            Any: features
+        """
+        features = self.extractor.run(
+            self.feature_names,
+            {self.model.input_name: self.model.prepare_inputs(tensor)},
+        )
+        if self.dtype is not None:
+            features = [f.astype(self.dtype, copy=False) for f in features]
+        if len(features) == 1:
+            features = features[0]
+        return features
+
+    def predict(self, dataset: Any, **kwargs) -> Any:
+        """Get the projection of the dataset in the feature space of self.model
+
+        Args:
+            dataset (Any): input dataset
+            kwargs: additional arguments not considered for prediction
+
+        Returns:
+            Any: features
+        """
+        if not isinstance(dataset, get_args(DatasetType)):
+            return self.predict_tensor(DataHandler.get_input_from_dataset_item(dataset))
+
+        batches = [
+            self.predict_tensor(DataHandler.get_input_from_dataset_item(elem))
+            for elem in dataset
+        ]
+        if isinstance(batches[0], list):
+            return [np.concatenate(features) for features in zip(*batches)]
+        return np.concatenate(batches)
+
+    def get_weights(self, layer_id: Union[str, int]) -> List[np.ndarray]:
+        """Get the weights of a node, i.e. its initializer inputs
+
+        Args:
+            layer_id (Union[int, str]): rank or name of the node
+
+        Returns:
+            List[np.ndarray]: weights and biases matrixes
+        """
+        nodes = self.model.proto.graph.node
+        if isinstance(layer_id, int):
+            node = nodes[layer_id]
+        else:
+            node = next(node for node in nodes if node.name == layer_id)
+        weights = dict(self.model.get_weights())
+        return [weights[name] for name in node.input if name in weights]
@@ -20,6 +20,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import warnings
 from typing import get_args
 
 import torch
@@ -30,7 +31,9 @@ from ..datasets.torch_data_handler import TorchDataHandler
 from ..types import Callable
 from ..types import DatasetType
 from ..types import List
+from ..types import Optional
 from ..types import Union
+from ..utils.torch_operator import FunctionModule
 from ..utils.torch_operator import sanitize_input
 from .feature_extractor import FeatureExtractor
 
@@ -51,6 +54,9 @@ class TorchFeatureExtractor(FeatureExtractor):
             when working on the feature space without finetuning the bottom of
             the model).
             Defaults to None.
+        dtype: dtype the features are cast to. If None, the features keep the
+            dtype of the model outputs.
+            Defaults to None.
     """
 
     def __init__(
@@ -58,12 +64,14 @@ class TorchFeatureExtractor(FeatureExtractor):
         model: nn.Module,
         output_layers_id: List[Union[int, str]] = [],
         input_layer_id: Union[int, str] = None,
+        dtype: Optional[str] = None,
     ):
         model = model.eval()
         super().__init__(
             model=model,
             output_layers_id=output_layers_id,
             input_layer_id=input_layer_id,
+            dtype=dtype,
         )
         self._device = next(model.parameters()).device
         self._features = {layer: torch.empty(0) for layer in self.output_layers_id}
@@ -164,6 +172,8 @@ class TorchFeatureExtractor(FeatureExtractor):
             ]
         else:
             features = [self._features[layer_id] for layer_id in self.output_layers_id]
+        if self.dtype is not None:
+            features = [f.to(getattr(torch, self.dtype)) for f in features]
 
         if len(features) == 1:
             features = features[0]
@@ -206,6 +216,57 @@ class TorchFeatureExtractor(FeatureExtractor):
             features = features[0]
         return features
 
+    def export(
+        self,
+        func: Callable,
+        path: str,
+        example_inputs: Optional[torch.Tensor] = None,
+        output_names: Optional[List[str]] = None,
+        export_format: Optional[str] = None,
+    ) -> None:
+        """
+        Exports "func", a function of a batch of input samples built on the model,
+        traced on "example_inputs" with a dynamic batch size, as a TorchScript
+        module ("torchscript", the default) or an ONNX graph ("onnx").
+
+        Args:
+            func (Callable): function to export, returning a tuple of tensors
+            path (str): path of the exported graph
+            example_inputs (Optional[torch.Tensor]): batch of input samples,
+                required to trace the function. Defaults to None.
+            output_names (Optional[List[str]]): names of the outputs of "func" in
+                the ONNX graph. Defaults to None.
+            export_format (Optional[str]): "torchscript" or "onnx". Defaults to
+                None, for "torchscript".
+        """
+        assert example_inputs is not None, "Torch models require example_inputs"
+        export_format = export_format or "torchscript"
+        example_inputs = torch.as_tensor(example_inputs).to(self._device)
+        module = FunctionModule(func, self.model).eval()
+        with torch.no_grad():
+            if export_format == "torchscript":
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", torch.jit.TracerWarning)
+                    traced = torch.jit.trace(module, (example_inputs,))
+                traced.save(path)
+            elif export_format == "onnx":
+                output_names = output_names or []
+                torch.onnx.export(
+                    module,
+                    (example_inputs,),
+                    path,
+                    input_names=["inputs"],
+                    output_names=output_names,
+                    dynamic_axes={
+                        name: {0: "batch"} for name in ["inputs"] + output_names
+                    },
+                )
+            else:
+                raise NotImplementedError(
+                    f"Unknown export format {export_format} for torch models, use"
+                    ' "torchscript" or "onnx"'
+                )
+
     def get_weights(self, layer_id: Union[str, int]) -> List[torch.Tensor]:
         """Get the weights of a layer
 
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import queue
+import threading
+import time
+from collections import Counter
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from ..methods.base import OODModel
+from ..types import Any
+from ..types import List
+from ..types import Optional
+from ..types import Tuple
+
+
+def to_backend_tensor(array: np.ndarray, backend: str) -> Any:
+    """Convert a NumPy array into a tensor of the backend of a fitted oodmodel,
+    keeping its dtype.
+
+    Args:
+        array (np.ndarray): array to convert
+        backend (str): "tensorflow" or "torch"
+
+    Returns:
+        Any: converted tensor
+    """
+    if backend == "torch":
+        import torch
+
+        return torch.from_numpy(np.ascontiguousarray(array))
+    elif backend == "tensorflow":
+        import tensorflow as tf
+
+        return tf.convert_to_tensor(array)
+    return array
+
+
+class _Request:
+    """Scoring request waiting in the micro-batching queue"""
+
+    def __init__(self, inputs: np.ndarray):
+        self.inputs = inputs
+        self.n_samples = inputs.shape[0]
+        self.feature_shape = inputs.shape[1:]
+        self.future = Future()
+        self.arrival_time = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent scoring requests into micro-batches that are scored with a
+    single call to `detector._score_tensor`. A micro-batch is closed as soon as it
+    holds `max_batch_size` samples or the oldest request has waited `max_wait_ms`.
+
+    Requests are scored by a single worker thread, so the detector is never called
+    concurrently. Only requests whose samples have the same shape are gathered in
+    a micro-batch.
+
+    Args:
+        detector (OODModel): fitted oodmodel
+        max_batch_size (int): maximum number of samples in a micro-batch.
+            Defaults to 32.
+        max_wait_ms (float): maximum time (ms) a request waits for the micro-batch
+            to fill up. Defaults to 5.
+        max_queue_size (int): maximum number of pending requests. `submit` blocks
+            when the queue is full. Defaults to 1024.
+        dtype (str): dtype of the batched inputs. Defaults to "float32".
+        latency_window (int): number of recent requests used to compute latency
+            percentiles. Defaults to 10000.
+        input_shape (Optional[Tuple[int, ...]]): shape of a sample, without the
+            batch dimension. If given, `submit` rejects the requests with other
+            sample shapes. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        detector: OODModel,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        dtype: str = "float32",
+        latency_window: int = 10000,
+        input_shape: Optional[Tuple[int, ...]] = None,
+    ):
+        assert detector.feature_extractor is not None, "Call .fit() before serving"
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.dtype = dtype
+        self.input_shape = None if input_shape is None else tuple(input_shape)
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._deferred = deque()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = Counter()
+        self._n_requests = 0
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def start(self) -> "MicroBatcher":
+        """Starts the worker thread"""
+        with self._state_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop_event.clear()
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the worker thread once the pending requests are processed. The
+        requests left over, if any, are failed with a RuntimeError."""
+        with self._state_lock:
+            self._stop_event.set()
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.join()
+        leftover = list(self._deferred)
+        self._deferred.clear()
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for request in leftover:
+            request.future.set_exception(RuntimeError("MicroBatcher was stopped"))
+
+    def __enter__(self) -> "MicroBatcher":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def submit(self, inputs: np.ndarray) -> Future:
+        """Enqueues a scoring request.
+
+        Args:
+            inputs (np.ndarray): batch of samples to score, with a leading batch
+                dimension.
+
+        Returns:
+            Future: future holding the scores of the samples.
+
+        Raises:
+            ValueError: if inputs have no batch dimension, or if their sample shape
+                differs from `input_shape`.
+            RuntimeError: if the micro-batcher is not started.
+        """
+        inputs = np.asarray(inputs, dtype=self.dtype)
+        if inputs.ndim == 0:
+            raise ValueError("inputs must have a leading batch dimension")
+        if self.input_shape is not None and inputs.shape[1:] != self.input_shape:
+            raise ValueError(
+                f"Expected samples of shape {self.input_shape}, "
+                f"got {inputs.shape[1:]}"
+            )
+        request = _Request(inputs)
+        # the state lock keeps stop() from exiting the worker between the check and
+        # the enqueuing, which would leave the request pending forever
+        with self._state_lock:
+            if self._worker is None or self._stop_event.is_set():
+                raise RuntimeError("MicroBatcher is not started, call .start() first")
+            self._queue.put(request)
+        return request.future
+
+    def score(self, inputs: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Enqueues a scoring request and waits for its scores.
+
+        Args:
+            inputs (np.ndarray): batch of samples to score, with a leading batch
+                dimension.
+            timeout (Optional[float]): maximum time (s) to wait for the scores.
+                Defaults to None.
+
+        Returns:
+            np.ndarray: scores
+        """
+        return self.submit(inputs).result(timeout=timeout)
+
+    def _collect_batch(self) -> List[_Request]:
+        """Waits for a first request, then gathers the following ones until the
+        micro-batch is full or the deadline of the first request is reached.
+        Requests with another sample shape than the first one, or that would
+        overflow `max_batch_size`, are deferred to the next micro-batches. A single
+        request larger than `max_batch_size` is scored alone.
+
+        Returns:
+            List[_Request]: requests of the micro-batch
+        """
+        if len(self._deferred) > 0:
+            requests = [self._deferred.popleft()]
+        else:
+            try:
+                requests = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                return []
+        feature_shape = requests[0].feature_shape
+        n_samples = requests[0].n_samples
+
+        # deferred requests first, to keep the arrival order
+        full = n_samples >= self.max_batch_size
+        deferred = deque()
+        while len(self._deferred) > 0:
+            request = self._deferred.popleft()
+            if request.feature_shape == feature_shape and not full:
+                if n_samples + request.n_samples <= self.max_batch_size:
+                    requests.append(request)
+                    n_samples += request.n_samples
+                    continue
+                full = True
+            deferred.append(request)
+        self._deferred = deferred
+
+        deadline = requests[0].arrival_time + self.max_wait_ms / 1000
+        while not full and n_samples < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request.feature_shape != feature_shape:
+                self._deferred.append(request)
+                continue
+            if n_samples + request.n_samples > self.max_batch_size:
+                self._deferred.append(request)
+                break
+            requests.append(request)
+            n_samples += request.n_samples
+        return requests
+
+    def _run(self) -> None:
+        """Worker loop: scores micro-batches until stopped and the queue is empty"""
+        while not (
+            self._stop_event.is_set()
+            and self._queue.empty()
+            and len(self._deferred) == 0
+        ):
+            requests = []
+            try:
+                requests = self._collect_batch()
+                if len(requests) == 0:
+                    continue
+                sizes = [request.n_samples for request in requests]
+                batch = np.concatenate([request.inputs for request in requests])
+                tensor = to_backend_tensor(batch, self.detector.backend)
+                scores = np.asarray(self.detector._score_tensor(tensor))
+            except Exception as err:
+                for request in requests:
+                    request.future.set_exception(err)
+                continue
+
+            end_time = time.perf_counter()
+            splits = np.split(scores, np.cumsum(sizes)[:-1])
+            with self._lock:
+                self._batch_sizes[int(np.sum(sizes))] += 1
+                self._n_requests += len(requests)
+                for request in requests:
+                    self._latencies.append(end_time - request.arrival_time)
+            for request, request_scores in zip(requests, splits):
+                request.future.set_result(request_scores)
+
+    def metrics(self) -> dict:
+        """Serving metrics.
+
+        Returns:
+            dict: number of pending requests (queue_depth), number of processed
+                requests and micro-batches, histogram of micro-batch sizes
+                (size: count), and p50 / p99 request latencies (ms) on the latest
+                requests.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            histogram = dict(sorted(self._batch_sizes.items()))
+            n_requests = self._n_requests
+        return {
+            "queue_depth": self._queue.qsize() + len(self._deferred),
+            "n_requests": n_requests,
+            "n_batches": int(sum(histogram.values())),
+            "batch_size_histogram": histogram,
+            "latency_p50_ms": float(np.percentile(latencies, 50))
+            if len(latencies)
+            else None,
+            "latency_p99_ms": float(np.percentile(latencies, 99))
+            if len(latencies)
+            else None,
+        }
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+
+from ..methods.base import OODModel
+from .micro_batcher import MicroBatcher
+
+
+class ScoringServer:
+    """
+    Local HTTP scoring server around a fitted oodmodel, based on the standard
+    library. Concurrent requests are gathered into micro-batches by a
+    `MicroBatcher`.
+
+    Endpoints:
+        POST /score: body `{"inputs": [...]}` where inputs is a (nested) list of
+            samples with a leading batch dimension. Returns `{"scores": [...]}`.
+        GET /metrics: serving metrics (see `MicroBatcher.metrics`).
+        GET /health: returns `{"status": "ok"}`.
+
+    Args:
+        detector (OODModel): fitted oodmodel
+        host (str): host to bind. Defaults to "127.0.0.1".
+        port (int): port to bind, 0 to pick a free port. Defaults to 8000.
+        **batcher_kwargs: arguments passed to `MicroBatcher` (max_batch_size,
+            max_wait_ms, max_queue_size, dtype, latency_window, input_shape).
+    """
+
+    def __init__(
+        self,
+        detector: OODModel,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        **batcher_kwargs,
+    ):
+        self.batcher = MicroBatcher(detector, **batcher_kwargs)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        """Base url of the server"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self) -> type:
+        batcher = self.batcher
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, content: dict):
+                body = json.dumps(content).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    self._send_json(200, batcher.metrics())
+                elif self.path == "/health":
+                    self._send_json(200, {"status": "ok"})
+                else:
+                    self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/score":
+                    self._send_json(404, {"error": f"Unknown path {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length))
+                    if not isinstance(payload, dict):
+                        raise ValueError("body must be a JSON object")
+                    future = batcher.submit(np.asarray(payload["inputs"]))
+                except (ValueError, KeyError, TypeError) as err:
+                    self._send_json(400, {"error": f"Invalid request: {err}"})
+                    return
+                except RuntimeError as err:
+                    self._send_json(503, {"error": str(err)})
+                    return
+                try:
+                    scores = future.result()
+                except Exception as err:
+                    self._send_json(500, {"error": str(err)})
+                    return
+                self._send_json(200, {"scores": scores.tolist()})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        """Starts the micro-batcher and serves requests until interrupted"""
+        self.batcher.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            self.batcher.stop()
+
+    def start(self) -> "ScoringServer":
+        """Starts serving in a background thread"""
+        self.batcher.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """Stops a server started with `start`"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.batcher.stop()
+
+    def __enter__(self) -> "ScoringServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -20,7 +20,11 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+from .dtype_policy import get_dtype_policy
+from .dtype_policy import set_dtype_policy
+from .general_utils import get_model_fingerprint
 from .general_utils import is_from
+from .numpy_operator import NumpyOperator
 
 avail_lib = []
 try:
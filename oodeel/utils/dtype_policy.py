@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from ..types import Optional
+from ..types import Tuple
+
+FIT_DTYPES = ("float64", "float32")
+SCORE_DTYPES = ("float64", "float32", "float16", "bfloat16")
+HALF_DTYPES = ("float16", "bfloat16")
+
+# fit statistics are accumulated (in NumPy) with the "fit" dtype, the tensors used
+# for scoring are cast to the "score" dtype by the operators and feature extractors
+_DTYPE_POLICY = {"fit": "float64", "score": "float32"}
+
+
+def _check_dtype(dtype: Optional[str], allowed: Tuple[str, ...], name: str) -> None:
+    if dtype is not None and dtype not in allowed:
+        raise NotImplementedError(
+            f"only {', '.join(allowed)} are available for the {name} dtype"
+        )
+
+
+def set_dtype_policy(fit: Optional[str] = None, score: Optional[str] = None) -> None:
+    """
+    Sets the global numeric precision policy of the oodmodels, that can be
+    overridden per oodmodel with `OODModel.set_dtype_policy`.
+
+    Args:
+        fit (Optional[str]): dtype of the statistics fitted on ID data (class
+            centers, covariance matrices, projections...) and of the linear algebra
+            performed on them, either "float64" or "float32". Unchanged if None.
+            Defaults to None.
+        score (Optional[str]): dtype of the features and of the fitted statistics
+            on the device at scoring time, either "float64", "float32", "float16"
+            or "bfloat16". Unchanged if None. Defaults to None.
+    """
+    _check_dtype(fit, FIT_DTYPES, "fit")
+    _check_dtype(score, SCORE_DTYPES, "score")
+    if fit is not None:
+        _DTYPE_POLICY["fit"] = fit
+    if score is not None:
+        _DTYPE_POLICY["score"] = score
+
+
+def get_dtype_policy() -> dict:
+    """
+    Global numeric precision policy of the oodmodels.
+
+    Returns:
+        dict: "fit" and "score" dtypes
+    """
+    return dict(_DTYPE_POLICY)
@@ -20,6 +20,10 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import hashlib
+
+import numpy as np
+
 from ..types import Any
 
 
@@ -40,3 +44,37 @@ def is_from(model_or_tensor: Any, framework: str) -> str:
         for keyword in class_list:
             keywords_list.append(keyword)
     return framework in keywords_list
+
+
+def get_model_fingerprint(model: Any) -> str:
+    """Compute a fingerprint of the weights of a keras, torch or ONNX model, to check
+    that a saved oodmodel is reloaded with the model it was fitted on.
+
+    Args:
+        model (Any): keras, torch or ONNX (`OnnxModel`) model, or None for
+            model-free oodmodels
+
+    Returns:
+        str: sha256 hex digest of the model weights (None if model is None)
+    """
+    if model is None:
+        return None
+    if is_from(model, "torch"):
+        weights = [
+            (name, tensor.detach().cpu().numpy())
+            for name, tensor in model.state_dict().items()
+        ]
+    elif is_from(model, "keras"):
+        weights = [(str(i), w) for i, w in enumerate(model.get_weights())]
+    elif is_from(model, "OnnxModel"):
+        weights = model.get_weights()
+    else:
+        raise NotImplementedError()
+
+    digest = hashlib.sha256()
+    for name, weight in weights:
+        weight = np.ascontiguousarray(weight)
+        digest.update(name.encode("utf-8"))
+        digest.update(str((weight.dtype, weight.shape)).encode("utf-8"))
+        digest.update(weight.tobytes())
+    return digest.hexdigest()
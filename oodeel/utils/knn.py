@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+from abc import ABC
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..types import Any
+from ..types import Optional
+from ..types import Tuple
+from ..types import Union
+
+try:
+    import faiss
+except ImportError:
+    _has_faiss = False
+else:
+    _has_faiss = True
+    # memory-map flat indexes with recent faiss versions, else only inverted lists
+    _FAISS_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+class KNNBackend(ABC):
+    """Exact L2 nearest neighbor search backend used by DKNN. Indexes created by
+    a backend follow (a subset of) the faiss index API: `d`, `ntotal`, `add`,
+    `add_with_ids`, `remove_ids` and `search`.
+    """
+
+    name = None
+
+    @abstractmethod
+    def create_index(self, dim: int, with_ids: bool = False) -> Any:
+        """Creates an empty flat L2 index.
+
+        Args:
+            dim (int): dimension of the vectors
+            with_ids (bool): if True, vectors are added with (and searches return)
+                user-defined ids, and can be removed by id. Defaults to False.
+
+        Returns:
+            Any: index
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_vectors(self, index: Any) -> np.ndarray:
+        """Returns the vectors stored in an index.
+
+        Args:
+            index (Any): index created by the backend
+
+        Returns:
+            np.ndarray: vectors, in insertion order
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def knn(
+        self, queries: np.ndarray, references: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact k nearest neighbors search of queries among references, without
+        index.
+
+        Args:
+            queries (np.ndarray): query vectors, of shape (n_queries, d)
+            references (np.ndarray): reference vectors, of shape (n_references, d)
+            k (int): number of nearest neighbors
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: squared L2 distances and indices of the k
+                nearest neighbors, in increasing distance order (padded with the
+                float32 max and -1 when k > n_references)
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def write_index(self, index: Any, path: str) -> None:
+        """Writes an index to disk.
+
+        Args:
+            index (Any): index created by the backend
+            path (str): path of the index file, without extension
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read_index(self, path: str, mmap: bool = False) -> Any:
+        """Reads an index written by `write_index`.
+
+        Args:
+            path (str): path of the index file, without extension
+            mmap (bool): if True, the index is memory-mapped (read-only).
+                Defaults to False.
+
+        Returns:
+            Any: index
+        """
+        raise NotImplementedError()
+
+
+class FaissBackend(KNNBackend):
+    """faiss backend, with flat (optionally ID-mapped) faiss indexes."""
+
+    name = "faiss"
+
+    def __init__(self):
+        if not _has_faiss:
+            raise ModuleNotFoundError(
+                "The faiss kNN backend requires faiss. Please run command "
+                "`pip install faiss-cpu`, or use the 'numpy' kNN backend"
+            )
+
+    def create_index(self, dim: int, with_ids: bool = False) -> Any:
+        index = faiss.IndexFlatL2(dim)
+        if with_ids:
+            index = faiss.IndexIDMap(index)
+        return index
+
+    def get_vectors(self, index: Any) -> np.ndarray:
+        if isinstance(index, faiss.IndexIDMap):
+            index = faiss.downcast_index(index.index)
+        return index.reconstruct_n(0, index.ntotal)
+
+    def knn(
+        self, queries: np.ndarray, references: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return faiss.knn(
+            np.ascontiguousarray(queries, np.float32),
+            np.ascontiguousarray(references, np.float32),
+            k,
+        )
+
+    def write_index(self, index: Any, path: str) -> None:
+        faiss.write_index(index, path + ".faiss")
+
+    def read_index(self, path: str, mmap: bool = False) -> Any:
+        return faiss.read_index(path + ".faiss", _FAISS_MMAP_FLAG if mmap else 0)
+
+
+class NumpyBackend(KNNBackend):
+    """Pure NumPy backend. Distances are computed by blocks of references with a
+    GEMM, `||q||² - 2 q.r + ||r||²`, and the k nearest neighbors of each block are
+    selected with `np.argpartition` then merged. Blocks are processed by
+    `n_threads` threads (NumPy releases the GIL in BLAS calls), and sized so that
+    the distance blocks processed concurrently fit in `block_memory` bytes
+    altogether. The thread pool is released by `close`.
+
+    Args:
+        block_memory (int): memory budget of the concurrent distance blocks, in
+            bytes. Defaults to 64 MB.
+        n_threads (Optional[int]): number of threads processing blocks. If None,
+            the number of CPUs. Defaults to None.
+    """
+
+    name = "numpy"
+
+    def __init__(self, block_memory: int = 2**26, n_threads: Optional[int] = None):
+        self.block_memory = block_memory
+        self.n_threads = n_threads or os.cpu_count() or 1
+        self._executor = None
+
+    def create_index(self, dim: int, with_ids: bool = False) -> "NumpyFlatIndex":
+        return NumpyFlatIndex(dim, with_ids, self)
+
+    def get_vectors(self, index: "NumpyFlatIndex") -> np.ndarray:
+        return np.array(index.vectors)
+
+    def knn(
+        self, queries: np.ndarray, references: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, np.float32)
+        n_queries, n_references = len(queries), len(references)
+        distances = np.full((n_queries, k), np.finfo(np.float32).max, np.float32)
+        indices = np.full((n_queries, k), -1, np.int64)
+        if n_queries == 0 or n_references == 0:
+            return distances, indices
+
+        # up to n_threads blocks are processed at once
+        block_size = max(self.block_memory // (4 * n_queries * self.n_threads), k, 1)
+        queries_norms = np.sum(queries**2, axis=1, keepdims=True)
+
+        def _block_knn(start: int) -> Tuple[np.ndarray, np.ndarray]:
+            block = np.asarray(references[start : start + block_size], np.float32)
+            block_distances = np.matmul(queries, block.T)
+            block_distances *= -2
+            block_distances += queries_norms
+            block_distances += np.sum(block**2, axis=1)
+            np.maximum(block_distances, 0, out=block_distances)
+            k_block = min(k, len(block))
+            if k_block < len(block):
+                top = np.argpartition(block_distances, k_block - 1, axis=1)
+                top = top[:, :k_block]
+            else:
+                top = np.broadcast_to(np.arange(len(block)), block_distances.shape)
+            return np.take_along_axis(block_distances, top, axis=1), top + start
+
+        starts = range(0, n_references, block_size)
+        if len(starts) > 1 and self.n_threads > 1:
+            results = list(self._get_executor().map(_block_knn, starts))
+        else:
+            results = [_block_knn(start) for start in starts]
+
+        # merge the k nearest neighbors of each block
+        all_distances = np.concatenate([r[0] for r in results], axis=1)
+        all_indices = np.concatenate([r[1] for r in results], axis=1)
+        k_found = min(k, all_distances.shape[1])
+        order = np.argsort(all_distances, axis=1, kind="stable")[:, :k_found]
+        distances[:, :k_found] = np.take_along_axis(all_distances, order, axis=1)
+        indices[:, :k_found] = np.take_along_axis(all_indices, order, axis=1)
+        return distances, indices
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.n_threads)
+        return self._executor
+
+    def close(self) -> None:
+        """Shuts the thread pool down. It is created again by the next search."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __del__(self):
+        self.close()
+
+    def __getstate__(self) -> dict:
+        # the thread pool is not picklable, it is created again by the next search
+        state = dict(self.__dict__)
+        state["_executor"] = None
+        return state
+
+    def write_index(self, index: "NumpyFlatIndex", path: str) -> None:
+        np.save(path + ".npy", index.vectors)
+        if index.ids is not None:
+            np.save(path + "_ids.npy", index.ids)
+
+    def read_index(self, path: str, mmap: bool = False) -> "NumpyFlatIndex":
+        vectors = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        with_ids = os.path.exists(path + "_ids.npy")
+        index = NumpyFlatIndex(vectors.shape[1], with_ids, self)
+        index.vectors = vectors
+        if with_ids:
+            index.ids = np.load(path + "_ids.npy")
+        return index
+
+
+class NumpyFlatIndex:
+    """Flat L2 index of the NumPy kNN backend, following the faiss index API.
+
+    Args:
+        d (int): dimension of the vectors
+        with_ids (bool): if True, vectors are added with user-defined ids
+        backend (NumpyBackend): backend performing the searches
+    """
+
+    def __init__(self, d: int, with_ids: bool, backend: NumpyBackend):
+        self.d = d
+        self._backend = backend
+        self._chunks = [np.zeros((0, d), dtype=np.float32)]
+        self.ids = np.zeros(0, dtype=np.int64) if with_ids else None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Stored vectors, of shape (ntotal, d)"""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0]
+
+    @vectors.setter
+    def vectors(self, vectors: np.ndarray) -> None:
+        self._chunks = [vectors]
+
+    @property
+    def ntotal(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def add(self, x: np.ndarray) -> None:
+        assert self.ids is None, "Vectors must be added with ids"
+        self._chunks.append(np.ascontiguousarray(x, np.float32))
+
+    def add_with_ids(self, x: np.ndarray, ids: np.ndarray) -> None:
+        assert self.ids is not None, "This index does not store ids"
+        self._chunks.append(np.ascontiguousarray(x, np.float32))
+        self.ids = np.concatenate([self.ids, np.asarray(ids, np.int64)])
+
+    def remove_ids(self, ids: Union[np.ndarray, list]) -> int:
+        assert self.ids is not None, "This index does not store ids"
+        kept = ~np.isin(self.ids, ids)
+        n_removed = int(np.sum(~kept))
+        self.vectors = self.vectors[kept]
+        self.ids = self.ids[kept]
+        return n_removed
+
+    def search(self, x: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances, indices = self._backend.knn(x, self.vectors, k)
+        if self.ids is not None:
+            found = indices >= 0
+            ids = np.full_like(indices, -1)
+            ids[found] = np.take(self.ids, indices[found])
+            indices = ids
+        return distances, indices
+
+
+def get_knn_backend(backend: Union[str, KNNBackend, None] = None) -> KNNBackend:
+    """Returns a kNN backend.
+
+    Args:
+        backend (Union[str, KNNBackend, None]): backend instance, or name of the
+            backend ("faiss" or "numpy"). If None, faiss if it is installed, else
+            numpy. Defaults to None.
+
+    Returns:
+        KNNBackend: kNN backend
+    """
+    if isinstance(backend, KNNBackend):
+        return backend
+    if backend is None:
+        backend = "faiss" if _has_faiss else "numpy"
+    if backend == "faiss":
+        return FaissBackend()
+    if backend == "numpy":
+        return NumpyBackend()
+    raise NotImplementedError(
+        'only "faiss" and "numpy" are available for argument "knn_backend"'
+    )
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+from scipy import linalg
+from scipy.special import logsumexp
+from scipy.special import softmax
+
+from ..types import Callable
+from ..types import List
+from ..types import Optional
+from ..types import TensorType
+from ..types import Tuple
+from .dtype_policy import get_dtype_policy
+from .operator import Operator
+
+
+class NumpyOperator(Operator):
+    """Class to handle NumPy operations with the unified API of the operators, to
+    run the post-processing of the features on the host without the dispatch
+    overhead of torch or tensorflow.
+
+    Args:
+        dtype (Optional[str]): dtype of the arrays created by `from_numpy` and
+            `cast`. If None, the "score" dtype of the global dtype policy. NumPy has
+            no "bfloat16" dtype. Defaults to None.
+    """
+
+    def __init__(self, dtype: Optional[str] = None):
+        self.dtype = dtype or get_dtype_policy()["score"]
+        if self.dtype == "bfloat16":
+            raise NotImplementedError('NumPy has no "bfloat16" dtype')
+
+    @staticmethod
+    def softmax(tensor: TensorType) -> TensorType:
+        """Softmax function"""
+        return softmax(tensor, axis=-1)
+
+    @staticmethod
+    def argmax(tensor: TensorType, dim: int = None) -> TensorType:
+        """Argmax function"""
+        return np.argmax(tensor, axis=dim)
+
+    @staticmethod
+    def max(tensor: TensorType, dim: int = None) -> TensorType:
+        """Max function"""
+        return np.max(tensor, axis=dim)
+
+    @staticmethod
+    def one_hot(tensor: TensorType, num_classes: int) -> TensorType:
+        """One hot function"""
+        return np.eye(num_classes)[tensor]
+
+    @staticmethod
+    def sign(tensor: TensorType) -> TensorType:
+        """Sign function"""
+        return np.sign(tensor)
+
+    @staticmethod
+    def CrossEntropyLoss(reduction: str = "mean"):
+        """Cross Entropy Loss from logits"""
+
+        def sanitized_ce_loss(inputs, targets):
+            losses = logsumexp(inputs, axis=1) - np.take_along_axis(
+                inputs, np.reshape(targets, (-1, 1)), axis=1
+            ).reshape(-1)
+            return np.mean(losses) if reduction == "mean" else np.sum(losses)
+
+        return sanitized_ce_loss
+
+    @staticmethod
+    def norm(tensor: TensorType, dim: int = None) -> TensorType:
+        """Tensor Norm"""
+        return np.linalg.norm(tensor, axis=dim)
+
+    @staticmethod
+    def matmul(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        """Matmul operation"""
+        return np.matmul(tensor_1, tensor_2)
+
+    @staticmethod
+    def convert_to_numpy(tensor: TensorType) -> np.ndarray:
+        "Convert a tensor (NumPy array, or torch / tensorflow tensor) to a NumPy array"
+        # torch tensors, possibly on the GPU or requiring grad
+        if hasattr(tensor, "detach"):
+            tensor = tensor.detach().cpu()
+        if hasattr(tensor, "numpy"):
+            tensor = tensor.numpy()
+        return np.asarray(tensor)
+
+    @staticmethod
+    def gradient(func: Callable, inputs: TensorType, *args, **kwargs) -> TensorType:
+        """NumPy has no automatic differentiation: gradient based methods (e.g. input
+        perturbation) require the operator of the model backend."""
+        raise NotImplementedError(
+            "Gradients cannot be computed with the NumPy operator, use the operator"
+            " of the model backend"
+        )
+
+    @staticmethod
+    def compile(
+        func: Callable, model: Optional[Callable] = None, jit_compile: bool = False
+    ) -> Callable:
+        """NumPy operations cannot be compiled: compiled scoring requires the
+        operator of the model backend."""
+        raise NotImplementedError(
+            "Functions cannot be compiled with the NumPy operator, use the operator"
+            " of the model backend"
+        )
+
+    @staticmethod
+    def stack(tensors: List[TensorType], dim: int = 0) -> TensorType:
+        "Stack tensors along a new dimension"
+        return np.stack(tensors, dim)
+
+    @staticmethod
+    def cat(tensors: List[TensorType], dim: int = 0) -> TensorType:
+        "Concatenate tensors in a given dimension"
+        return np.concatenate(tensors, dim)
+
+    @staticmethod
+    def mean(tensor: TensorType, dim: int = None, keepdim: bool = False) -> TensorType:
+        "Mean function"
+        dim = tuple(dim) if isinstance(dim, list) else dim
+        return np.mean(tensor, axis=dim, keepdims=keepdim)
+
+    @staticmethod
+    def sum(tensor: TensorType, dim: int = None, keepdim: bool = False) -> TensorType:
+        "Sum function"
+        dim = tuple(dim) if isinstance(dim, list) else dim
+        return np.sum(tensor, axis=dim, keepdims=keepdim)
+
+    @staticmethod
+    def flatten(tensor: TensorType) -> TensorType:
+        "Flatten to 2D tensor of shape (tensor.shape[0], -1)"
+        # Flatten the features to 2D (n_batch, n_features)
+        return np.reshape(tensor, (tensor.shape[0], -1))
+
+    def from_numpy(self, arr: np.ndarray, dtype: Optional[str] = None) -> TensorType:
+        "Convert a NumPy array to an array of the operator dtype (or of dtype)"
+        return np.asarray(arr, dtype=dtype or self.dtype)
+
+    def cast(self, tensor: TensorType, dtype: Optional[str] = None) -> TensorType:
+        "Convert a tensor to a NumPy array of the operator dtype (or of dtype)"
+        return self.convert_to_numpy(tensor).astype(dtype or self.dtype, copy=False)
+
+    @staticmethod
+    def transpose(tensor: TensorType) -> TensorType:
+        "Transpose function"
+        return np.transpose(tensor)
+
+    @staticmethod
+    def diag(tensor: TensorType) -> TensorType:
+        "Diagonal function"
+        return np.diag(tensor)
+
+    @staticmethod
+    def reshape(tensor: TensorType, shape: List[int]) -> TensorType:
+        "Reshape function"
+        return np.reshape(tensor, shape)
+
+    @staticmethod
+    def pinv(tensor: TensorType) -> TensorType:
+        "Pseudo-inverse function"
+        return np.linalg.pinv(tensor)
+
+    @staticmethod
+    def gather(tensor: TensorType, indices: np.ndarray, dim: int = 0) -> TensorType:
+        "Gather slices of a tensor along a dimension given an array of indices"
+        return np.take(tensor, indices, axis=dim)
+
+    @staticmethod
+    def logsumexp(
+        tensor: TensorType, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "Log of the sum of exponentials, computed in a numerically stable way"
+        return logsumexp(tensor, axis=dim, keepdims=keepdim)
+
+    @staticmethod
+    def topk(
+        tensor: TensorType, k: int, dim: int = -1, largest: bool = True
+    ) -> Tuple[TensorType, TensorType]:
+        "k largest (or smallest) values and their indices, sorted along dim"
+        # partial sort of the k first values, then sort of these values
+        keys = -tensor if largest else tensor
+        indices = np.argpartition(keys, k - 1, axis=dim)
+        indices = np.take(indices, np.arange(k), axis=dim)
+        order = np.argsort(np.take_along_axis(keys, indices, axis=dim), axis=dim)
+        indices = np.take_along_axis(indices, order, axis=dim)
+        return np.take_along_axis(tensor, indices, axis=dim), indices
+
+    @staticmethod
+    def einsum(equation: str, *tensors: TensorType) -> TensorType:
+        "Einstein summation"
+        return np.einsum(equation, *tensors, optimize=True)
+
+    @staticmethod
+    def cdist(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Pairwise euclidean distances between the rows of two 2D tensors"
+        sq_dists = (
+            np.sum(tensor_1**2, axis=1, keepdims=True)
+            - 2 * np.matmul(tensor_1, tensor_2.T)
+            + np.sum(tensor_2**2, axis=1)[None]
+        )
+        return np.sqrt(np.maximum(sq_dists, 0))
+
+    @staticmethod
+    def l2_normalize(
+        tensor: TensorType, dim: int = -1, eps: float = 1e-10
+    ) -> TensorType:
+        "Divide a tensor by its L2 norm (plus eps) along a dimension"
+        return tensor / (np.linalg.norm(tensor, axis=dim, keepdims=True) + eps)
+
+    @staticmethod
+    def where(
+        condition: TensorType, tensor_1: TensorType, tensor_2: TensorType
+    ) -> TensorType:
+        "Elements of tensor_1 where condition is True, of tensor_2 elsewhere"
+        return np.where(condition, tensor_1, tensor_2)
+
+    @staticmethod
+    def cholesky(tensor: TensorType) -> TensorType:
+        "Lower triangular Cholesky factor of a symmetric positive definite matrix"
+        return np.linalg.cholesky(tensor)
+
+    @staticmethod
+    def solve(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Solution X of the linear system tensor_1 @ X = tensor_2"
+        return linalg.solve(tensor_1, tensor_2)
+
+    @staticmethod
+    def quantile(
+        tensor: TensorType, q: float, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "q-th quantile along a dimension (flattened if None), linearly interpolated"
+        return np.quantile(tensor, q, axis=dim, keepdims=keepdim)
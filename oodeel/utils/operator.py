@@ -27,7 +27,9 @@ import numpy as np
 
 from ..types import Callable
 from ..types import List
+from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 
 
 class Operator(ABC):
@@ -92,6 +94,25 @@ class Operator(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def compile(
+        func: Callable, model: Optional[Callable] = None, jit_compile: bool = False
+    ) -> Callable:
+        """Compiles a function of a batch of samples into a graph.
+
+        Args:
+            func (Callable): function to compile, built with the operations of the
+                backend only.
+            model (Optional[Callable]): model called by "func", whose parameters
+                are inputs of the graph rather than constants. Defaults to None.
+            jit_compile (bool): if True, the graph is compiled to native code
+                rather than only traced. Defaults to False.
+
+        Returns:
+            Callable: compiled function
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def stack(tensors: List[TensorType], dim: int = 0) -> TensorType:
         "Stack tensors along a new dimension"
@@ -107,6 +128,11 @@ class Operator(ABC):
         "Mean function"
         raise NotImplementedError()
 
+    @abstractmethod
+    def sum(tensor: TensorType, dim: int = None, keepdim: bool = False) -> TensorType:
+        "Sum function"
+        raise NotImplementedError()
+
     @abstractmethod
     def flatten(tensor: TensorType) -> TensorType:
         "Flatten to 2D tensor (batch_size, -1)"
@@ -114,9 +140,13 @@ class Operator(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    def from_numpy(arr: np.ndarray) -> TensorType:
-        "Convert a NumPy array to a tensor"
-        # TODO change dtype
+    def from_numpy(arr: np.ndarray, dtype: Optional[str] = None) -> TensorType:
+        "Convert a NumPy array to a tensor of the operator dtype (or of dtype)"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def cast(tensor: TensorType, dtype: Optional[str] = None) -> TensorType:
+        "Cast a tensor to the operator dtype (or to dtype)"
         raise NotImplementedError()
 
     @abstractmethod
@@ -138,3 +168,63 @@ class Operator(ABC):
     def pinv(tensor: TensorType) -> TensorType:
         "Pseudo-inverse function"
         raise NotImplementedError()
+
+    @abstractmethod
+    def gather(tensor: TensorType, indices: np.ndarray, dim: int = 0) -> TensorType:
+        "Gather slices of a tensor along a dimension given an array of indices"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def logsumexp(
+        tensor: TensorType, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "Log of the sum of exponentials, computed in a numerically stable way"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def topk(
+        tensor: TensorType, k: int, dim: int = -1, largest: bool = True
+    ) -> Tuple[TensorType, TensorType]:
+        "k largest (or smallest) values and their indices, sorted along dim"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def einsum(equation: str, *tensors: TensorType) -> TensorType:
+        "Einstein summation"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def cdist(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Pairwise euclidean distances between the rows of two 2D tensors"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def l2_normalize(
+        tensor: TensorType, dim: int = -1, eps: float = 1e-10
+    ) -> TensorType:
+        "Divide a tensor by its L2 norm (plus eps) along a dimension"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def where(
+        condition: TensorType, tensor_1: TensorType, tensor_2: TensorType
+    ) -> TensorType:
+        "Elements of tensor_1 where condition is True, of tensor_2 elsewhere"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def cholesky(tensor: TensorType) -> TensorType:
+        "Lower triangular Cholesky factor of a symmetric positive definite matrix"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def solve(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Solution X of the linear system tensor_1 @ X = tensor_2"
+        raise NotImplementedError()
+
+    @abstractmethod
+    def quantile(
+        tensor: TensorType, q: float, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "q-th quantile along a dimension (flattened if None), linearly interpolated"
+        raise NotImplementedError()
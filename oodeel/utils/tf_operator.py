@@ -25,8 +25,11 @@ import tensorflow as tf
 
 from ..types import Callable
 from ..types import List
+from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
+from .dtype_policy import get_dtype_policy
 from .general_utils import is_from
 from .operator import Operator
 
@@ -46,7 +49,15 @@ def sanitize_input(tensor_arg_func: Callable):
 
 
 class TFOperator(Operator):
-    """Class to handle tensorflow operations with a unified API"""
+    """Class to handle tensorflow operations with a unified API
+
+    Args:
+        dtype (Optional[str]): dtype of the tensors created from NumPy arrays. If
+            None, the "score" dtype of the global dtype policy. Defaults to None.
+    """
+
+    def __init__(self, dtype: Optional[str] = None):
+        self.dtype = dtype or get_dtype_policy()["score"]
 
     @staticmethod
     def softmax(tensor: Union[tf.Tensor, np.ndarray]) -> tf.Tensor:
@@ -99,6 +110,9 @@ class TFOperator(Operator):
 
     @staticmethod
     def convert_to_numpy(tensor: TensorType) -> np.ndarray:
+        # no bfloat16 NumPy dtype
+        if tensor.dtype == tf.bfloat16:
+            tensor = tf.cast(tensor, tf.float32)
         return tensor.numpy()
 
     @staticmethod
@@ -119,6 +133,26 @@ class TFOperator(Operator):
             outputs = func(inputs, *args, **kwargs)
         return tape.gradient(outputs, inputs)
 
+    @staticmethod
+    def compile(
+        func: Callable, model: Optional[Callable] = None, jit_compile: bool = False
+    ) -> Callable:
+        """Traces a function of a batch of samples as a `tf.function`, retraced
+        for new input shapes only when needed.
+
+        Args:
+            func (Callable): function to compile, built with tensorflow operations
+                only.
+            model (Optional[Callable]): model called by "func". Unused, its
+                variables being captured by the `tf.function`. Defaults to None.
+            jit_compile (bool): if True, the graph is compiled with XLA.
+                Defaults to False.
+
+        Returns:
+            Callable: compiled function
+        """
+        return tf.function(func, jit_compile=jit_compile, reduce_retracing=True)
+
     @staticmethod
     def stack(tensors: List[TensorType], dim: int = 0) -> TensorType:
         "Stack tensors along a new dimension"
@@ -134,17 +168,24 @@ class TFOperator(Operator):
         "Mean function"
         return tf.reduce_mean(tensor, dim, keepdim)
 
+    @staticmethod
+    def sum(tensor: TensorType, dim: int = None, keepdim: bool = False) -> TensorType:
+        "Sum function"
+        return tf.reduce_sum(tensor, dim, keepdim)
+
     @staticmethod
     def flatten(tensor: TensorType) -> TensorType:
         "Flatten to 2D tensor of shape (tensor.shape[0], -1)"
         # Flatten the features to 2D (n_batch, n_features)
         return tf.reshape(tensor, shape=[tf.shape(tensor)[0], -1])
 
-    @staticmethod
-    def from_numpy(arr: np.ndarray) -> TensorType:
-        "Convert a NumPy array to a tensor"
-        # TODO change dtype
-        return tf.constant(arr, dtype=tf.float32)
+    def from_numpy(self, arr: np.ndarray, dtype: Optional[str] = None) -> TensorType:
+        "Convert a NumPy array to a tensor of the operator dtype (or of dtype)"
+        return tf.cast(tf.constant(arr), dtype or self.dtype)
+
+    def cast(self, tensor: TensorType, dtype: Optional[str] = None) -> TensorType:
+        "Cast a tensor to the operator dtype (or to dtype)"
+        return tf.cast(tensor, dtype or self.dtype)
 
     @staticmethod
     def transpose(tensor: TensorType) -> TensorType:
@@ -165,3 +206,91 @@ class TFOperator(Operator):
     def pinv(tensor: TensorType) -> TensorType:
         "Pseudo-inverse function"
         return tf.linalg.pinv(tensor)
+
+    @staticmethod
+    def gather(tensor: TensorType, indices: np.ndarray, dim: int = 0) -> TensorType:
+        "Gather slices of a tensor along a dimension given an array of indices"
+        return tf.gather(tensor, indices, axis=dim)
+
+    @staticmethod
+    def logsumexp(
+        tensor: TensorType, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "Log of the sum of exponentials, computed in a numerically stable way"
+        return tf.reduce_logsumexp(tensor, dim, keepdim)
+
+    @staticmethod
+    def topk(
+        tensor: TensorType, k: int, dim: int = -1, largest: bool = True
+    ) -> Tuple[TensorType, TensorType]:
+        "k largest (or smallest) values and their indices, sorted along dim"
+        # tf.math.top_k only works on the last dimension: swap dim with it
+        rank = len(tensor.shape)
+        perm = list(range(rank))
+        perm[dim % rank], perm[-1] = perm[-1], perm[dim % rank]
+        tensor = tf.transpose(tensor, perm)
+        values, indices = tf.math.top_k(tensor if largest else -tensor, k)
+        values = values if largest else -values
+        return tf.transpose(values, perm), tf.transpose(indices, perm)
+
+    @staticmethod
+    def einsum(equation: str, *tensors: TensorType) -> TensorType:
+        "Einstein summation"
+        return tf.einsum(equation, *tensors)
+
+    @staticmethod
+    def cdist(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Pairwise euclidean distances between the rows of two 2D tensors"
+        sq_dists = (
+            tf.reduce_sum(tensor_1**2, axis=1, keepdims=True)
+            - 2 * tf.matmul(tensor_1, tensor_2, transpose_b=True)
+            + tf.reduce_sum(tensor_2**2, axis=1)[None]
+        )
+        return tf.sqrt(tf.maximum(sq_dists, 0))
+
+    @staticmethod
+    def l2_normalize(
+        tensor: TensorType, dim: int = -1, eps: float = 1e-10
+    ) -> TensorType:
+        "Divide a tensor by its L2 norm (plus eps) along a dimension"
+        return tensor / (tf.norm(tensor, axis=dim, keepdims=True) + eps)
+
+    @staticmethod
+    def where(
+        condition: TensorType, tensor_1: TensorType, tensor_2: TensorType
+    ) -> TensorType:
+        "Elements of tensor_1 where condition is True, of tensor_2 elsewhere"
+        return tf.where(condition, tensor_1, tensor_2)
+
+    @staticmethod
+    def cholesky(tensor: TensorType) -> TensorType:
+        "Lower triangular Cholesky factor of a symmetric positive definite matrix"
+        return tf.linalg.cholesky(tensor)
+
+    @staticmethod
+    def solve(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Solution X of the linear system tensor_1 @ X = tensor_2"
+        return tf.linalg.solve(tensor_1, tensor_2)
+
+    @staticmethod
+    def quantile(
+        tensor: TensorType, q: float, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "q-th quantile along a dimension (flattened if None), linearly interpolated"
+        out_shape = [1] * len(tensor.shape) if dim is None else None
+        if dim is None:
+            tensor, dim = tf.reshape(tensor, [-1]), 0
+        sorted_tensor = tf.sort(tensor, axis=dim)
+        # same interpolation as np.quantile / torch.quantile ("linear")
+        position = q * (tensor.shape[dim] - 1)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, tensor.shape[dim] - 1)
+        weight = tf.cast(position - lower, tensor.dtype)
+        values = (1 - weight) * tf.gather(sorted_tensor, lower, axis=dim) + (
+            weight * tf.gather(sorted_tensor, upper, axis=dim)
+        )
+        if keepdim:
+            if out_shape is not None:
+                return tf.reshape(values, out_shape)
+            values = tf.expand_dims(values, dim)
+        return values
@@ -20,14 +20,18 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import warnings
 from typing import List
 
 import numpy as np
 import torch
 
 from ..types import Callable
+from ..types import Optional
 from ..types import TensorType
+from ..types import Tuple
 from ..types import Union
+from .dtype_policy import get_dtype_policy
 from .general_utils import is_from
 from .operator import Operator
 
@@ -46,14 +50,143 @@ def sanitize_input(tensor_arg_func: Callable):
     return wrapper
 
 
+class FunctionModule(torch.nn.Module):
+    """Module computing "func", with "model" as submodule so that its parameters
+    are traced as parameters rather than constants."""
+
+    def __init__(self, func: Callable, model: Optional[torch.nn.Module] = None):
+        super().__init__()
+        self.func = func
+        self.model = model
+
+    def forward(self, inputs: torch.Tensor) -> TensorType:
+        return self.func(inputs)
+
+
+class CompiledFunction:
+    """Function of a batch of samples compiled by `TorchOperator.compile`.
+
+    The function is compiled for each new input shape, dtype and device: it is
+    first run eagerly, then traced (or compiled) and its output checked against the
+    eager one. Tracer warnings, which signal Python values computed from tensors
+    such as data-dependent control flow frozen by the trace, fail the tracing. If
+    the compilation fails or the outputs differ, the function falls back to eager
+    mode for good, with a warning: such functions should rather be compiled with
+    `jit_compile=True`. Errors raised by the eager run or by the compiled function
+    once validated are propagated.
+
+    Args:
+        func (Callable): function to compile, built with torch operations only.
+        model (Optional[torch.nn.Module]): model called by "func". Defaults to None.
+        jit_compile (bool): if True, the function is compiled with `torch.compile`
+            rather than traced. Defaults to False.
+        rtol (float): relative tolerance of the validation. Defaults to 1e-4.
+        atol (float): absolute tolerance of the validation. Defaults to 1e-5.
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        model: Optional[torch.nn.Module] = None,
+        jit_compile: bool = False,
+        rtol: float = 1e-4,
+        atol: float = 1e-5,
+    ):
+        self.func = func
+        self.jit_compile = jit_compile
+        self.rtol = rtol
+        self.atol = atol
+        self.fallback = False
+        self._module = FunctionModule(func, model).eval()
+        self._compiled = torch.compile(self._module) if jit_compile else None
+        self._traces = {}
+
+    @sanitize_input
+    def __call__(self, inputs: torch.Tensor) -> TensorType:
+        if self.fallback:
+            return self.func(inputs)
+        key = (tuple(inputs.shape), inputs.dtype, inputs.device)
+        if key not in self._traces:
+            return self._compile(inputs, key)
+        with torch.inference_mode():
+            return self._traces[key](inputs)
+
+    def _compile(self, inputs: torch.Tensor, key: tuple) -> TensorType:
+        """Compiles the function for inputs like "inputs", and validates the
+        compiled function against the eager one.
+
+        Args:
+            inputs (torch.Tensor): input tensor
+            key (tuple): shape, dtype and device of the inputs
+
+        Returns:
+            TensorType: outputs of the function
+        """
+        outputs = self.func(inputs)
+        try:
+            with torch.inference_mode():
+                if self.jit_compile:
+                    compiled = self._compiled
+                else:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("error", torch.jit.TracerWarning)
+                        compiled = torch.jit.trace(
+                            self._module, (inputs,), check_trace=False, strict=False
+                        )
+                compiled_outputs = compiled(inputs)
+        except Exception as error:
+            return self._fall_back(
+                f"Compilation failed ({type(error).__name__}: {error})", outputs
+            )
+        if not _allclose(compiled_outputs, outputs, self.rtol, self.atol):
+            return self._fall_back(
+                "The compiled function does not match the eager one, e.g. because of"
+                " data-dependent control flow",
+                outputs,
+            )
+        self._traces[key] = compiled
+        return compiled_outputs
+
+    def _fall_back(self, reason: str, outputs: TensorType) -> TensorType:
+        warnings.warn(f"{reason}, falling back to eager mode")
+        self.fallback = True
+        return outputs
+
+
+def _allclose(a: TensorType, b: TensorType, rtol: float, atol: float) -> bool:
+    """Whether two (nested lists or tuples of) tensors are close"""
+    if isinstance(a, (list, tuple)):
+        return (
+            isinstance(b, (list, tuple))
+            and len(a) == len(b)
+            and all(_allclose(x, y, rtol, atol) for x, y in zip(a, b))
+        )
+    if not (isinstance(a, torch.Tensor) and isinstance(b, torch.Tensor)):
+        return False
+    if a.shape != b.shape:
+        return False
+    a, b = a.detach(), b.detach()
+    if a.is_floating_point() or b.is_floating_point():
+        return torch.allclose(a.double(), b.double(), rtol=rtol, atol=atol)
+    return torch.equal(a, b)
+
+
 class TorchOperator(Operator):
-    """Class to handle torch operations with a unified API"""
+    """Class to handle torch operations with a unified API
+
+    Args:
+        model (torch.nn.Module): model whose device the tensors are created on. If
+            None, cuda if available else cpu. Defaults to None.
+        dtype (Optional[str]): dtype of the tensors created from NumPy arrays. If
+            None, the "score" dtype of the global dtype policy. Defaults to None.
+    """
 
-    def __init__(self, model: torch.nn.Module = None):
+    def __init__(self, model: torch.nn.Module = None, dtype: Optional[str] = None):
         if model is not None:
             self._device = next(model.parameters()).device
         else:
             self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.dtype = dtype or get_dtype_policy()["score"]
 
     @staticmethod
     def softmax(tensor: Union[torch.Tensor, np.ndarray]) -> torch.Tensor:
@@ -115,6 +248,9 @@ class TorchOperator(Operator):
     def convert_to_numpy(tensor: TensorType) -> np.ndarray:
         if tensor.device != "cpu":
             tensor = tensor.to("cpu")
+        # no bfloat16 NumPy dtype
+        if tensor.dtype == torch.bfloat16:
+            tensor = tensor.float()
         return tensor.detach().numpy()
 
     @staticmethod
@@ -135,6 +271,31 @@ class TorchOperator(Operator):
         inputs.requires_grad_(False)
         return gradients[0]
 
+    @staticmethod
+    def compile(
+        func: Callable,
+        model: Optional[torch.nn.Module] = None,
+        jit_compile: bool = False,
+    ) -> Callable:
+        """Compiles a function of a batch of samples with `torch.jit.trace` (one
+        trace per input shape), or with `torch.compile` if "jit_compile". The
+        compiled function runs under `torch.inference_mode()`, and falls back to
+        "func" with a warning if the compilation fails, e.g. for functions
+        computing gradients.
+
+        Args:
+            func (Callable): function to compile, built with torch operations only.
+            model (Optional[torch.nn.Module]): model called by "func", registered
+                in the traced module so that its parameters are not frozen as
+                constants. Defaults to None.
+            jit_compile (bool): if True, the function is compiled with
+                `torch.compile` rather than traced. Defaults to False.
+
+        Returns:
+            Callable: compiled function
+        """
+        return CompiledFunction(func, model, jit_compile)
+
     @staticmethod
     def stack(tensors: List[TensorType], dim: int = 0) -> TensorType:
         "Stack tensors along a new dimension"
@@ -151,16 +312,27 @@ class TorchOperator(Operator):
         dim = dim or list(range(len(tensor.shape)))
         return torch.mean(tensor, dim, keepdim)
 
+    @staticmethod
+    def sum(tensor: TensorType, dim: int = None, keepdim: bool = False) -> TensorType:
+        "Sum function"
+        dim = list(range(len(tensor.shape))) if dim is None else dim
+        return torch.sum(tensor, dim, keepdim)
+
     @staticmethod
     def flatten(tensor: TensorType) -> TensorType:
         "Flatten function"
         # Flatten the features to 2D (n_batch, n_features)
         return tensor.view(tensor.size(0), -1)
 
-    def from_numpy(self, arr: np.ndarray) -> TensorType:
-        "Convert a NumPy array to a tensor"
-        # TODO change dtype
-        return torch.from_numpy(arr).double().to(self._device)
+    def from_numpy(self, arr: np.ndarray, dtype: Optional[str] = None) -> TensorType:
+        "Convert a NumPy array to a tensor of the operator dtype (or of dtype)"
+        return torch.as_tensor(
+            arr, dtype=getattr(torch, dtype or self.dtype), device=self._device
+        )
+
+    def cast(self, tensor: TensorType, dtype: Optional[str] = None) -> TensorType:
+        "Cast a tensor to the operator dtype (or to dtype)"
+        return tensor.to(getattr(torch, dtype or self.dtype))
 
     @staticmethod
     def transpose(tensor: TensorType) -> TensorType:
@@ -178,3 +350,67 @@ class TorchOperator(Operator):
     def pinv(tensor: TensorType) -> TensorType:
         "Pseudo-inverse function"
         return torch.linalg.pinv(tensor)
+
+    @staticmethod
+    def gather(tensor: TensorType, indices: np.ndarray, dim: int = 0) -> TensorType:
+        "Gather slices of a tensor along a dimension given an array of indices"
+        tensor = torch.as_tensor(tensor)
+        indices = torch.as_tensor(indices, dtype=torch.long, device=tensor.device)
+        return torch.index_select(tensor, dim, indices)
+
+    @staticmethod
+    def logsumexp(
+        tensor: TensorType, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "Log of the sum of exponentials, computed in a numerically stable way"
+        dim = list(range(len(tensor.shape))) if dim is None else dim
+        return torch.logsumexp(tensor, dim, keepdim)
+
+    @staticmethod
+    def topk(
+        tensor: TensorType, k: int, dim: int = -1, largest: bool = True
+    ) -> Tuple[TensorType, TensorType]:
+        "k largest (or smallest) values and their indices, sorted along dim"
+        values, indices = torch.topk(tensor, k, dim=dim, largest=largest)
+        return values, indices
+
+    @staticmethod
+    def einsum(equation: str, *tensors: TensorType) -> TensorType:
+        "Einstein summation"
+        return torch.einsum(equation, *tensors)
+
+    @staticmethod
+    def cdist(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Pairwise euclidean distances between the rows of two 2D tensors"
+        return torch.cdist(tensor_1, tensor_2)
+
+    @staticmethod
+    def l2_normalize(
+        tensor: TensorType, dim: int = -1, eps: float = 1e-10
+    ) -> TensorType:
+        "Divide a tensor by its L2 norm (plus eps) along a dimension"
+        return tensor / (torch.linalg.norm(tensor, dim=dim, keepdim=True) + eps)
+
+    @staticmethod
+    def where(
+        condition: TensorType, tensor_1: TensorType, tensor_2: TensorType
+    ) -> TensorType:
+        "Elements of tensor_1 where condition is True, of tensor_2 elsewhere"
+        return torch.where(condition, tensor_1, tensor_2)
+
+    @staticmethod
+    def cholesky(tensor: TensorType) -> TensorType:
+        "Lower triangular Cholesky factor of a symmetric positive definite matrix"
+        return torch.linalg.cholesky(tensor)
+
+    @staticmethod
+    def solve(tensor_1: TensorType, tensor_2: TensorType) -> TensorType:
+        "Solution X of the linear system tensor_1 @ X = tensor_2"
+        return torch.linalg.solve(tensor_1, tensor_2)
+
+    @staticmethod
+    def quantile(
+        tensor: TensorType, q: float, dim: int = None, keepdim: bool = False
+    ) -> TensorType:
+        "q-th quantile along a dimension (flattened if None), linearly interpolated"
+        return torch.quantile(tensor, q, dim=dim, keepdim=keepdim)
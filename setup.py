@@ -31,7 +31,6 @@ with open(path.join(this_directory, "README.md"), encoding="utf-8") as f:
     long_description = f.read()
 
 requirements = [
-    "faiss_cpu",
     "numpy",
     "scikit_learn",
     "scipy",
@@ -49,6 +48,8 @@ tensorflow_requirements = [
 
 torch_requirements = ["timm", "torch", "torchvision"]
 
+faiss_requirements = ["faiss_cpu"]
+
 dev_requirements = [
     "ipywidgets",
     "mkdocs-jupyter",
@@ -73,6 +74,7 @@ dev_requirements = [
     "torch",
     "torchvision",
     "pandas",
+    "faiss_cpu",
 ]
 
 
@@ -114,5 +116,6 @@ setup(
         "tensorflow": tensorflow_requirements,
         "torch": torch_requirements,
         "docs": docs_requirements,
+        "faiss": faiss_requirements,
     },
 )
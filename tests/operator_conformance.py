@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Backend agnostic test cases checking that the operators implement the same
+primitives as NumPy / scipy. Each backend test module feeds them its operator."""
+import numpy as np
+from scipy.special import logsumexp
+
+
+def _spd_matrix(n: int = 5) -> np.ndarray:
+    a = np.random.RandomState(1).randn(n, n)
+    return a @ a.T + n * np.eye(n)
+
+
+def get_conformance_inputs() -> dict:
+    """Inputs of the conformance cases, as float64 NumPy arrays."""
+    rng = np.random.RandomState(0)
+    return {
+        "x": rng.randn(8, 5),
+        "y": rng.randn(6, 5),
+        "t": rng.randn(3, 4, 5),
+        "a": _spd_matrix(5),
+        "b": rng.randn(5, 3),
+    }
+
+
+# name: (operator call, NumPy reference, names of the inputs)
+CONFORMANCE_CASES = {
+    "logsumexp": (
+        lambda op, x: op.logsumexp(x, 1),
+        lambda x: logsumexp(x, 1),
+        ["x"],
+    ),
+    "logsumexp_all_keepdim": (
+        lambda op, t: op.logsumexp(t, keepdim=True),
+        lambda t: logsumexp(t, keepdims=True),
+        ["t"],
+    ),
+    "topk_values": (
+        lambda op, x: op.topk(x, 3)[0],
+        lambda x: -np.sort(-x, axis=-1)[:, :3],
+        ["x"],
+    ),
+    "topk_indices": (
+        lambda op, x: op.topk(x, 3)[1],
+        lambda x: np.argsort(-x, axis=-1)[:, :3],
+        ["x"],
+    ),
+    "topk_smallest_dim1": (
+        lambda op, t: op.topk(t, 2, dim=1, largest=False)[0],
+        lambda t: np.sort(t, axis=1)[:, :2],
+        ["t"],
+    ),
+    "einsum": (
+        lambda op, x, y: op.einsum("ik,jk->ij", x, y),
+        lambda x, y: np.einsum("ik,jk->ij", x, y),
+        ["x", "y"],
+    ),
+    "einsum_quadratic_form": (
+        lambda op, x, a: op.einsum("ij,jk,ik->i", x, a, x),
+        lambda x, a: np.einsum("ij,jk,ik->i", x, a, x),
+        ["x", "a"],
+    ),
+    "cdist": (
+        lambda op, x, y: op.cdist(x, y),
+        lambda x, y: np.linalg.norm(x[:, None] - y[None], axis=-1),
+        ["x", "y"],
+    ),
+    "l2_normalize": (
+        lambda op, x: op.l2_normalize(x),
+        lambda x: x / (np.linalg.norm(x, axis=-1, keepdims=True) + 1e-10),
+        ["x"],
+    ),
+    "l2_normalize_dim0": (
+        lambda op, t: op.l2_normalize(t, dim=0),
+        lambda t: t / (np.linalg.norm(t, axis=0, keepdims=True) + 1e-10),
+        ["t"],
+    ),
+    "where": (
+        lambda op, x: op.where(x > 0, x, 0 * x),
+        lambda x: np.where(x > 0, x, 0 * x),
+        ["x"],
+    ),
+    "cholesky": (
+        lambda op, a: op.cholesky(a),
+        lambda a: np.linalg.cholesky(a),
+        ["a"],
+    ),
+    "solve": (
+        lambda op, a, b: op.solve(a, b),
+        lambda a, b: np.linalg.solve(a, b),
+        ["a", "b"],
+    ),
+    "quantile": (
+        lambda op, x: op.quantile(x, 0.3, dim=1),
+        lambda x: np.quantile(x, 0.3, axis=1),
+        ["x"],
+    ),
+    "quantile_keepdim": (
+        lambda op, t: op.quantile(t, 0.75, dim=-2, keepdim=True),
+        lambda t: np.quantile(t, 0.75, axis=-2, keepdims=True),
+        ["t"],
+    ),
+    "quantile_all": (
+        lambda op, t: op.quantile(t, 0.5),
+        lambda t: np.quantile(t, 0.5),
+        ["t"],
+    ),
+}
@@ -247,3 +247,23 @@ def test_data_handler_full_pipeline(x_shape, num_samples, num_labels, one_hot):
         tf.TensorShape([64, num_labels]) if one_hot else tf.TensorShape([64])
     )
     assert batch[2].shape == tf.TensorShape([64])
+
+
+def test_slice_batched_dataset():
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples
+    ).batch(16)
+    handler = TFDataHandler()
+
+    assert handler.get_batched_dataset_length(data) == samples
+
+    data_slice = handler.slice_batched_dataset(data, 30, 70)
+    batches = [batch[0] for batch in data_slice]
+    assert handler.get_batched_dataset_length(data_slice) == 40
+    assert batches[0].shape[0] == 16
+    x = tf.concat([batch[0] for batch in data], axis=0)
+    assert tf.reduce_all(tf.concat(batches, axis=0) == x[30:70])
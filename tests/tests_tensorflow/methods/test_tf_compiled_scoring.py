@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+
+from oodeel.methods import Cascade
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from tests.tests_tensorflow import generate_data
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize(
+    "method, kwargs, jit_compile",
+    [
+        (MLS, dict(), False),
+        (MLS, dict(), True),
+        (Energy, dict(), False),
+        (Energy, dict(), True),
+        (ODIN, dict(temperature=100, noise=0.001), False),
+        (VIM, dict(princ_dims=0.5), False),
+        (VIM, dict(princ_dims=0.5), True),
+        (DKNN, dict(nearest=3, projection="pca", projection_dim=4), False),
+        (Mahalanobis, dict(eps=0.0), False),
+        (Mahalanobis, dict(eps=0.0), True),
+        (Mahalanobis, dict(eps=0.002), False),
+        (Mahalanobis, dict(eps=0.0, nearest_center=True), False),
+        (Mahalanobis, dict(eps=0.0, output_layers_id=[-2, -1]), False),
+    ],
+)
+def test_compiled_scoring(method, kwargs, jit_compile):
+    """
+    Test that the compiled scoring gives the same scores as the eager one
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, (x, y) if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(x)
+
+    oodmodel.set_compiled_scoring(jit_compile=jit_compile)
+    scores_compiled = oodmodel.score(x)
+    assert scores_compiled.shape == (samples,)
+    np.testing.assert_allclose(scores_compiled, scores, rtol=1e-4, atol=1e-4)
+
+    oodmodel.set_compiled_scoring(False)
+    assert oodmodel._compiled_forward is None
+    np.testing.assert_allclose(oodmodel.score(x), scores, rtol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [(VIM, dict(princ_dims=0.5)), (Mahalanobis, dict(eps=0.0))],
+)
+def test_compiled_scoring_partial_fit(method, kwargs):
+    """
+    Test that the compiled scoring is traced again when the fitted state changes
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=100, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    oodmodel = method(**kwargs).set_compiled_scoring()
+    oodmodel.fit(model, (x[:50], y[:50]))
+    scores_before = oodmodel.score(x)
+    oodmodel.partial_fit((x[50:], y[50:]))
+    scores_after = oodmodel.score(x)
+    assert not np.allclose(scores_after, scores_before)
+
+    eager = method(**kwargs)
+    eager.fit(model, (x[:50], y[:50]))
+    eager.partial_fit((x[50:], y[50:]))
+    np.testing.assert_allclose(scores_after, eager.score(x), rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "oodmodel",
+    [
+        Energy(),
+        DKNN(nearest=3),
+        Mahalanobis(eps=0.0, nearest_center=True),
+    ],
+)
+def test_compiled_pipelined_scoring(oodmodel):
+    """
+    Test the compiled scoring in pipelined mode
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 10)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    oodmodel.fit(model, data_x if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(data_x)
+    oodmodel.set_compiled_scoring()
+    scores_pipelined = oodmodel.score(data_x, pipelined=True, n_workers=2)
+
+    assert scores_pipelined.shape == (samples,)
+    assert np.allclose(scores_pipelined, scores, atol=1e-4)
+
+
+def test_compiled_scoring_unsplit():
+    """Test that the oodmodels which do not split their scoring cannot be compiled"""
+    cascade = Cascade(MLS(), ODIN(), band=(-1.0, 1.0), standardize=False)
+    with pytest.raises(NotImplementedError):
+        cascade.set_compiled_scoring()
+    # the stages can still be compiled on their own
+    cascade.first_stage.set_compiled_scoring()
@@ -20,6 +20,8 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import numpy as np
+
 from oodeel.methods import DKNN
 from tests.tests_tensorflow import generate_data
 from tests.tests_tensorflow import generate_data_tf
@@ -52,3 +54,29 @@ def test_dknn():
     scores = dknn.score(data)
 
     assert scores.shape == (100,)
+
+
+def test_dknn_score_k():
+    """
+    Test DKNN.score_k
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(nearest=1)
+    dknn.fit(model, fit_dataset=data)
+    scores_k = dknn.score_k(data, [1, 2, 4])
+    assert scores_k.shape == (samples, 3)
+    for i, k in enumerate([1, 2, 4]):
+        dknn.nearest = k
+        assert np.allclose(scores_k[:, i], dknn.score(data))
+
+    scores_mean = dknn.score_k(data, [1, 4], reduction="mean")
+    assert np.allclose(scores_mean[:, 0], scores_k[:, 0])
+    assert np.all(scores_mean[:, 1] <= scores_k[:, 2] + 1e-6)
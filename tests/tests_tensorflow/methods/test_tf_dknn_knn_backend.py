@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize("max_references", [None, 40])
+def test_dknn_numpy_backend(max_references):
+    """
+    Test DKNN with the NumPy kNN backend
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 4)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(nearest=3, knn_backend="faiss")
+    dknn.fit(model, data_x)
+    dknn_numpy = DKNN(nearest=3, knn_backend="numpy", max_references=max_references)
+    dknn_numpy.fit(model, data_x)
+    scores = dknn_numpy.score(data_x)
+    if max_references is None:
+        assert np.allclose(scores, dknn.score(data_x), atol=1e-5)
+    else:
+        assert dknn_numpy.n_references <= max_references
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn_numpy.save(path)
+        for mmap in [True, False]:
+            loaded = DKNN(nearest=3).load(path, model, mmap=mmap)
+            assert loaded.knn_backend.name == "numpy"
+            assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+def test_dknn_on_disk():
+    """
+    Test DKNN with indexes stored on disk
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 200
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 8)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(nearest=3)
+    dknn.fit(model, data_x)
+    scores = dknn.score(data_x)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index_dir = os.path.join(tmpdir, "index")
+        dknn_disk = DKNN(nearest=3, index_dir=index_dir, shard_size=8)
+        dknn_disk.fit(model, data_x)
+        assert sum(index.ntotal for index in dknn_disk.index.values()) == samples
+        assert len(os.listdir(index_dir)) > 0
+        assert np.allclose(dknn_disk.score(data_x), scores, atol=1e-5)
+
+        path = os.path.join(tmpdir, "dknn")
+        dknn_disk.save(path)
+        loaded = DKNN(nearest=3).load(path, model, mmap=True)
+        assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
+
+
+def test_dknn_on_disk_reduction():
+    """
+    Test that DKNN refuses to reduce a reference set stored on disk
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(AssertionError, match="reduced"):
+            DKNN(reduction="random", index_dir=tmpdir)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize(
+    "projection, expected_dim",
+    [("pca", 16), ("random", 16), ("sparse_random", 16), ("gap", 4)],
+)
+def test_dknn_projection(projection, expected_dim):
+    """
+    Test DKNN with a projection of conv features
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(output_layers_id=[-4], projection=projection, projection_dim=16, seed=0)
+    dknn.fit(model, data_x)
+    assert all(index.d == expected_dim for index in dknn.index.values())
+    if projection in ["random", "sparse_random"]:
+        # the random projection only depends on the seed
+        other = DKNN(
+            output_layers_id=[-4], projection=projection, projection_dim=16, seed=0
+        )
+        other.fit(model, data_x)
+        assert np.array_equal(other._projection_matrix, dknn._projection_matrix)
+    scores = dknn.score(data_x)
+    assert scores.shape == (samples,)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn.save(path)
+        loaded = DKNN(output_layers_id=[-4], projection=projection)
+        loaded.load(path, model)
+        assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
+
+
+def test_dknn_pca_whitening():
+    """
+    Test that the PCA projection whitens the ID features
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(output_layers_id=[-4], projection="pca", projection_dim=16)
+    dknn.fit(model, data_x)
+    for x, _ in data_x:
+        projected = dknn._project(dknn.feature_extractor.predict(x)).numpy()
+    assert np.allclose(np.mean(projected, axis=0), 0.0, atol=1e-3)
+    assert np.allclose(np.cov(projected.T, bias=True), np.eye(16), atol=1e-3)
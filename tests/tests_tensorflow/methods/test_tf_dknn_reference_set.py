@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize("eviction", ["fifo", "reservoir"])
+def test_bounded_dknn(eviction):
+    """
+    Test DKNN with a bounded reference set
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 4)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(nearest=1, max_references=30, eviction=eviction)
+    dknn.fit(model, data_x)
+    assert sum(index.ntotal for index in dknn.index.values()) <= 30
+    dknn.partial_fit(data_x)
+    assert sum(index.ntotal for index in dknn.index.values()) <= 30
+    scores = dknn.score(data_x)
+    assert scores.shape == (samples,)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn.save(path)
+        for mmap in [True, False]:
+            loaded = DKNN(nearest=1, max_references=30, eviction=eviction)
+            loaded.load(path, model, mmap=mmap)
+            assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
+
+
+def test_bounded_dknn_too_many_classes():
+    """
+    Test that a bounded reference set refuses more classes than max_references,
+    and that the reservoir sampling only depends on the seed
+    """
+    vectors = np.random.rand(100, 4).astype(np.float32)
+    references = []
+    for _ in range(2):
+        dknn = DKNN(max_references=2, eviction="reservoir", seed=0)
+        dknn._add_references(0, vectors[:50])
+        dknn._add_references(1, vectors[50:])
+        with pytest.raises(ValueError, match="max_references"):
+            dknn._add_references(2, vectors[:1])
+        assert dknn.n_references <= 2
+        references.append(dknn.get_references())
+    for class_label in [0, 1]:
+        assert np.array_equal(references[0][class_label], references[1][class_label])
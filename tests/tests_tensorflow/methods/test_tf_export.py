@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from tests.tests_tensorflow import generate_data
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (MLS, dict()),
+        (MLS, dict(output_activation="softmax")),
+        (Energy, dict()),
+        (VIM, dict(princ_dims=0.5)),
+        (Mahalanobis, dict(eps=0.0)),
+        (Mahalanobis, dict(eps=0.0, rank=8)),
+    ],
+)
+def test_export(method, kwargs):
+    """
+    Test that the exported SavedModel outputs the logits of the model and the
+    scores of the oodmodel
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, (x, y) if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(x)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "exported")
+        oodmodel.export(path)
+        serve = tf.saved_model.load(path).signatures["serving_default"]
+        outputs = serve(inputs=tf.convert_to_tensor(x[:37]))
+
+    assert set(outputs.keys()) == {"logits", "ood_score"}
+    np.testing.assert_allclose(outputs["logits"], model(x[:37]), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(outputs["ood_score"], scores[:37], rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "oodmodel",
+    [
+        ODIN(),
+        Mahalanobis(eps=0.002),
+        Mahalanobis(eps=0.0, nearest_center=True),
+        DKNN(nearest=3),
+    ],
+)
+def test_export_unsupported(oodmodel):
+    """
+    Test that the oodmodels not computing their scores in the model backend cannot
+    be exported
+    """
+    x, y = generate_data(x_shape=(32, 32, 3), num_labels=10, samples=20, one_hot=False)
+    model = generate_model(input_shape=(32, 32, 3), output_shape=10)
+    oodmodel.fit(model, (x, y) if oodmodel.requires_to_fit_dataset else None)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        with pytest.raises(NotImplementedError):
+            oodmodel.export(os.path.join(tmpdirname, "exported"))
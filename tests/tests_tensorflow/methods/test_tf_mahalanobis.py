@@ -20,6 +20,12 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import tempfile
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
 from oodeel.methods import Mahalanobis
 from tests.tests_tensorflow import generate_data
 from tests.tests_tensorflow import generate_data_tf
@@ -45,3 +51,146 @@ def test_mahalanobis():
     scores = mahalanobis.score(data)
 
     assert scores.shape == (100,)
+
+
+@pytest.mark.parametrize("residual", ["isotropic", "diagonal"])
+def test_mahalanobis_low_rank(residual):
+    """
+    Test Mahalanobis with a low-rank plus diagonal covariance model
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    mahalanobis = Mahalanobis(eps=0)
+    mahalanobis.fit(model, fit_dataset=data)
+    scores = mahalanobis.score(data)
+    dim = mahalanobis._mus[mahalanobis._labels_indexes[0]].shape[0]
+
+    for rank in [8, dim - 1]:
+        mahalanobis_low_rank = Mahalanobis(rank=rank, residual=residual)
+        mahalanobis_low_rank.fit(model, fit_dataset=data)
+        scores_low_rank = mahalanobis_low_rank.score(data)
+        assert scores_low_rank.shape == (100,)
+        assert np.all(np.isfinite(scores_low_rank))
+        assert mahalanobis_low_rank._get_precision()[1].shape == (dim, rank)
+
+    # with an exact sketch, the isotropic residual recovers the full covariance
+    if residual == "isotropic":
+        mahalanobis_low_rank.eps = 0
+        scores_low_rank = mahalanobis_low_rank.score(data)
+        assert np.allclose(scores_low_rank, scores, rtol=1e-3)
+
+
+@pytest.mark.parametrize("rank, eps", [(None, 0), (None, 0.02), (8, 0.02)])
+def test_mahalanobis_nearest_center(rank, eps):
+    """
+    Test Mahalanobis with a nearest center search in the whitened feature space
+    """
+    np.random.seed(0)
+    tf.random.set_seed(0)
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    mahalanobis = Mahalanobis(eps=eps, rank=rank)
+    mahalanobis.fit(model, fit_dataset=data)
+    for knn_backend in ["faiss", "numpy"]:
+        mahalanobis_nc = Mahalanobis(
+            eps=eps, rank=rank, nearest_center=True, knn_backend=knn_backend
+        )
+        mahalanobis_nc.fit(model, fit_dataset=data)
+        # same sketch for the low-rank model
+        mahalanobis_nc._set_fitted_state(mahalanobis._get_fitted_state())
+        scores = mahalanobis_nc.score(data)
+        assert np.allclose(scores, mahalanobis.score(data), rtol=1e-3, atol=1e-2)
+
+
+@pytest.mark.parametrize("pooling", ["gap", "flatten"])
+def test_mahalanobis_multi_layer(pooling):
+    """
+    Test Mahalanobis on several output layers, one of them being a feature map
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+    ood_data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    mahalanobis = Mahalanobis(output_layers_id=[1, -2], pooling=pooling, eps=0.002)
+    mahalanobis.fit(model, fit_dataset=data)
+    scores = mahalanobis.score(data)
+    assert scores.shape == (100,)
+    assert np.all(np.isfinite(scores))
+    dims = [4 if pooling == "gap" else 15 * 15 * 4, num_labels]
+    for layer_model, dim in zip(mahalanobis._layer_models, dims):
+        assert layer_model._mus[layer_model._labels_indexes[0]].shape == (dim,)
+
+    layer_weights = mahalanobis.fit_layer_weights(data, ood_data)
+    assert layer_weights.shape == (2,)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        mahalanobis.save(tmpdirname)
+        mahalanobis_loaded = Mahalanobis(
+            output_layers_id=[1, -2], pooling=pooling, eps=0.002
+        ).load(tmpdirname, model)
+        assert np.allclose(
+            mahalanobis_loaded.score(data), mahalanobis.score(data), rtol=1e-4
+        )
+
+
+@pytest.mark.parametrize(
+    "fit_dtype, score_dtype, rtol",
+    [
+        ("float64", "float32", 1e-3),
+        ("float32", "float32", 1e-3),
+        ("float64", "float16", 5e-2),
+        ("float32", "bfloat16", 2e-1),
+    ],
+)
+def test_mahalanobis_dtype_policy(fit_dtype, score_dtype, rtol):
+    """
+    Test the numerical tolerance of Mahalanobis scores with lower precision dtypes
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 200
+
+    data = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    mahalanobis = Mahalanobis(eps=0).set_dtype_policy(score="float64")
+    mahalanobis.fit(model, fit_dataset=data)
+    scores = mahalanobis.score(data)
+
+    mahalanobis_low = Mahalanobis(eps=0).set_dtype_policy(
+        fit=fit_dtype, score=score_dtype
+    )
+    mahalanobis_low.fit(model, fit_dataset=data)
+    assert mahalanobis_low._get_fitted_state()["mus"].dtype == fit_dtype
+    assert mahalanobis_low._get_precision()[0].dtype == score_dtype
+    scores_low = mahalanobis_low.score(data)
+    assert np.all(np.isfinite(scores_low))
+    assert np.allclose(scores_low, scores, rtol=rtol)
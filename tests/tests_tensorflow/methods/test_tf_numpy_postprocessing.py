@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from oodeel.utils import NumpyOperator
+from tests.tests_tensorflow import generate_data
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (Mahalanobis, dict(eps=0.0)),
+        (Mahalanobis, dict(eps=0.0, pooling="gap", output_layers_id=[1])),
+        (VIM, dict(princ_dims=0.5)),
+        (DKNN, dict(nearest=3, projection="pca", projection_dim=4)),
+        (Energy, dict()),
+        (MLS, dict()),
+    ],
+)
+def test_numpy_postprocessing(method, kwargs):
+    """
+    Test that the scores are the same with the post-processing run on NumPy
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    scores = {}
+    for backend in [None, "numpy"]:
+        oodmodel = method(**kwargs).set_dtype_policy(score="float64")
+        oodmodel.set_postprocessing_backend(backend)
+        oodmodel.fit(model, (x, y) if oodmodel.requires_to_fit_dataset else None)
+        scores[backend] = oodmodel.score(x)
+    assert isinstance(oodmodel.op, NumpyOperator)
+    np.testing.assert_allclose(scores["numpy"], scores[None], rtol=1e-6, atol=1e-8)
+
+
+def test_numpy_postprocessing_gradients():
+    """Test that input perturbation is not available on NumPy"""
+    with pytest.raises(NotImplementedError):
+        ODIN().set_postprocessing_backend("numpy")
+
+    x, y = generate_data(x_shape=(32, 32, 3), num_labels=10, samples=20, one_hot=False)
+    oodmodel = Mahalanobis(eps=0.002).set_postprocessing_backend("numpy")
+    oodmodel.fit(generate_model(input_shape=(32, 32, 3), output_shape=10), (x, y))
+    with pytest.raises(NotImplementedError):
+        oodmodel.score(x)
+
+
+def test_model_free():
+    """
+    Test that model-free oodmodels fitted on the features give the same scores as
+    the oodmodels extracting them
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+    logits = model(x).numpy()
+
+    for method, kwargs in [
+        (Mahalanobis, dict(eps=0.0)),
+        (DKNN, dict(nearest=3)),
+        (Energy, dict()),
+    ]:
+        oodmodel = method(**kwargs).set_dtype_policy(score="float64")
+        fit_dataset = (x, y) if oodmodel.requires_to_fit_dataset else None
+        oodmodel.fit(model, fit_dataset)
+        features = oodmodel.feature_extractor.predict_tensor(x).numpy()
+        features_in = (features, logits) if method is DKNN else features
+
+        model_free = method(**kwargs).set_dtype_policy(score="float64")
+        model_free.fit(None, fit_dataset and (features, y))
+        np.testing.assert_allclose(
+            model_free.score_features(features_in), oodmodel.score(x), rtol=1e-5
+        )
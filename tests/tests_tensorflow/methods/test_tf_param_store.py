@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+
+from oodeel.methods import DKNN
+from oodeel.methods import Mahalanobis
+from oodeel.methods import VIM
+from tests.tests_tensorflow import generate_data
+from tests.tests_tensorflow import generate_model
+
+
+def _count_transfers(oodmodel):
+    """Counts the NumPy arrays converted to tensors by the operator of oodmodel"""
+    transfers = []
+    from_numpy = oodmodel.op.from_numpy
+
+    def counted_from_numpy(*args, **kwargs):
+        transfers.append(args[0].shape)
+        return from_numpy(*args, **kwargs)
+
+    oodmodel.op.from_numpy = counted_from_numpy
+    return transfers
+
+
+def test_param_store():
+    """
+    Test that the fitted state is converted to tensors once, and again after a refit
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    x, y = generate_data(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    for oodmodel in [
+        Mahalanobis(eps=0.002),
+        Mahalanobis(eps=0.002, rank=8, nearest_center=True),
+        VIM(princ_dims=0.5),
+        DKNN(projection="pca", projection_dim=16),
+    ]:
+        oodmodel.fit(model, (x, y))
+        scores = oodmodel.score(x)
+        transfers = _count_transfers(oodmodel)
+
+        # steady state scoring
+        assert np.allclose(oodmodel.score(x), scores)
+        assert transfers == []
+
+        # the parameters are converted again after a refit
+        if not isinstance(oodmodel, DKNN):
+            oodmodel.partial_fit((x[:10], y[:10]))
+            oodmodel.score(x)
+            assert len(transfers) > 0
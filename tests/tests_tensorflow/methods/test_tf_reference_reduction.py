@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+
+from oodeel.eval.reference_size import reference_size_report
+from oodeel.methods import DKNN
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+@pytest.mark.parametrize("reduction", ["random", "kmeans", "kcenter", "dedup"])
+def test_dknn_reduction(reduction):
+    """
+    Test DKNN with a reduced reference set
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_tf(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    ).batch(samples // 2)
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    dknn = DKNN(reduction=reduction, reduction_size=2, seed=0)
+    dknn.fit(model, data_x)
+    n_references = sum(index.ntotal for index in dknn.index.values())
+    if reduction == "dedup":
+        assert n_references == samples
+    else:
+        assert n_references <= 2 * num_labels
+    scores = dknn.score(data_x)
+    assert scores.shape == (samples,)
+
+    # the reduction only depends on the seed
+    dknn.fit(model, data_x)
+    assert np.allclose(dknn.score(data_x), scores)
+
+
+def test_reference_size_report():
+    """
+    Test the report of DKNN AUROC versus reference set size
+    """
+    input_shape = (32, 32, 3)
+    num_labels = 10
+    samples = 100
+
+    data_fit, data_id, data_ood = [
+        generate_data_tf(
+            x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+        ).batch(samples // 2)
+        for _ in range(3)
+    ]
+    model = generate_model(input_shape=input_shape, output_shape=num_labels)
+
+    report = reference_size_report(
+        model, data_fit, data_id, data_ood, sizes=[0.5, 0.2], seed=0
+    )
+    assert len(report) == 1 + 3 * 2 + 1
+    assert report[0]["strategy"] is None
+    assert report[0]["n_references"] == samples
+    for row in report[1:]:
+        assert row["n_references"] <= samples
+        assert np.isclose(row["compression"], samples / row["n_references"])
+        assert 0.0 <= row["auroc"] <= 1.0
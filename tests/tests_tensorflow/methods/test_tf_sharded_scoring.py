@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+
+from oodeel.methods import Mahalanobis
+from oodeel.methods import VIM
+from tests.tests_tensorflow import generate_data_tf
+from tests.tests_tensorflow import generate_model
+
+
+def test_sharded_scoring():
+    """
+    Test OODModel.score_sharded with spawned workers rebuilding the oodmodel from
+    its saved state
+    """
+    input_shape = (32, 32, 3)
+    data = generate_data_tf(input_shape, 10, 50, one_hot=False).batch(16)
+    model = generate_model(input_shape=input_shape, output_shape=10)
+
+    for oodmodel in [VIM(princ_dims=0.5), Mahalanobis(eps=0.0)]:
+        oodmodel.fit(model, data)
+        scores = oodmodel.score(data)
+        scores_sharded = oodmodel.score_sharded(data, n_workers=2)
+
+        assert scores_sharded.shape == (50,)
+        assert np.allclose(scores_sharded, scores, atol=1e-4)
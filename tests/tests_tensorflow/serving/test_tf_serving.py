@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from oodeel.methods import MLS
+from oodeel.serving import MicroBatcher
+from tests.tests_tensorflow import generate_data
+from tests.tests_tensorflow import generate_model
+
+
+def test_micro_batcher():
+    """
+    Test MicroBatcher
+    """
+    input_shape = (32, 32, 3)
+    samples = 40
+
+    data_x, _ = generate_data(x_shape=input_shape, samples=samples, one_hot=False)
+    model = generate_model(input_shape=input_shape, output_shape=10)
+    mls = MLS()
+    mls.fit(model)
+    expected = mls.score(data_x)
+
+    with MicroBatcher(mls, max_batch_size=8, max_wait_ms=50) as batcher:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            scores = list(executor.map(batcher.score, [x[None] for x in data_x]))
+        metrics = batcher.metrics()
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+    assert metrics["n_requests"] == samples
+    assert max(metrics["batch_size_histogram"]) <= 8
+
+
+def test_micro_batcher_mixed_shapes():
+    """
+    Test that requests without batch dimension are rejected, and that a request
+    with another sample shape is not batched with the others
+    """
+    input_shape = (32, 32, 3)
+    samples = 8
+    data_x, _ = generate_data(x_shape=input_shape, samples=samples, one_hot=False)
+    model = generate_model(input_shape=input_shape, output_shape=10)
+    mls = MLS()
+    mls.fit(model)
+    expected = mls.score(data_x)
+
+    with MicroBatcher(mls, max_batch_size=64, max_wait_ms=200) as batcher:
+        with pytest.raises(ValueError):
+            batcher.submit(5.0)
+        futures = [batcher.submit(x[None]) for x in data_x[: samples // 2]]
+        bad_future = batcher.submit(data_x[:1, :16, :16])
+        futures += [batcher.submit(x[None]) for x in data_x[samples // 2 :]]
+        scores = [future.result(timeout=30) for future in futures]
+        with pytest.raises(Exception):
+            bad_future.result(timeout=30)
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+
+
+def test_micro_batcher_batch_cap():
+    """
+    Test that multi-sample requests never make a micro-batch exceed max_batch_size,
+    except for a single oversized request scored alone, and that requests are
+    rejected once the micro-batcher is stopped
+    """
+    input_shape = (32, 32, 3)
+    data_x, _ = generate_data(x_shape=input_shape, samples=32, one_hot=False)
+    model = generate_model(input_shape=input_shape, output_shape=10)
+    mls = MLS()
+    mls.fit(model)
+    expected = mls.score(data_x)
+
+    with MicroBatcher(mls, max_batch_size=8, max_wait_ms=200) as batcher:
+        futures = [batcher.submit(data_x[i : i + 5]) for i in range(0, 20, 5)]
+        futures.append(batcher.submit(data_x[20:32]))
+        scores = [future.result(timeout=30) for future in futures]
+        metrics = batcher.metrics()
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+    assert metrics["batch_size_histogram"] == {5: 4, 12: 1}
+    with pytest.raises(RuntimeError):
+        batcher.submit(data_x[:1])
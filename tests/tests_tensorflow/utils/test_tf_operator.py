@@ -20,9 +20,15 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import numpy as np
+import pytest
 import tensorflow as tf
 
+from oodeel.utils import get_dtype_policy
+from oodeel.utils import set_dtype_policy
 from oodeel.utils.tf_operator import TFOperator
+from tests.operator_conformance import CONFORMANCE_CASES
+from tests.operator_conformance import get_conformance_inputs
 
 
 def test_gradient():
@@ -38,3 +44,42 @@ def test_gradient():
 
     assert tuple(gradients.shape) == input_shape
     assert tf.reduce_all(gradients == tf.ones(input_shape))
+
+
+def test_dtype_policy():
+    """Test the dtype of the tensors created by the operator."""
+    array = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+    assert TFOperator().from_numpy(array).dtype == tf.float32
+    tf_operator = TFOperator(dtype="float16")
+    assert tf_operator.from_numpy(array).dtype == tf.float16
+    assert tf_operator.from_numpy(array, "float64").dtype == tf.float64
+    tensor = tf_operator.cast(tf.ones(2), "bfloat16")
+    assert tensor.dtype == tf.bfloat16
+    assert tf_operator.convert_to_numpy(tensor).dtype == np.float32
+
+    policy = get_dtype_policy()
+    try:
+        set_dtype_policy(score="float64")
+        assert TFOperator().from_numpy(array).dtype == tf.float64
+        with pytest.raises(NotImplementedError):
+            set_dtype_policy(fit="float16")
+    finally:
+        set_dtype_policy(**policy)
+    assert get_dtype_policy() == policy
+
+
+@pytest.mark.parametrize("case", list(CONFORMANCE_CASES.keys()))
+def test_conformance(case):
+    """Test the operator primitives against their NumPy / scipy counterparts."""
+    op_fn, np_fn, input_names = CONFORMANCE_CASES[case]
+    inputs = get_conformance_inputs()
+    arrays = [inputs[name] for name in input_names]
+
+    tf_operator = TFOperator(dtype="float64")
+    tensors = [tf_operator.from_numpy(array) for array in arrays]
+    output = tf_operator.convert_to_numpy(op_fn(tf_operator, *tensors))
+    expected = np_fn(*arrays)
+
+    assert output.shape == np.shape(expected)
+    np.testing.assert_allclose(output, expected, rtol=1e-6, atol=1e-8)
@@ -21,6 +21,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 from .tools_torch import ComplexNet
+from .tools_torch import export_onnx
 from .tools_torch import generate_data
 from .tools_torch import generate_data_torch
 from .tools_torch import named_sequential_model
@@ -234,3 +234,23 @@ def test_data_handler_full_pipeline(x_shape, num_samples, num_labels, one_hot):
         torch.Size([64, num_labels]) if one_hot else torch.Size([64])
     )
     assert batch[2].shape == torch.Size([64])
+
+
+def test_slice_batched_dataset():
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    data = generate_data_torch(
+        x_shape=input_shape, num_labels=num_labels, samples=samples
+    )
+    loader = torch.utils.data.DataLoader(data, batch_size=16)
+    handler = TorchDataHandler()
+
+    assert handler.get_batched_dataset_length(loader) == samples
+
+    loader_slice = handler.slice_batched_dataset(loader, 30, 70)
+    batches = [batch[0] for batch in loader_slice]
+    assert handler.get_batched_dataset_length(loader_slice) == 40
+    assert batches[0].shape[0] == 16
+    assert torch.all(torch.cat(batches) == data.tensors[0][30:70])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+
+import numpy as np
+from torch.utils.data import DataLoader
+from torch.utils.data import Dataset
+
+from oodeel.methods import Energy
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def test_async_scoring():
+    """
+    Test OODModel.ascore, OODModel.aisood and OODModel.ascore_iter
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 4)
+    model = ComplexNet()
+
+    energy = Energy()
+    energy.fit(model)
+    expected = energy.score(data_x)
+
+    async def run():
+        scores = await energy.ascore(data_x, max_pending=1)
+        oodness = await energy.aisood(data_x, threshold=np.median(expected))
+        batches = [s async for s in energy.ascore_iter(data_x, max_pending=3)]
+        tensor_scores = await energy.ascore(dataset.tensors[0])
+        return scores, oodness, batches, tensor_scores
+
+    scores, oodness, batches, tensor_scores = asyncio.run(run())
+
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert oodness.shape == (100,) and oodness.dtype == bool
+    assert len(batches) == 4
+    assert np.allclose(np.concatenate(batches), expected, atol=1e-5)
+    assert np.allclose(tensor_scores, expected, atol=1e-5)
+
+
+def test_async_scoring_prefetch():
+    """
+    Test that OODModel.ascore_iter loads the next batch while the previous one is
+    scored and yielded, even with max_pending=1
+    """
+    dataset = generate_data_torch((3, 32, 32), 10, 8, one_hot=False)
+    loaded = []
+
+    class _RecordingDataset(Dataset):
+        def __len__(self):
+            return len(dataset)
+
+        def __getitem__(self, i):
+            loaded.append(i)
+            return dataset[i]
+
+    data_x = DataLoader(_RecordingDataset(), batch_size=2)
+    energy = Energy()
+    energy.fit(ComplexNet())
+
+    async def run():
+        n_loaded = []
+        async for _ in energy.ascore_iter(data_x, max_pending=1):
+            await asyncio.sleep(0.2)
+            n_loaded.append(len(loaded))
+        return n_loaded
+
+    # the next batch is loaded while the consumer processes the current one
+    assert asyncio.run(run()) == [4, 6, 8, 8]
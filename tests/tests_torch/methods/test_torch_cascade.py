@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import Cascade
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def test_cascade():
+    """
+    Test Cascade
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_torch(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    data_x = DataLoader(data_x, batch_size=samples // 2)
+    model = ComplexNet()
+
+    mls = MLS()
+    mls.fit(model)
+    mls_scores = mls.score(data_x)
+    band = tuple(np.quantile(mls_scores, [0.25, 0.75]))
+
+    cascade = Cascade(MLS(), ODIN(), band=band, standardize=False)
+    cascade.fit(model)
+    scores = cascade.score(data_x)
+
+    assert scores.shape == (100,)
+    escalated = (mls_scores >= band[0]) & (mls_scores <= band[1])
+    assert np.allclose(scores[~escalated], mls_scores[~escalated])
+    assert cascade.stats["n_samples"] == 100
+    assert cascade.stats["n_escalated"] == np.sum(escalated)
+
+    # standardization is the default, and requires a fit dataset
+    cascade = Cascade(MLS(), ODIN(), band=band)
+    with pytest.raises(AssertionError):
+        cascade.fit(model)
+    cascade.fit(model, data_x)
+    scores = cascade.score(data_x)
+
+    assert scores.shape == (100,)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from oodeel.methods import Cascade
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from oodeel.utils import TorchOperator
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (MLS, dict()),
+        (Energy, dict()),
+        (VIM, dict(princ_dims=0.5)),
+        (DKNN, dict(nearest=3, projection="pca", projection_dim=16)),
+        (Mahalanobis, dict(eps=0.0)),
+        (Mahalanobis, dict(eps=0.0, nearest_center=True)),
+        (
+            Mahalanobis,
+            dict(
+                eps=0.0,
+                pooling="gap",
+                output_layers_id=["feature_extractor.relu1", "feature_extractor.relu2"],
+            ),
+        ),
+    ],
+)
+def test_compiled_scoring(method, kwargs):
+    """
+    Test that the traced scoring gives the same scores as the eager one, with one
+    trace per batch shape
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=30)
+    model = ComplexNet()
+
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, data_x if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(data_x)
+
+    oodmodel.set_compiled_scoring()
+    scores_compiled = oodmodel.score(data_x)
+    assert scores_compiled.shape == (samples,)
+    np.testing.assert_allclose(scores_compiled, scores, rtol=1e-4, atol=1e-4)
+    # batches of 30 samples and a last batch of 10 samples
+    assert not oodmodel._compiled_forward.fallback
+    assert len(oodmodel._compiled_forward._traces) == 2
+
+    scores_pipelined = oodmodel.score(data_x, pipelined=True, n_workers=2)
+    np.testing.assert_allclose(scores_pipelined, scores, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [(ODIN, dict(temperature=100, noise=0.001)), (Mahalanobis, dict(eps=0.002))],
+)
+def test_compiled_scoring_fallback(method, kwargs):
+    """
+    Test that the methods computing gradients fall back to the eager scoring
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 40
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, data_x if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(data_x)
+
+    oodmodel.set_compiled_scoring()
+    with pytest.warns(UserWarning, match="falling back to eager mode"):
+        scores_compiled = oodmodel.score(data_x)
+    assert oodmodel._compiled_forward.fallback
+    np.testing.assert_allclose(scores_compiled, scores, rtol=1e-5)
+
+
+def test_compiled_scoring_partial_fit():
+    """
+    Test that the compiled scoring is traced again when the fitted state changes
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+
+    x, y = generate_data_torch(input_shape, num_labels, 100, one_hot=False).tensors
+    model = ComplexNet()
+
+    oodmodel = VIM(princ_dims=0.5).set_compiled_scoring()
+    oodmodel.fit(model, (x[:50], y[:50]))
+    scores_before = oodmodel.score(x)
+    oodmodel.partial_fit((x[50:], y[50:]))
+    scores_after = oodmodel.score(x)
+    assert not np.allclose(scores_after, scores_before)
+
+    eager = VIM(princ_dims=0.5)
+    eager.fit(model, (x[:50], y[:50]))
+    eager.partial_fit((x[50:], y[50:]))
+    np.testing.assert_allclose(scores_after, eager.score(x), rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("jit_compile", [False, True])
+def test_compiled_function(jit_compile):
+    """Test TorchOperator.compile on a function with a model"""
+    model = torch.nn.Sequential(
+        torch.nn.Linear(8, 16), torch.nn.ReLU(), torch.nn.Linear(16, 4)
+    )
+
+    def func(inputs):
+        return torch.logsumexp(model(inputs), dim=-1)
+
+    compiled = TorchOperator.compile(func, model=model, jit_compile=jit_compile)
+    x = np.random.rand(5, 8).astype(np.float32)
+    np.testing.assert_allclose(
+        compiled(x).numpy(), func(torch.Tensor(x)).detach().numpy(), rtol=1e-6
+    )
+    assert torch.is_inference(compiled(x))
+    assert not compiled.fallback
+
+
+def test_compiled_function_errors():
+    """
+    Test that the errors raised by the function on bad inputs, or by the compiled
+    function, are propagated without disabling the compilation
+    """
+    model = torch.nn.Linear(8, 4)
+
+    def func(inputs):
+        return model(inputs)
+
+    compiled = TorchOperator.compile(func, model=model)
+    x = torch.rand(5, 8)
+    compiled(x)
+    with pytest.raises(RuntimeError):
+        compiled(torch.rand(5, 7))
+    with pytest.raises(RuntimeError):
+        compiled(torch.rand(5, 8, dtype=torch.float64))
+    assert not compiled.fallback
+    assert len(compiled._traces) == 1
+
+    def failing_trace(inputs):
+        raise RuntimeError("out of memory")
+
+    trace = compiled._traces[(tuple(x.shape), x.dtype, x.device)]
+    compiled._traces[(tuple(x.shape), x.dtype, x.device)] = failing_trace
+    with pytest.raises(RuntimeError, match="out of memory"):
+        compiled(x)
+    assert not compiled.fallback
+
+    compiled._traces[(tuple(x.shape), x.dtype, x.device)] = trace
+    np.testing.assert_allclose(
+        compiled(x).numpy(), model(x).detach().numpy(), rtol=1e-6
+    )
+
+
+def test_compiled_function_control_flow():
+    """
+    Test that a function with data-dependent control flow falls back to eager mode
+    rather than freezing the branch of the first traced batch
+    """
+
+    def func(inputs):
+        if inputs.sum() > 0:
+            return inputs * 2
+        return -inputs
+
+    compiled = TorchOperator.compile(func)
+    x = torch.rand(4, 3)
+    with pytest.warns(UserWarning, match="falling back to eager mode"):
+        np.testing.assert_allclose(compiled(x).numpy(), 2 * x.numpy())
+    assert compiled.fallback
+    np.testing.assert_allclose(compiled(-x).numpy(), x.numpy())
+
+
+def test_compiled_scoring_unsplit():
+    """Test that the oodmodels which do not split their scoring cannot be compiled"""
+    with pytest.raises(NotImplementedError):
+        Cascade(
+            MLS(), ODIN(), band=(-1.0, 1.0), standardize=False
+        ).set_compiled_scoring()
@@ -20,6 +20,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import numpy as np
 from torch.utils.data import DataLoader
 
 from oodeel.methods import DKNN
@@ -51,3 +52,30 @@ def test_dknn():
     scores = dknn.score(data_x)
 
     assert scores.shape == (100,)
+
+
+def test_dknn_score_k():
+    """
+    Test DKNN.score_k
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    data_x = generate_data_torch(
+        x_shape=input_shape, num_labels=num_labels, samples=samples, one_hot=False
+    )
+    data_x = DataLoader(data_x, batch_size=samples // 2)
+    model = ComplexNet()
+
+    dknn = DKNN(nearest=1)
+    dknn.fit(model, fit_dataset=data_x)
+    scores_k = dknn.score_k(data_x, [1, 2, 4])
+    assert scores_k.shape == (samples, 3)
+    for i, k in enumerate([1, 2, 4]):
+        dknn.nearest = k
+        assert np.allclose(scores_k[:, i], dknn.score(data_x))
+
+    scores_mean = dknn.score_k(data_x, [1, 4], reduction="mean")
+    assert np.allclose(scores_mean[:, 0], scores_k[:, 0])
+    assert np.all(scores_mean[:, 1] <= scores_k[:, 2] + 1e-6)
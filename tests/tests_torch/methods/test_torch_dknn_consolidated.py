@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+from torch.utils.data import DataLoader
+
+from oodeel.methods import DKNN
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def test_dknn_consolidated():
+    """
+    Test DKNN with a consolidated index
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 4)
+    model = ComplexNet()
+
+    dknn = DKNN(nearest=3)
+    dknn.fit(model, data_x)
+    dknn_consolidated = DKNN(nearest=3, consolidated=True)
+    dknn_consolidated.fit(model, data_x)
+
+    assert dknn_consolidated.n_references == samples
+    assert np.allclose(dknn_consolidated.score(data_x), dknn.score(data_x), atol=1e-5)
+    references = dknn.get_references()
+    for class_label, vectors in dknn_consolidated.get_references().items():
+        assert np.allclose(vectors, references[class_label])
+
+    # buffered references are merged before the next scoring, the pipelined
+    # searches only reading the reference set
+    dknn.partial_fit(data_x)
+    dknn_consolidated.partial_fit(data_x)
+    assert dknn_consolidated.n_references == 2 * samples
+    assert len(dknn_consolidated._pending_references) > 0
+    scores = dknn_consolidated.score(data_x, pipelined=True)
+    assert len(dknn_consolidated._pending_references) == 0
+    assert np.allclose(scores, dknn.score(data_x), atol=1e-5)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn_consolidated.save(path)
+        for mmap in [True, False]:
+            loaded = DKNN(nearest=3).load(path, model, mmap=mmap)
+            assert loaded.consolidated
+            assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import faiss
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import DKNN
+from oodeel.utils.knn import NumpyBackend
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+@pytest.mark.parametrize("n_references, k", [(1000, 5), (30, 50)])
+def test_numpy_knn(n_references, k):
+    """
+    Test the blocked NumPy kNN search against faiss
+    """
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(64, 16)).astype(np.float32)
+    references = rng.normal(size=(n_references, 16)).astype(np.float32)
+
+    # small blocks to exercise the merge of the blocks results
+    backend = NumpyBackend(block_memory=64 * 4 * 100, n_threads=4)
+    distances, indices = backend.knn(queries, references, k)
+    faiss_distances, faiss_indices = faiss.knn(queries, references, k)
+
+    k_found = min(k, n_references)
+    assert np.allclose(distances[:, :k_found], faiss_distances[:, :k_found], atol=1e-4)
+    assert np.mean(indices[:, :k_found] == faiss_indices[:, :k_found]) > 0.99
+    assert np.all(indices[:, k_found:] == -1)
+
+
+def test_numpy_flat_index():
+    """
+    Test the searches of an ID-mapped NumPy index with fewer vectors than
+    neighbors, including an empty one, and the release of the thread pool
+    """
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(8, 4)).astype(np.float32)
+    backend = NumpyBackend(block_memory=8 * 4, n_threads=2)
+    index = backend.create_index(4, with_ids=True)
+
+    distances, indices = index.search(queries, 3)
+    assert np.all(indices == -1)
+    assert distances.shape == (8, 3)
+
+    index.add_with_ids(rng.normal(size=(2, 4)), np.array([10, 20]))
+    _, indices = index.search(queries, 3)
+    assert np.all(np.isin(indices[:, :2], [10, 20]))
+    assert np.all(indices[:, 2] == -1)
+
+    index.remove_ids(np.array([10, 20]))
+    _, indices = index.search(queries, 3)
+    assert np.all(indices == -1)
+
+    index.add_with_ids(rng.normal(size=(6, 4)), np.arange(6))
+    index.search(queries, 1)
+    assert backend._executor is not None
+    backend.close()
+    assert backend._executor is None
+    _, indices = index.search(queries, 1)
+    assert np.all(indices >= 0)
+
+
+@pytest.mark.parametrize("max_references", [None, 40])
+def test_dknn_numpy_backend(max_references):
+    """
+    Test DKNN with the NumPy kNN backend
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 4)
+    model = ComplexNet()
+
+    dknn = DKNN(nearest=3, knn_backend="faiss")
+    dknn.fit(model, data_x)
+    dknn_numpy = DKNN(nearest=3, knn_backend="numpy", max_references=max_references)
+    dknn_numpy.fit(model, data_x)
+    scores = dknn_numpy.score(data_x)
+    if max_references is None:
+        assert np.allclose(scores, dknn.score(data_x), atol=1e-5)
+    else:
+        assert dknn_numpy.n_references <= max_references
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn_numpy.save(path)
+        for mmap in [True, False]:
+            loaded = DKNN(nearest=3).load(path, model, mmap=mmap)
+            assert loaded.knn_backend.name == "numpy"
+            assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from oodeel.methods import DKNN
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+@pytest.mark.parametrize(
+    "projection, expected_dim",
+    [("pca", 16), ("random", 16), ("sparse_random", 16), ("gap", 16)],
+)
+def test_dknn_projection(projection, expected_dim):
+    """
+    Test DKNN with a projection of conv features
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples)
+    model = ComplexNet()
+
+    dknn = DKNN(
+        output_layers_id=["feature_extractor.pool2"],
+        projection=projection,
+        projection_dim=16,
+        seed=0,
+    )
+    dknn.partial_fit(data_x, model)
+    assert all(index.d == expected_dim for index in dknn.index.values())
+    if projection in ["random", "sparse_random"]:
+        # the random projection only depends on the seed
+        other = DKNN(
+            output_layers_id=["feature_extractor.pool2"],
+            projection=projection,
+            projection_dim=16,
+            seed=0,
+        )
+        other.partial_fit(data_x, model)
+        assert np.array_equal(other._projection_matrix, dknn._projection_matrix)
+    assert dknn.score(data_x).shape == (samples,)
+
+    features = dknn.feature_extractor.predict(dataset.tensors[0])
+    projected = dknn._project(features)
+    assert projected.device == features.device
+    if projection == "gap":
+        assert torch.allclose(projected, features.mean(dim=(2, 3)))
+    if projection == "pca":
+        projected = projected.detach().cpu().numpy()
+        assert np.allclose(np.cov(projected.T, bias=True), np.eye(16), atol=1e-3)
+
+
+def test_dknn_pca_class_sorted():
+    """
+    Test that the "pca" projection of DKNN is fitted on samples of the whole
+    dataset, and not only on the first classes of a class-sorted dataset
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    x, y = dataset.tensors
+    order = torch.argsort(y)
+    x, y = x[order] + y[order, None, None, None], y[order]
+    data_x = DataLoader(torch.utils.data.TensorDataset(x, y), batch_size=10)
+    model = ComplexNet()
+
+    dknn = DKNN(projection="pca", projection_dim=4)
+    dknn.fit(model, data_x)
+    assert sum(index.ntotal for index in dknn.index.values()) == samples
+
+    features = dknn.feature_extractor.predict(x).detach().cpu().numpy()
+    mean = np.mean(features, axis=0)
+    # the first 40 samples only span the first 4 classes
+    first_classes_mean = np.mean(features[:40], axis=0)
+    assert np.linalg.norm(dknn._projection_mean - mean) < 0.5 * np.linalg.norm(
+        first_classes_mean - mean
+    )
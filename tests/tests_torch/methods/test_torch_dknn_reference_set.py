@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import faiss
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import DKNN
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def _references(dknn, class_label):
+    index = dknn.index[class_label]
+    vectors = faiss.rev_swig_ptr(
+        faiss.downcast_index(index.index).get_xb(), index.ntotal * index.d
+    )
+    ids = faiss.vector_to_array(index.id_map)
+    return dict(zip(ids, np.array(vectors).reshape(index.ntotal, index.d)))
+
+
+def test_fifo_eviction():
+    """
+    Test the FIFO eviction of the bounded DKNN reference set
+    """
+    dknn = DKNN(max_references=6, eviction="fifo")
+    vectors = np.random.rand(10, 4).astype(np.float32)
+
+    dknn._add_references(0, vectors[:5])
+    assert dknn.index[0].ntotal == 5
+    dknn._add_references(0, vectors[5:8])
+    assert dknn.index[0].ntotal == 6
+    references = _references(dknn, 0)
+    assert np.allclose(np.stack(list(references.values())), vectors[2:8])
+
+    # a new class shrinks the quota of the other ones
+    dknn._add_references(1, vectors[8:])
+    assert dknn.index[0].ntotal == 3
+    assert dknn.index[1].ntotal == 2
+    assert np.allclose(np.stack(list(_references(dknn, 0).values())), vectors[5:8])
+
+
+def test_reservoir_eviction():
+    """
+    Test the reservoir eviction of the bounded DKNN reference set
+    """
+    np.random.seed(0)
+    dknn = DKNN(max_references=50, eviction="reservoir", seed=0)
+    n_batches, batch_size = 40, 25
+    vectors = np.random.rand(n_batches * batch_size, 8).astype(np.float32)
+    # store the position of each vector in its first coordinate
+    vectors[:, 0] = np.arange(len(vectors))
+
+    for i in range(n_batches):
+        dknn._add_references(0, vectors[i * batch_size : (i + 1) * batch_size])
+        assert dknn.index[0].ntotal == min(50, (i + 1) * batch_size)
+        assert len(dknn._reference_ids[0]) == dknn.index[0].ntotal
+
+    # kept vectors are distinct and spread over the whole stream
+    kept = np.stack(list(_references(dknn, 0).values()))[:, 0]
+    assert len(np.unique(kept)) == 50
+    assert np.mean(kept) > 0.25 * len(vectors)
+    assert np.mean(kept) < 0.75 * len(vectors)
+
+
+def test_reservoir_eviction_seed():
+    """
+    Test that the reservoir sampling and evictions only depend on the seed
+    """
+    vectors = np.random.rand(200, 4).astype(np.float32)
+    references = []
+    for _ in range(2):
+        dknn = DKNN(max_references=20, eviction="reservoir", seed=0)
+        for i in range(0, 200, 25):
+            dknn._add_references(0, vectors[i : i + 25])
+        dknn._add_references(1, vectors[:5])
+        references.append(dknn.get_references()[0])
+    assert np.array_equal(references[0], references[1])
+
+
+def test_bounded_dknn_too_many_classes():
+    """
+    Test that a bounded reference set refuses more classes than max_references
+    """
+    dknn = DKNN(max_references=2)
+    vectors = np.random.rand(3, 4).astype(np.float32)
+    dknn._add_references(0, vectors[:1])
+    dknn._add_references(1, vectors[1:2])
+    with pytest.raises(ValueError, match="max_references"):
+        dknn._add_references(2, vectors[2:])
+    assert dknn.n_references <= 2
+
+
+@pytest.mark.parametrize("eviction", ["fifo", "reservoir"])
+def test_bounded_dknn(eviction):
+    """
+    Test DKNN with a bounded reference set
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 4)
+    model = ComplexNet()
+
+    dknn = DKNN(nearest=1, max_references=30, eviction=eviction)
+    dknn.partial_fit(data_x, model)
+    dknn.partial_fit(data_x)
+    assert sum(index.ntotal for index in dknn.index.values()) <= 30
+    scores = dknn.score(data_x)
+    assert scores.shape == (samples,)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "dknn")
+        dknn.save(path)
+        loaded = DKNN(nearest=1, max_references=30, eviction=eviction)
+        loaded.load(path, model, mmap=False)
+        assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
+        loaded.partial_fit(data_x)
+        assert sum(index.ntotal for index in loaded.index.values()) <= 30
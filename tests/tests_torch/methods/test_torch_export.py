@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import torch
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+METHODS = [
+    (MLS, dict()),
+    (MLS, dict(output_activation="softmax")),
+    (Energy, dict()),
+    (VIM, dict(princ_dims=0.5)),
+    (Mahalanobis, dict(eps=0.0)),
+    (Mahalanobis, dict(eps=0.0, rank=8)),
+]
+
+
+def _fit(method, kwargs):
+    input_shape = (3, 32, 32)
+    x, y = generate_data_torch(input_shape, 10, 100, one_hot=False).tensors
+    model = ComplexNet()
+    oodmodel = method(**kwargs)
+    oodmodel.fit(model, (x, y) if oodmodel.requires_to_fit_dataset else None)
+    return oodmodel, model, x
+
+
+@pytest.mark.parametrize("method, kwargs", METHODS)
+def test_export_torchscript(method, kwargs):
+    """
+    Test that the exported TorchScript module outputs the logits of the model and
+    the scores of the oodmodel, for any batch size
+    """
+    oodmodel, model, x = _fit(method, kwargs)
+    scores = oodmodel.score(x)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "exported.pt")
+        oodmodel.export(path, example_inputs=x[:8])
+        exported = torch.jit.load(path)
+
+    with torch.no_grad():
+        logits, ood_score = exported(x[:37])
+        np.testing.assert_allclose(logits, model(x[:37]), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(ood_score, scores[:37], rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("method, kwargs", METHODS)
+def test_export_onnx(method, kwargs):
+    """
+    Test that the exported ONNX graph outputs the logits of the model and the
+    scores of the oodmodel, for any batch size
+    """
+    onnxruntime = pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnxscript")
+    oodmodel, model, x = _fit(method, kwargs)
+    scores = oodmodel.score(x)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, "exported.onnx")
+        oodmodel.export(path, example_inputs=x[:8], export_format="onnx")
+        session = onnxruntime.InferenceSession(path)
+        logits, ood_score = session.run(
+            ["logits", "ood_score"], {"inputs": x[:37].numpy()}
+        )
+
+    with torch.no_grad():
+        np.testing.assert_allclose(logits, model(x[:37]), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(ood_score, scores[:37], rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (ODIN, dict()),
+        (Mahalanobis, dict(eps=0.002)),
+        (Mahalanobis, dict(eps=0.0, nearest_center=True)),
+        (DKNN, dict(nearest=3)),
+    ],
+)
+def test_export_unsupported(method, kwargs):
+    """
+    Test that the oodmodels not computing their scores in the model backend cannot
+    be exported
+    """
+    oodmodel, _, x = _fit(method, kwargs)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        with pytest.raises(NotImplementedError):
+            oodmodel.export(os.path.join(tmpdirname, "exported.pt"), x[:8])
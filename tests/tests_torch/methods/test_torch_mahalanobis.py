@@ -20,6 +20,11 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import tempfile
+
+import numpy as np
+import pytest
+import torch
 from torch.utils.data import DataLoader
 
 from oodeel.methods import Mahalanobis
@@ -44,3 +49,150 @@ def test_mahalanobis():
     scores = mahalanobis.score(dataset)
 
     assert scores.shape == (100,)
+
+
+@pytest.mark.parametrize("residual", ["isotropic", "diagonal"])
+def test_mahalanobis_low_rank(residual):
+    """
+    Test Mahalanobis with a low-rank plus diagonal covariance model
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    dataset = DataLoader(dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    # float64 scores, to compare with the full covariance model
+    mahalanobis = Mahalanobis(eps=0).set_dtype_policy(score="float64")
+    mahalanobis.fit(model, fit_dataset=dataset)
+    scores = mahalanobis.score(dataset)
+    dim = mahalanobis._mus[mahalanobis._labels_indexes[0]].shape[0]
+
+    for rank in [8, dim - 1]:
+        mahalanobis_low_rank = Mahalanobis(rank=rank, residual=residual)
+        mahalanobis_low_rank.set_dtype_policy(score="float64")
+        mahalanobis_low_rank.fit(model, fit_dataset=dataset)
+        scores_low_rank = mahalanobis_low_rank.score(dataset)
+        assert scores_low_rank.shape == (100,)
+        assert np.all(np.isfinite(scores_low_rank))
+        assert mahalanobis_low_rank._get_precision()[1].shape == (dim, rank)
+
+    # with an exact sketch, the isotropic residual recovers the full covariance
+    if residual == "isotropic":
+        mahalanobis_low_rank.eps = 0
+        scores_low_rank = mahalanobis_low_rank.score(dataset)
+        assert np.allclose(scores_low_rank, scores, rtol=1e-4)
+
+
+@pytest.mark.parametrize("rank, eps", [(None, 0), (None, 0.02), (8, 0.02)])
+def test_mahalanobis_nearest_center(rank, eps):
+    """
+    Test Mahalanobis with a nearest center search in the whitened feature space
+    """
+    np.random.seed(0)
+    torch.manual_seed(0)
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    dataset = DataLoader(dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    # float64 scores, for the input perturbations of both models to match
+    mahalanobis = Mahalanobis(eps=eps, rank=rank).set_dtype_policy(score="float64")
+    mahalanobis.fit(model, fit_dataset=dataset)
+    for knn_backend in ["faiss", "numpy"]:
+        mahalanobis_nc = Mahalanobis(
+            eps=eps, rank=rank, nearest_center=True, knn_backend=knn_backend
+        ).set_dtype_policy(score="float64")
+        mahalanobis_nc.fit(model, fit_dataset=dataset)
+        # same sketch for the low-rank model
+        mahalanobis_nc._set_fitted_state(mahalanobis._get_fitted_state())
+        scores = mahalanobis_nc.score(dataset)
+        assert np.allclose(scores, mahalanobis.score(dataset), rtol=1e-3, atol=1e-2)
+        if eps == 0:
+            # the distance to the closest center is computed in the score dtype
+            assert scores.dtype == np.float64
+            assert np.allclose(scores, mahalanobis.score(dataset), rtol=1e-9)
+
+
+@pytest.mark.parametrize("pooling", ["gap", "flatten"])
+def test_mahalanobis_multi_layer(pooling):
+    """
+    Test Mahalanobis on several output layers, one of them being a feature map
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    dataset = DataLoader(dataset, batch_size=samples // 2)
+    ood_dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    ood_dataset = DataLoader(ood_dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    mahalanobis = Mahalanobis(
+        output_layers_id=["feature_extractor.relu2", "fcs.fc2"],
+        pooling=pooling,
+        eps=0.002,
+    )
+    mahalanobis.fit(model, fit_dataset=dataset)
+    scores = mahalanobis.score(dataset)
+    assert scores.shape == (100,)
+    assert np.all(np.isfinite(scores))
+    dims = [16 if pooling == "gap" else 16 * 10 * 10, 84]
+    for layer_model, dim in zip(mahalanobis._layer_models, dims):
+        assert layer_model._mus[layer_model._labels_indexes[0]].shape == (dim,)
+
+    layer_weights = mahalanobis.fit_layer_weights(dataset, ood_dataset)
+    assert layer_weights.shape == (2,)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        mahalanobis.save(tmpdirname)
+        mahalanobis_loaded = Mahalanobis(
+            output_layers_id=["feature_extractor.relu2", "fcs.fc2"],
+            pooling=pooling,
+            eps=0.002,
+        ).load(tmpdirname, model)
+        assert np.allclose(
+            mahalanobis_loaded.score(dataset), mahalanobis.score(dataset), rtol=1e-4
+        )
+
+
+@pytest.mark.parametrize(
+    "fit_dtype, score_dtype, rtol",
+    [
+        ("float64", "float32", 1e-3),
+        ("float32", "float32", 1e-3),
+        ("float64", "float16", 5e-2),
+        ("float32", "bfloat16", 2e-1),
+    ],
+)
+def test_mahalanobis_dtype_policy(fit_dtype, score_dtype, rtol):
+    """
+    Test the numerical tolerance of Mahalanobis scores with lower precision dtypes
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 200
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    dataset = DataLoader(dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    mahalanobis = Mahalanobis(eps=0).set_dtype_policy(score="float64")
+    mahalanobis.fit(model, fit_dataset=dataset)
+    scores = mahalanobis.score(dataset)
+
+    mahalanobis_low = Mahalanobis(eps=0).set_dtype_policy(
+        fit=fit_dtype, score=score_dtype
+    )
+    mahalanobis_low.fit(model, fit_dataset=dataset)
+    assert mahalanobis_low._get_fitted_state()["mus"].dtype == fit_dtype
+    assert str(mahalanobis_low._get_precision()[0].dtype) == f"torch.{score_dtype}"
+    scores_low = mahalanobis_low.score(dataset)
+    assert np.all(np.isfinite(scores_low))
+    assert np.allclose(scores_low, scores, rtol=rtol)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import DKNN
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from oodeel.utils import NumpyOperator
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import export_onnx
+from tests.tests_torch import generate_data_torch
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        (MLS, dict()),
+        (Energy, dict()),
+        (VIM, dict(princ_dims=0.5)),
+        (DKNN, dict(nearest=3)),
+        (Mahalanobis, dict(eps=0.0)),
+        (Mahalanobis, dict(eps=0.0, pooling="gap")),
+    ],
+)
+def test_onnx_scoring(method, kwargs):
+    """
+    Test that the scores of an oodmodel fitted on the ONNX export of a torch model
+    are those of the oodmodel fitted on the torch model
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 4)
+    model = ComplexNet()
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = export_onnx(model, os.path.join(tmpdirname, "model.onnx"))
+        torch_kwargs, onnx_kwargs = dict(kwargs), dict(kwargs)
+        if kwargs.get("pooling") == "gap":
+            relu = [n for n in onnx.load(path).graph.node if n.op_type == "Relu"][1]
+            torch_kwargs["output_layers_id"] = ["feature_extractor.relu2"]
+            onnx_kwargs["output_layers_id"] = [relu.name]
+
+        scores = {}
+        for model_id, method_kwargs in [(model, torch_kwargs), (path, onnx_kwargs)]:
+            oodmodel = method(**method_kwargs)
+            oodmodel.fit(model_id, data_x if oodmodel.requires_to_fit_dataset else None)
+            scores[oodmodel.backend] = oodmodel.score(data_x)
+        assert isinstance(oodmodel.op, NumpyOperator)
+        np.testing.assert_allclose(
+            scores["onnx"], scores["torch"], rtol=1e-3, atol=1e-3
+        )
+
+        # save / load with the ONNX model
+        oodmodel.save(os.path.join(tmpdirname, "oodmodel"))
+        loaded = method(**onnx_kwargs).load(os.path.join(tmpdirname, "oodmodel"), path)
+        np.testing.assert_allclose(loaded.score(data_x), scores["onnx"], rtol=1e-5)
+
+
+def test_onnx_scoring_gradients():
+    """Test that input perturbation is not available on ONNX models"""
+    dataset = generate_data_torch((3, 32, 32), 10, 20, one_hot=False)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = export_onnx(ComplexNet(), os.path.join(tmpdirname, "model.onnx"))
+        oodmodel = ODIN()
+        oodmodel.fit(path)
+        with pytest.raises(NotImplementedError):
+            oodmodel.score(dataset.tensors[0])
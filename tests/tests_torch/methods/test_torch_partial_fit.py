@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+from torch.utils.data import DataLoader
+from torch.utils.data import TensorDataset
+
+from oodeel.methods import DKNN
+from oodeel.methods import Mahalanobis
+from oodeel.methods import VIM
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def _split_data(input_shape, num_labels, samples):
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    x, y = dataset.tensors
+    half = samples // 2
+    return (
+        DataLoader(dataset, batch_size=samples // 4),
+        DataLoader(TensorDataset(x[:half], y[:half]), batch_size=samples // 4),
+        (x[half:], y[half:]),
+    )
+
+
+def test_partial_fit_mahalanobis():
+    """
+    Test Mahalanobis.partial_fit
+    """
+    data_x, data_first, batch_second = _split_data((3, 32, 32), 10, 100)
+    model = ComplexNet()
+
+    oodmodel = Mahalanobis(eps=0.002)
+    oodmodel.fit(model, data_x)
+    scores = oodmodel.score(data_x)
+
+    oodmodel_partial = Mahalanobis(eps=0.002)
+    oodmodel_partial.fit(model, data_first)
+    oodmodel_partial.partial_fit(batch_second)
+    assert np.allclose(oodmodel_partial.score(data_x), scores, rtol=1e-4)
+
+
+def test_partial_fit_vim():
+    """
+    Test VIM.partial_fit
+    """
+    data_x, data_first, batch_second = _split_data((3, 32, 32), 10, 100)
+    model = ComplexNet()
+
+    oodmodel = VIM(princ_dims=0.5)
+    oodmodel.fit(model, data_x)
+
+    oodmodel_partial = VIM(princ_dims=0.5)
+    oodmodel_partial.fit(model, data_first)
+    oodmodel_partial.partial_fit(batch_second)
+    scores = oodmodel_partial.score(data_x)
+
+    assert scores.shape == (100,)
+    assert np.allclose(oodmodel_partial.center, oodmodel.center, atol=1e-5)
+    assert np.allclose(oodmodel_partial.eigenvalues, oodmodel.eigenvalues, atol=1e-5)
+
+
+def test_partial_fit_dknn():
+    """
+    Test DKNN.partial_fit
+    """
+    data_x, data_first, batch_second = _split_data((3, 32, 32), 10, 100)
+    model = ComplexNet()
+
+    oodmodel = DKNN(nearest=3)
+    oodmodel.partial_fit(data_x, model)
+    scores = oodmodel.score(data_x)
+
+    oodmodel_partial = DKNN(nearest=3)
+    oodmodel_partial.partial_fit(data_first, model)
+    oodmodel_partial.partial_fit(batch_second)
+    assert sum(index.ntotal for index in oodmodel_partial.index.values()) == 100
+    assert np.allclose(oodmodel_partial.score(data_x), scores, atol=1e-5)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import Cascade
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import ODIN
+from oodeel.methods import VIM
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+@pytest.mark.parametrize(
+    "oodmodel",
+    [
+        MLS(),
+        Energy(),
+        ODIN(),
+        VIM(princ_dims=0.5),
+        Mahalanobis(eps=0.0),
+        Mahalanobis(),
+        Cascade(MLS(), ODIN(), band=(-np.inf, np.inf), standardize=False),
+    ],
+)
+def test_pipelined_scoring(oodmodel):
+    """
+    Test OODModel.score in pipelined mode
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 10)
+    model = ComplexNet()
+
+    oodmodel.fit(model, data_x if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(data_x)
+    scores_pipelined = oodmodel.score(
+        data_x, pipelined=True, prefetch_size=1, n_workers=2
+    )
+
+    assert scores_pipelined.shape == (100,)
+    assert np.allclose(scores_pipelined, scores, atol=1e-4)
+
+
+def test_pipelined_scoring_abort():
+    """
+    Test that the loading thread of the pipelined mode terminates when the forward
+    stage fails, even once the whole dataset is loaded
+    """
+    dataset = generate_data_torch((3, 32, 32), 10, 20, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=10)
+    oodmodel = MLS()
+    oodmodel.fit(ComplexNet())
+
+    def _forward_device(inputs):
+        time.sleep(0.2)  # let the loader queue the whole dataset
+        raise RuntimeError("forward failed")
+
+    oodmodel._forward_device = _forward_device
+    with pytest.raises(RuntimeError):
+        oodmodel.score(data_x, pipelined=True, prefetch_size=1)
+
+    def loader_alive():
+        return any(
+            thread.name == "oodeel-pipelined-loader" for thread in threading.enumerate()
+        )
+
+    deadline = time.perf_counter() + 5
+    while loader_alive() and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    assert not loader_alive()
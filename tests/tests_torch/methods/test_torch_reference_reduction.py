@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+
+from oodeel.methods import DKNN
+from oodeel.methods.reference_reduction import reduce_references
+
+
+@pytest.mark.parametrize("strategy", ["random", "kmeans", "kcenter"])
+def test_reduce_references(strategy):
+    """
+    Test the reference reduction strategies
+    """
+    vectors = np.random.rand(200, 16).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    reduced = reduce_references(vectors, strategy, 0.1, seed=0)
+    assert reduced.shape == (20, 16)
+    assert reduce_references(vectors, strategy, 15, seed=0).shape == (15, 16)
+    assert np.allclose(np.linalg.norm(reduced, axis=-1), 1.0, atol=1e-5)
+    if strategy != "kmeans":
+        # reduced vectors are a subset of the vectors
+        assert all(np.any(np.all(vectors == v, axis=-1)) for v in reduced)
+
+
+def test_reduce_references_kcenter_coverage():
+    """
+    Test that the k-center coreset covers every cluster of the vectors
+    """
+    centers = np.eye(8, dtype=np.float32)
+    vectors = np.repeat(centers, 50, axis=0)
+    vectors += 0.01 * np.random.rand(*vectors.shape).astype(np.float32)
+
+    reduced = reduce_references(vectors, "kcenter", 8, seed=0)
+    assert set(np.argmax(reduced, axis=-1)) == set(range(8))
+
+
+def test_reduce_references_dedup():
+    """
+    Test the exact duplicates removal
+    """
+    vectors = np.random.rand(20, 4).astype(np.float32)
+    duplicated = np.concatenate([vectors, vectors[:5], vectors[3:8]])
+    assert np.array_equal(reduce_references(duplicated, "dedup"), vectors)
+
+
+def test_dknn_set_references():
+    """
+    Test DKNN.get_references and DKNN.set_references
+    """
+    dknn = DKNN()
+    references = {0: np.random.rand(10, 4).astype(np.float32)}
+    dknn.set_references(references)
+    assert dknn.index[0].ntotal == 10
+    dknn.set_references(
+        {0: reduce_references(dknn.get_references()[0], "random", 3, seed=0)}
+    )
+    assert dknn.index[0].ntotal == 3
+    assert all(
+        np.any(np.all(references[0] == v, axis=-1)) for v in dknn.get_references()[0]
+    )
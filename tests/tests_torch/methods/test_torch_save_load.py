@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import Cascade
+from oodeel.methods import Energy
+from oodeel.methods import Mahalanobis
+from oodeel.methods import MLS
+from oodeel.methods import VIM
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+@pytest.mark.parametrize(
+    "make_oodmodel",
+    [
+        lambda: Energy(),
+        lambda: VIM(princ_dims=0.5),
+        lambda: Mahalanobis(eps=0.0),
+        lambda: Cascade(MLS(), Mahalanobis(), band=(-0.1, 0.1), standardize=True),
+    ],
+)
+def test_save_load(make_oodmodel):
+    """
+    Test OODModel.save and OODModel.load
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=samples // 2)
+    model = ComplexNet()
+
+    oodmodel = make_oodmodel()
+    oodmodel.fit(model, data_x if oodmodel.requires_to_fit_dataset else None)
+    scores = oodmodel.score(data_x)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "oodmodel")
+        oodmodel.save(path)
+        for mmap in [True, False]:
+            loaded = make_oodmodel().load(path, model, mmap=mmap)
+            assert np.allclose(loaded.score(data_x), scores, atol=1e-5)
+
+        with pytest.raises(ValueError):
+            make_oodmodel().load(path, ComplexNet())
+        with pytest.raises(ValueError):
+            MLS().load(path, model)
+
+
+def test_save_load_cascade_stages():
+    """
+    Test that Cascade.load checks the classes of the cascade and of its stages
+    """
+    dataset = generate_data_torch((3, 32, 32), 10, 20, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=10)
+    model = ComplexNet()
+
+    cascade = Cascade(MLS(), Energy(), band=(-0.1, 0.1))
+    cascade.fit(model, data_x)
+    mls = MLS()
+    mls.fit(model)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cascade.save(os.path.join(tmpdir, "cascade"))
+        mls.save(os.path.join(tmpdir, "mls"))
+        with pytest.raises(ValueError):
+            Cascade(MLS(), VIM(), band=(-0.1, 0.1)).load(
+                os.path.join(tmpdir, "cascade"), model
+            )
+        with pytest.raises(ValueError):
+            Cascade(MLS(), Energy(), band=(-0.1, 0.1)).load(
+                os.path.join(tmpdir, "mls"), model
+            )
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from oodeel.methods import Mahalanobis
+from oodeel.methods import VIM
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data_torch
+
+
+def test_sharded_scoring():
+    """
+    Test OODModel.score_sharded
+    """
+    input_shape = (3, 32, 32)
+    num_labels = 10
+    samples = 100
+
+    dataset = generate_data_torch(input_shape, num_labels, samples, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=16)
+    model = ComplexNet()
+
+    for oodmodel in [VIM(princ_dims=0.5), Mahalanobis(eps=0.0)]:
+        # float64 scores, the shards being scored by batches of different sizes
+        oodmodel.set_dtype_policy(score="float64")
+        oodmodel.fit(model, data_x)
+        scores = oodmodel.score(data_x)
+        scores_sharded = oodmodel.score_sharded(data_x, n_workers=3)
+
+        assert scores_sharded.shape == (100,)
+        assert np.allclose(scores_sharded, scores, atol=1e-5)
+
+
+def test_sharded_scoring_shape():
+    """
+    Test that OODModel.score_sharded fails if the scores are not one per sample
+    """
+    dataset = generate_data_torch((3, 32, 32), 10, 20, one_hot=False)
+    data_x = DataLoader(dataset, batch_size=10)
+    oodmodel = VIM(princ_dims=0.5)
+    oodmodel.fit(ComplexNet(), data_x)
+    score_tensor = oodmodel._score_tensor
+    oodmodel._score_tensor = lambda inputs: np.stack([score_tensor(inputs)] * 2, 1)
+
+    with pytest.raises(RuntimeError, match="worker"):
+        oodmodel.score_sharded(data_x, n_workers=2)
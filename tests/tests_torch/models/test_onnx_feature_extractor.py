@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from oodeel.models.torch_feature_extractor import TorchFeatureExtractor
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import export_onnx
+from tests.tests_torch import generate_data_torch
+
+onnx = pytest.importorskip("onnx")
+onnxruntime = pytest.importorskip("onnxruntime")
+
+from oodeel.models.onnx_feature_extractor import OnnxFeatureExtractor  # noqa: E402
+from oodeel.models.onnx_feature_extractor import OnnxModel  # noqa: E402
+
+
+def test_onnx_feature_extractor():
+    """
+    Test that the features of the nodes of an ONNX graph, identified by rank or by
+    name, are those of the torch model
+    """
+    input_shape = (3, 32, 32)
+    dataset = generate_data_torch(input_shape, 10, 100)
+    model = ComplexNet()
+    torch_extractor = TorchFeatureExtractor(
+        model, output_layers_id=["feature_extractor.relu2", "fcs.fc3"]
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = export_onnx(model, os.path.join(tmpdirname, "model.onnx"))
+        relu = [n for n in onnx.load(path).graph.node if n.op_type == "Relu"][1]
+        for model_id in [path, OnnxModel(path, intra_op_num_threads=1)]:
+            onnx_extractor = OnnxFeatureExtractor(
+                model_id, output_layers_id=[relu.name, -1]
+            )
+            for data in [dataset.tensors[0], DataLoader(dataset, batch_size=30)]:
+                features = onnx_extractor.predict(data)
+                expected = torch_extractor.predict(data)
+                for f, e in zip(features, expected):
+                    assert isinstance(f, np.ndarray)
+                    np.testing.assert_allclose(f, e.numpy(), rtol=1e-4, atol=1e-5)
+
+        # tensor names, and the outputs of the graph
+        onnx_extractor = OnnxFeatureExtractor(path, output_layers_id=[relu.output[0]])
+        assert onnx_extractor.predict_tensor(dataset.tensors[0]).shape == (
+            100,
+            16,
+            10,
+            10,
+        )
+        with pytest.raises(ValueError):
+            OnnxFeatureExtractor(path, output_layers_id=["unknown"])
+
+
+@pytest.mark.parametrize("graph_optimization_level", ["disable", "all"])
+def test_onnx_model_session_options(graph_optimization_level):
+    """Test the session options, and the models given as inference sessions"""
+    model = ComplexNet()
+    x = torch.rand(10, 3, 32, 32)
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = export_onnx(model, os.path.join(tmpdirname, "model.onnx"))
+        onnx_model = OnnxModel(
+            path,
+            intra_op_num_threads=1,
+            inter_op_num_threads=1,
+            graph_optimization_level=graph_optimization_level,
+        )
+        options = onnx_model.session.get_session_options()
+        assert options.intra_op_num_threads == 1
+        with torch.no_grad():
+            np.testing.assert_allclose(onnx_model(x), model(x), rtol=1e-4, atol=1e-5)
+
+        session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        extractor = OnnxFeatureExtractor(session, output_layers_id=["logits"])
+        np.testing.assert_allclose(
+            extractor.predict_tensor(x), onnx_model(x), rtol=1e-4, atol=1e-6
+        )
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from oodeel.methods import Energy
+from oodeel.serving import MicroBatcher
+from oodeel.serving import ScoringServer
+from tests.tests_torch import ComplexNet
+from tests.tests_torch import generate_data
+
+
+def test_micro_batcher():
+    """
+    Test MicroBatcher
+    """
+    input_shape = (3, 32, 32)
+    samples = 40
+
+    data_x, _ = generate_data(x_shape=input_shape, samples=samples, one_hot=False)
+    model = ComplexNet()
+    energy = Energy()
+    energy.fit(model)
+    expected = energy.score(data_x)
+
+    with MicroBatcher(energy, max_batch_size=8, max_wait_ms=50) as batcher:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            scores = list(executor.map(batcher.score, [x[None] for x in data_x]))
+        metrics = batcher.metrics()
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+    assert metrics["n_requests"] == samples
+    assert max(metrics["batch_size_histogram"]) <= 8
+    assert metrics["n_batches"] < samples
+    assert metrics["latency_p50_ms"] <= metrics["latency_p99_ms"]
+
+
+def test_micro_batcher_invalid_requests():
+    """
+    Test that MicroBatcher rejects the requests without batch dimension or with
+    unexpected sample shapes, and keeps serving the following ones
+    """
+    input_shape = (3, 32, 32)
+    data_x, _ = generate_data(x_shape=input_shape, samples=4, one_hot=False)
+    energy = Energy()
+    energy.fit(ComplexNet())
+    expected = energy.score(data_x)
+
+    with MicroBatcher(energy, max_wait_ms=1) as batcher:
+        with pytest.raises(ValueError):
+            batcher.submit(5.0)
+        assert np.allclose(batcher.score(data_x, timeout=10), expected, atol=1e-5)
+
+    with MicroBatcher(energy, max_wait_ms=1, input_shape=input_shape) as batcher:
+        with pytest.raises(ValueError):
+            batcher.submit(data_x[:, :, :16])
+        assert np.allclose(batcher.score(data_x, timeout=10), expected, atol=1e-5)
+
+
+def test_micro_batcher_mixed_shapes():
+    """
+    Test that a request with another sample shape is not batched with the others,
+    and only fails its own future
+    """
+    input_shape = (3, 32, 32)
+    samples = 8
+    data_x, _ = generate_data(x_shape=input_shape, samples=samples, one_hot=False)
+    energy = Energy()
+    energy.fit(ComplexNet())
+    expected = energy.score(data_x)
+
+    with MicroBatcher(energy, max_batch_size=64, max_wait_ms=200) as batcher:
+        futures = [batcher.submit(x[None]) for x in data_x[: samples // 2]]
+        bad_future = batcher.submit(data_x[:1, :, :16, :16])
+        futures += [batcher.submit(x[None]) for x in data_x[samples // 2 :]]
+        scores = [future.result(timeout=10) for future in futures]
+        with pytest.raises(Exception):
+            bad_future.result(timeout=10)
+        metrics = batcher.metrics()
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+    assert metrics["n_requests"] == samples
+    assert metrics["batch_size_histogram"] == {samples: 1}
+
+
+def test_micro_batcher_batch_cap():
+    """
+    Test that multi-sample requests never make a micro-batch exceed max_batch_size,
+    except for a single oversized request scored alone, and that requests are
+    rejected once the micro-batcher is stopped
+    """
+    input_shape = (3, 32, 32)
+    data_x, _ = generate_data(x_shape=input_shape, samples=32, one_hot=False)
+    energy = Energy()
+    energy.fit(ComplexNet())
+    expected = energy.score(data_x)
+
+    with MicroBatcher(energy, max_batch_size=8, max_wait_ms=200) as batcher:
+        futures = [batcher.submit(data_x[i : i + 5]) for i in range(0, 20, 5)]
+        futures.append(batcher.submit(data_x[20:32]))
+        scores = [future.result(timeout=10) for future in futures]
+        metrics = batcher.metrics()
+
+    assert np.allclose(np.concatenate(scores), expected, atol=1e-5)
+    assert metrics["batch_size_histogram"] == {5: 4, 12: 1}
+    with pytest.raises(RuntimeError):
+        batcher.submit(data_x[:1])
+
+
+def test_scoring_server():
+    """
+    Test ScoringServer
+    """
+    input_shape = (3, 32, 32)
+    samples = 4
+
+    data_x, _ = generate_data(x_shape=input_shape, samples=samples, one_hot=False)
+    model = ComplexNet()
+    energy = Energy()
+    energy.fit(model)
+    expected = energy.score(data_x)
+
+    with ScoringServer(energy, port=0, max_wait_ms=1) as server:
+        request = urllib.request.Request(
+            server.address + "/score",
+            data=json.dumps({"inputs": data_x.tolist()}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            scores = json.loads(response.read())["scores"]
+        with urllib.request.urlopen(server.address + "/metrics") as response:
+            metrics = json.loads(response.read())
+
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert metrics["n_requests"] == 1
+
+
+def test_scoring_server_invalid_requests():
+    """
+    Test that ScoringServer answers 400 to malformed bodies and keeps serving
+    """
+    data_x, _ = generate_data(x_shape=(3, 32, 32), samples=2, one_hot=False)
+    energy = Energy()
+    energy.fit(ComplexNet())
+
+    def post(server, payload):
+        request = urllib.request.Request(
+            server.address + "/score",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status
+        except urllib.error.HTTPError as err:
+            return err.code
+
+    with ScoringServer(energy, port=0, max_wait_ms=1) as server:
+        assert post(server, [1, 2, 3]) == 400
+        assert post(server, 5) == 400
+        assert post(server, {"inputs": 5}) == 400
+        assert post(server, {"samples": []}) == 400
+        assert post(server, {"inputs": data_x.tolist()}) == 200
@@ -137,3 +137,17 @@ def generate_data_torch(x_shape=(3, 32, 32), num_labels=10, samples=100, one_hot
     x, y = generate_data(x_shape, num_labels, samples, one_hot)
     dataset = TensorDataset(torch.Tensor(x), torch.Tensor(y))
     return dataset
+
+
+def export_onnx(model, path, x_shape=(3, 32, 32)):
+    """Exports a torch model to an ONNX file with a dynamic batch size"""
+    with torch.no_grad():
+        torch.onnx.export(
+            model.eval(),
+            (torch.rand(4, *x_shape),),
+            path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        )
+    return path
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Copyright IRT Antoine de Saint Exupéry et Université Paul Sabatier Toulouse III - All
+# rights reserved. DEEL is a research program operated by IVADO, IRT Saint Exupéry,
+# CRIAQ and ANITI - https://www.deel.ai/
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import numpy as np
+import pytest
+import torch
+
+from oodeel.utils import NumpyOperator
+from tests.operator_conformance import CONFORMANCE_CASES
+from tests.operator_conformance import get_conformance_inputs
+
+
+@pytest.mark.parametrize("case", list(CONFORMANCE_CASES.keys()))
+def test_conformance(case):
+    """Test the operator primitives against their NumPy / scipy counterparts."""
+    op_fn, np_fn, input_names = CONFORMANCE_CASES[case]
+    inputs = get_conformance_inputs()
+    arrays = [inputs[name] for name in input_names]
+
+    numpy_operator = NumpyOperator(dtype="float64")
+    tensors = [numpy_operator.from_numpy(array) for array in arrays]
+    output = numpy_operator.convert_to_numpy(op_fn(numpy_operator, *tensors))
+    expected = np_fn(*arrays)
+
+    assert output.shape == np.shape(expected)
+    np.testing.assert_allclose(output, expected, rtol=1e-6, atol=1e-8)
+
+
+def test_conversions():
+    """Test the conversion of torch tensors and the dtype of the arrays."""
+    numpy_operator = NumpyOperator(dtype="float32")
+    tensor = torch.ones((2, 3), dtype=torch.float64, requires_grad=True)
+    array = numpy_operator.cast(tensor)
+    assert isinstance(array, np.ndarray) and array.dtype == np.float32
+    assert numpy_operator.convert_to_numpy(tensor).dtype == np.float64
+    assert numpy_operator.from_numpy(np.ones(2), "float16").dtype == np.float16
+
+    with pytest.raises(NotImplementedError):
+        numpy_operator.gradient(lambda x: x.sum(), array)
+    with pytest.raises(NotImplementedError):
+        NumpyOperator(dtype="bfloat16")
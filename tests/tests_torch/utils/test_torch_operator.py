@@ -20,9 +20,15 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import numpy as np
+import pytest
 import torch
 
+from oodeel.utils import get_dtype_policy
+from oodeel.utils import set_dtype_policy
 from oodeel.utils.torch_operator import TorchOperator
+from tests.operator_conformance import CONFORMANCE_CASES
+from tests.operator_conformance import get_conformance_inputs
 
 
 def test_gradient():
@@ -38,3 +44,42 @@ def test_gradient():
 
     assert tuple(gradients.shape) == input_shape
     assert torch.all(gradients == torch.ones(input_shape))
+
+
+def test_dtype_policy():
+    """Test the dtype of the tensors created by the operator."""
+    array = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+    assert TorchOperator().from_numpy(array).dtype == torch.float32
+    torch_operator = TorchOperator(dtype="float16")
+    assert torch_operator.from_numpy(array).dtype == torch.float16
+    assert torch_operator.from_numpy(array, "float64").dtype == torch.float64
+    tensor = torch_operator.cast(torch.ones(2), "bfloat16")
+    assert tensor.dtype == torch.bfloat16
+    assert torch_operator.convert_to_numpy(tensor).dtype == np.float32
+
+    policy = get_dtype_policy()
+    try:
+        set_dtype_policy(score="float64")
+        assert TorchOperator().from_numpy(array).dtype == torch.float64
+        with pytest.raises(NotImplementedError):
+            set_dtype_policy(fit="float16")
+    finally:
+        set_dtype_policy(**policy)
+    assert get_dtype_policy() == policy
+
+
+@pytest.mark.parametrize("case", list(CONFORMANCE_CASES.keys()))
+def test_conformance(case):
+    """Test the operator primitives against their NumPy / scipy counterparts."""
+    op_fn, np_fn, input_names = CONFORMANCE_CASES[case]
+    inputs = get_conformance_inputs()
+    arrays = [inputs[name] for name in input_names]
+
+    torch_operator = TorchOperator(dtype="float64")
+    tensors = [torch_operator.from_numpy(array) for array in arrays]
+    output = torch_operator.convert_to_numpy(op_fn(torch_operator, *tensors))
+    expected = np_fn(*arrays)
+
+    assert output.shape == np.shape(expected)
+    np.testing.assert_allclose(output, expected, rtol=1e-6, atol=1e-8)